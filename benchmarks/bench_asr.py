@@ -0,0 +1,99 @@
+"""Real-time factor and word error rate of speech backends on a WAV corpus.
+
+Usage: python benchmarks/bench_asr.py CORPUS_DIR [--backend NAME ...]
+
+Each CORPUS_DIR/<name>.wav (16-bit mono) needs a <name>.txt reference transcript.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from jarvis.asr import BACKENDS, make_backend
+from jarvis.wakeword import FRAME_MS, SAMPLE_RATE, SAMPLE_WIDTH, read_wav_frames
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".wav"):
+            continue
+        transcript = os.path.join(directory, name[:-4] + ".txt")
+        if not os.path.exists(transcript):
+            continue
+        with open(transcript, encoding="utf-8") as f:
+            corpus.append((name, read_wav_frames(os.path.join(directory, name)), f.read().strip()))
+    return corpus
+
+
+def evaluate(backend, corpus):
+    audio_seconds = decode_seconds = errors = 0.0
+    finalize = []
+    for name, frames, reference in corpus:
+        audio_seconds += len(frames) * FRAME_MS / 1000
+        audio = sr.AudioData(b"".join(frames), SAMPLE_RATE, SAMPLE_WIDTH)
+        start = time.perf_counter()
+        try:
+            if backend.streaming:
+                session = backend.start_stream()
+                for frame in frames:
+                    session.accept(frame)
+                # What the user waits for: only the tail is decoded after they stop talking
+                end_of_speech = time.perf_counter()
+                hypothesis = session.finish()
+                finalize.append(time.perf_counter() - end_of_speech)
+            else:
+                hypothesis = backend.recognize(audio)
+        except sr.UnknownValueError:
+            hypothesis = ""
+        decode_seconds += time.perf_counter() - start
+        wer = word_error_rate(reference, hypothesis)
+        errors += wer
+        print(f"  {name:32} WER {wer:5.2f}  {hypothesis!r}")
+    print(f"  real-time factor {decode_seconds / audio_seconds:.3f}   mean WER {errors / len(corpus):.3f}")
+    if finalize:
+        print(f"  mean end-of-speech to final transcript {sum(finalize) / len(finalize) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"no .wav/.txt pairs in {args.corpus}")
+    for name in args.backend or sorted(BACKENDS):
+        try:
+            backend = make_backend(name)
+        except RuntimeError as e:
+            print(f"{name}: skipped: {e}")
+            continue
+        print(f"{name}:")
+        evaluate(backend, corpus)
+
+
+if __name__ == "__main__":
+    main()
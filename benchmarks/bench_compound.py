@@ -0,0 +1,120 @@
+"""Compound commands run one at a time versus planned, in parallel and with batched questions.
+
+Browser opens, YouTube lookups and ChatGPT requests are simulated with fixed
+delays so the difference comes from orchestration alone, and no network or
+openai package is needed.
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.cache import ResponseCache
+from jarvis.engine import DryRun, JarvisEngine, default_app_index
+
+BROWSER_OPEN = 0.05
+VIDEO_LOOKUP = 0.4
+LLM_FIRST_TOKEN = 0.5
+LLM_PER_TOKEN = 0.01
+
+COMPOUND = [
+    "open github and search google for pyqt threads and play lo-fi",
+    "open google and facebook and instagram",
+    "what's the capital of france and what's the capital of spain and how far is the moon",
+    "tell me a joke and open youtube and play never gonna give you up",
+    "open calculator and notepad then close calculator",
+]
+
+
+# Loaded once up front so lookups never wait on a background scan
+app_index = default_app_index()
+
+
+class SlowDryRun(DryRun):
+    def open_url(self, url):
+        time.sleep(BROWSER_OPEN)
+        super().open_url(url)
+
+    def play_video(self, query):
+        time.sleep(VIDEO_LOOKUP + BROWSER_OPEN)
+        super().play_video(query)
+
+
+class FakeLLM:
+    """OpenAI-style client that streams a short answer after a fixed delay and counts requests."""
+    def __init__(self):
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **kwargs):
+        with self._lock:
+            self.requests += 1
+        time.sleep(LLM_FIRST_TOKEN)
+        words = ["Here", " is", " a", " short", " answer."]
+        if not stream:
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="".join(words)))])
+        return FakeStream(words)
+
+
+class FakeStream:
+    def __init__(self, words):
+        self.words = words
+
+    def __iter__(self):
+        for word in self.words:
+            time.sleep(LLM_PER_TOKEN)
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    def close(self):
+        pass
+
+
+def make_engine(llm):
+    dry_run = SlowDryRun()
+    return JarvisEngine("bench-compound", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                        launcher=dry_run, app_index=app_index, llm=llm, cache=ResponseCache())
+
+
+def main():
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        app_index.load()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+    print(f"{'command':66} {'one by one':>11} {'planned':>9}")
+    totals = [0.0, 0.0]
+    requests = [0, 0]
+    for command in COMPOUND:
+        timings = []
+        for mode in ("sequential", "planned"):
+            llm = FakeLLM()
+            engine = make_engine(llm)
+            real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+            try:
+                steps = engine.planner.plan(command)
+                start = time.perf_counter()
+                if mode == "sequential":
+                    for step in steps:
+                        engine.process_command(step.text, is_voice=False, on_token=lambda token: None)
+                else:
+                    engine.process_command(command, is_voice=False, on_token=lambda token: None)
+                timings.append(time.perf_counter() - start)
+            finally:
+                sys.stdout.close()
+                sys.stdout = real_stdout
+            requests[mode == "planned"] += llm.requests
+        totals[0] += timings[0]
+        totals[1] += timings[1]
+        print(f"{command[:66]:66} {timings[0] * 1000:9.0f}ms {timings[1] * 1000:7.0f}ms")
+    print(f"{'total':66} {totals[0] * 1000:9.0f}ms {totals[1] * 1000:7.0f}ms")
+    print(f"ChatGPT requests: {requests[0]} one by one, {requests[1]} planned")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
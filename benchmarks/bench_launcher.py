@@ -0,0 +1,63 @@
+"""Measure launch latency and zombie processes for AppLauncher with dummy executables."""
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.launcher import AppLauncher
+
+
+def make_dummy(directory, name, seconds):
+    """Write an executable that stays open for the given number of seconds."""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\nimport time\ntime.sleep({seconds})\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def zombies(pids):
+    """Count pids in the zombie state (Linux only)."""
+    count = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().split(")")[-1].split()[0] == "Z":
+                    count += 1
+        except OSError:
+            pass
+    return count
+
+
+def main(count=20):
+    with tempfile.TemporaryDirectory() as directory:
+        long_app = make_dummy(directory, "dummy-calculator", 30)
+        short_app = make_dummy(directory, "dummy-clock", 0)
+
+        start = time.perf_counter()
+        subprocess.run([make_dummy(directory, "dummy-blocking", 0.5)])
+        print(f"blocking subprocess.run: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        launcher = AppLauncher(reap_interval=0.2)
+        for _ in range(count):
+            launcher.launch("calculator", [long_app])
+        print(f"detached launch (mean of {count}): {launcher.stats()['mean_launch_ms']:8.1f} ms")
+        print(f"running after launch: {len(launcher.running())}")
+        print(f"closed: {launcher.close('calculator')}")
+
+        pids = [launcher.launch("clock", [short_app]).pid for _ in range(count)]
+        time.sleep(1.0)
+        print(f"zombies before reaping: {zombies(pids)}")
+        launcher.start_reaper()
+        time.sleep(0.5)
+        print(f"zombies after reaping:  {zombies(pids)}")
+        launcher.stop()
+        print(launcher.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Exercise the resilient ChatGPT client against the fake server's injected delays and errors.
+
+Scenarios: a healthy server, one failing 20% of requests with 429/500, a slow
+primary model with a fast fallback to hedge to, and a full outage where the
+circuit breaker should fail fast. Each prints success rate and latency
+percentiles next to a plain client with no retries.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_openai import FakeOpenAIServer
+
+from jarvis.llm import CircuitBreaker, ResilientClient
+from jarvis.trace import percentile
+
+PRIMARY = "gpt-4o-mini"
+FALLBACK = "gpt-fast"
+MESSAGES = [{"role": "user", "content": "what's the time zone of Tokyo"}]
+
+
+def run(client, count, stream=False):
+    """(success rate, p50 ms, p95 ms) over count requests."""
+    latencies = []
+    ok = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(model=PRIMARY, messages=MESSAGES, max_tokens=50,
+                                                      stream=stream)
+            if stream:
+                for _ in response:
+                    pass
+                response.close()
+            ok += 1
+        except Exception:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return ok / count, percentile(latencies, 0.5), percentile(latencies, 0.95)
+
+
+def report(name, result):
+    rate, p50, p95 = result
+    print(f"  {name:28} ok {rate:6.1%}   p50 {p50:8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main():
+    try:
+        import openai
+    except ImportError:
+        print("openai is not installed")
+        return 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    with FakeOpenAIServer(token_delay=0.0, seed=1) as fake:
+        def plain():
+            return openai.OpenAI(base_url=fake.base_url, api_key="sk-fake", max_retries=0)
+
+        def resilient(**kwargs):
+            kwargs.setdefault("backoff", 0.02)
+            return ResilientClient(api_key="sk-fake", base_url=fake.base_url, **kwargs)
+
+        print("healthy server")
+        report("plain", run(plain(), count))
+        client = resilient()
+        report("resilient (pooled)", run(client, count))
+        report("resilient, streamed", run(client, count, stream=True))
+
+        print("20% of requests fail with 429 or 500")
+        fake.error_rate = 0.2
+        report("plain", run(plain(), count))
+        client = resilient(breaker=CircuitBreaker(failure_threshold=10))
+        report("resilient", run(client, count))
+        report("resilient, streamed", run(client, count, stream=True))
+        print(f"  {client.stats()}")
+        fake.error_rate = 0.0
+
+        print("slow primary (1 s), fast fallback, hedged after 0.2 s")
+        fake.model_latency = {PRIMARY: 1.0, FALLBACK: 0.02}
+        hedge_count = max(5, count // 10)
+        report("no hedging", run(resilient(), hedge_count))
+        client = resilient(hedge_model=FALLBACK, hedge_after=0.2)
+        report("hedged", run(client, hedge_count))
+        print(f"  {client.stats()}")
+        fake.model_latency = {}
+
+        print("outage: every request fails with 500")
+        fake.error_rate = 1.0
+        fake.error_statuses = (500,)
+        report("retries, no breaker", run(resilient(breaker=CircuitBreaker(failure_threshold=10 ** 9)), 10))
+        client = resilient(breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30))
+        report("retries + breaker", run(client, count))
+        print(f"  {client.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Loading, routing and hot-reloading a large command registry.
+
+Usage: python benchmarks/bench_registry.py [--size 5000]
+
+Writes a temporary config with --size websites, a tenth as many search
+platforms and apps, and a hundred custom intents, then reports how long it
+takes to load, to build an engine's routes from it and to reload it while
+the engine is in use. Routing latency is compared with the built-in
+registry, and the trie-compiled name index with a flat alternation.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JARVIS_CACHE_DB", "")
+
+from jarvis.engine import DryRun, JarvisEngine
+from jarvis.registry import DEFAULT_CONFIG, Registry, RegistryWatcher
+from jarvis.router import literal_alternation
+from jarvis.trace import percentile
+
+COMMANDS = [
+    "open google",
+    "open site 4321",
+    "search cats on youtube",
+    "search llamas on platform 77",
+    "play never gonna give you up",
+    "open calculator",
+    "weather 42 in paris",
+    "what's the capital of france",
+]
+
+
+def write_config(path, size):
+    lines = ["[websites]"]
+    lines += [f'"site {n}" = "https://site{n}.example.com"' for n in range(size)]
+    lines.append("[search_platforms]")
+    lines += [f'"platform {n}" = "https://platform{n}.example.com/?q={{}}"' for n in range(size // 10)]
+    lines.append("[apps]")
+    lines += [f'"tool {n}" = "tool{n}"' for n in range(size // 10)]
+    for n in range(100):
+        lines += ["[[intents]]", f'name = "weather {n}"', f'pattern = "weather {n} in (?P<city>.+)"',
+                  'response = "It is sunny in {city}"']
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def make_engine(dry_run, registry):
+    # ChatGPT is never reached: the questions only go as far as the classifier
+    return JarvisEngine("bench-registry", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                        launcher=dry_run, llm=object(), registry=registry)
+
+
+def routing_latency(engine, rounds=200):
+    """p50 and p95 of router.match plus the classifier fallback, in ms."""
+    latencies = []
+    for _ in range(rounds):
+        for command in COMMANDS:
+            start = time.perf_counter()
+            if engine.router.match(command) is None:
+                engine.classify(command)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 0.5), percentile(latencies, 0.95)
+
+
+def name_lookup(pattern, names, rounds=20):
+    """Mean ms to match the site slot against a spread of names and a miss."""
+    compiled = re.compile(rf"open (?:{pattern})\b")
+    probes = [f"open {name}" for name in names[::max(1, len(names) // 50)]] + ["open nothing of the sort"]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for probe in probes:
+            compiled.match(probe)
+    return (time.perf_counter() - start) * 1000 / (rounds * len(probes))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000, help="websites in the generated config")
+    args = parser.parse_args()
+
+    dry_run = DryRun()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "commands.toml")
+        write_config(path, args.size)
+
+        builtin = Registry.load([DEFAULT_CONFIG])
+        registry, load_ms = timed(Registry.load, [DEFAULT_CONFIG, path])
+        print(f"registry: {len(registry.websites)} websites, {len(registry.search_platforms)} platforms, "
+              f"{len(registry.apps)} apps, {len(registry.intents)} custom intents")
+        print(f"load and validate: {load_ms:.1f} ms")
+
+        real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            small = make_engine(dry_run, builtin)
+            large, build_ms = timed(make_engine, dry_run, registry)
+            small_latency = routing_latency(small)
+            large_latency = routing_latency(large)
+
+            # Hot reload: edit the file while the engine is live and let the watcher swap it in
+            watcher = RegistryWatcher(large.reload, paths=[DEFAULT_CONFIG, path])
+            with open(path, "a", encoding="utf-8") as f:
+                f.write('\n[[intents]]\nname = "hello"\npattern = "say hello"\nresponse = "Hello there"\n')
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1))
+            reloaded = watcher.check()
+            reply = large.process_command("say hello", is_voice=False)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    print(f"engine routes (router + classifier): {build_ms:.1f} ms")
+    print(f"hot reload (load + routes + swap): {watcher.last_reload_ms:.1f} ms, "
+          f"{'picked up' if reloaded is not None and reply == 'Hello there' else 'NOT picked up'}")
+    print(f"{'routing':24} {'p50':>9} {'p95':>9}")
+    print(f"{'built-in registry':24} {small_latency[0]:7.3f}ms {small_latency[1]:7.3f}ms")
+    print(f"{'large registry':24} {large_latency[0]:7.3f}ms {large_latency[1]:7.3f}ms")
+
+    names = list(registry.websites)
+    flat = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    _, flat_compile = timed(re.compile, rf"open (?:{flat})\b")
+    _, trie_compile = timed(re.compile, rf"open (?:{literal_alternation(names)})\b")
+    print(f"{'site index':24} {'compile':>9} {'match':>9}")
+    print(f"{'flat alternation':24} {flat_compile:7.1f}ms {name_lookup(flat, names):7.3f}ms")
+    print(f"{'trie':24} {trie_compile:7.1f}ms {name_lookup(literal_alternation(names), names):7.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
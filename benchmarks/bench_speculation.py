@@ -0,0 +1,138 @@
+"""Perceived latency with and without speculative pre-dispatch, replayed from partial-transcript fixtures.
+
+Usage: python benchmarks/bench_speculation.py [--speed 1.0] [--fixtures benchmarks/fixtures/partials.json]
+
+Each fixture is the timeline a streaming recognizer produced for one
+utterance: partial transcripts with their offsets and the end of speech.
+Partials are replayed in real time (divided by --speed), repeating the
+current one every frame as the voice thread does, and the command is run at
+the end of speech. Latency is from the end of speech to the response: the
+first token for ChatGPT answers, the handler's return for actions. YouTube
+lookups and app resolution are simulated with fixed delays; ChatGPT is the
+fake server with a slow first token, and is skipped without openai.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("JARVIS_CACHE_DB", "")
+
+from fake_openai import FakeOpenAIServer
+
+from jarvis.cache import ResponseCache
+from jarvis.engine import DryRun, JarvisEngine
+from jarvis.llm import ResilientClient
+from jarvis.speculate import Speculator
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "partials.json")
+FRAME = 0.03  # seconds between partial transcripts from a streaming recognizer
+VIDEO_LOOKUP = 0.4  # what a YouTube search takes
+APP_LOOKUP = 0.08  # a cold app lookup
+
+
+class SlowDryRun(DryRun):
+    """DryRun whose YouTube lookups take as long as real ones."""
+    def play_video(self, query):
+        time.sleep(VIDEO_LOOKUP)
+        super().play_video(query)
+
+    def resolve_video(self, query):
+        time.sleep(VIDEO_LOOKUP)
+        return super().resolve_video(query)
+
+
+class SlowAppIndex:
+    """App index with a fixed lookup cost; every name resolves."""
+    def lookup(self, name, wait=2.0):
+        time.sleep(APP_LOOKUP)
+        return [name.replace(" ", "-")]
+
+
+def make_engine(client):
+    dry_run = SlowDryRun()
+    return JarvisEngine("bench-speculation", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                        resolve_video=dry_run.resolve_video, launcher=dry_run, app_index=SlowAppIndex(),
+                        llm=client, cache=ResponseCache())
+
+
+def replay(engine, fixture, speculator, speed):
+    """Play one fixture; returns seconds from the end of speech to the response."""
+    start = time.monotonic()
+    partials = [(offset / 1000 / speed, text) for offset, text in fixture["partials"]]
+    end = fixture["end_ms"] / 1000 / speed
+    current = None
+    while True:
+        elapsed = time.monotonic() - start
+        if elapsed >= end:
+            break
+        while partials and partials[0][0] <= elapsed:
+            current = partials.pop(0)[1]
+        if current and speculator is not None:
+            speculator.update(current)
+        time.sleep(min(FRAME / speed, max(0.0, end - elapsed)))
+
+    ended = time.monotonic()
+    if speculator is not None:
+        speculator.commit(fixture["final"])
+    first = []
+    engine.process_command(fixture["final"], is_voice=False,
+                           on_token=lambda token: first or first.append(time.monotonic()))
+    return (first[0] if first else time.monotonic()) - ended
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--speed", type=float, default=1.0, help="replay faster than real time")
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+    with open(args.fixtures, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    have_openai = importlib.util.find_spec("openai") is not None
+    if not have_openai:
+        print("openai is not installed: skipping the ChatGPT fixtures")
+
+    with FakeOpenAIServer(token_delay=0.01, latency=0.5) as fake:
+        client = ResilientClient(api_key="sk-fake", base_url=fake.base_url) if have_openai else None
+        results = []
+        speculators = []
+        for mode in ("sequential", "speculative"):
+            engine = make_engine(client)
+            speculator = Speculator(engine) if mode == "speculative" else None
+            timings = {}
+            real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+            try:
+                for fixture in fixtures:
+                    if client is None and engine.router.match(fixture["final"]) is None \
+                            and engine.classify(fixture["final"]) is None:
+                        continue
+                    timings[fixture["name"]] = replay(engine, fixture, speculator, args.speed)
+                if speculator is not None:
+                    speculator.commit("")  # settle the last command's prefetches
+                    speculators.append(speculator)
+            finally:
+                sys.stdout.close()
+                sys.stdout = real_stdout
+            results.append(timings)
+
+    sequential, speculative = results
+    print(f"{'fixture':24} {'sequential':>12} {'speculative':>12} {'saved':>10}")
+    for name in sequential:
+        saved = sequential[name] - speculative[name]
+        print(f"{name:24} {sequential[name] * 1000:10.0f}ms {speculative[name] * 1000:10.0f}ms "
+              f"{saved * 1000:8.0f}ms")
+    total = sum(sequential.values()), sum(speculative.values())
+    print(f"{'mean':24} {total[0] / len(sequential) * 1000:10.0f}ms "
+          f"{total[1] / len(sequential) * 1000:10.0f}ms {(total[0] - total[1]) / len(sequential) * 1000:8.0f}ms")
+    stats = speculators[0].stats()
+    print(f"speculation: started {stats['started']}, used {stats['used']}, wasted {stats['wasted']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
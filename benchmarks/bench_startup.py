@@ -0,0 +1,77 @@
+"""Measure import time of main.py and time until the Jarvis window is first shown.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--max-ms MS]
+With --max-ms the script exits non-zero when time-to-first-window exceeds the budget.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(top=15):
+    """Run `python -X importtime -c 'import main'` and return the slowest top-level imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import main failed")
+    imports = []
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        # main itself is at depth 0; what it imports directly is indented one level
+        if m and len(m.group(3)) <= 3:
+            imports.append((int(m.group(2)), m.group(4)))
+    imports.sort(reverse=True)
+    return imports[:top]
+
+
+def first_window_ms():
+    """Start the GUI offscreen and time how long until it reports the window is shown."""
+    env = dict(os.environ, JARVIS_STARTUP_PROBE="1", QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    shown = None
+    for line in process.stdout:
+        if line.startswith("startup-probe:"):
+            shown = (time.perf_counter() - start) * 1000
+            break
+    process.kill()
+    process.wait()
+    return shown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median exceeds this")
+    args = parser.parse_args()
+
+    print("slowest imports made by main.py (cumulative):")
+    for micros, name in import_profile():
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    times = [first_window_ms() for _ in range(args.runs)]
+    if None in times:
+        print("the window never appeared; is PyQt6 installed?")
+        return 1
+    times.sort()
+    median = times[len(times) // 2]
+    print(f"time to first window: median {median:.0f} ms, best {times[0]:.0f} ms, worst {times[-1]:.0f} ms")
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: over the {args.max_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Compare time-to-first-sentence of streamed ChatGPT responses with the blocking call.
+
+Runs against the local fake server, so no network or API key is needed.
+Each run gets its own engine and empty response cache, so the streamed run
+is not answered from what the blocking run cached.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Session files and the response store go to a scratch directory, not ~/.cache
+os.environ.setdefault("XDG_CACHE_HOME", tempfile.mkdtemp(prefix="jarvis-bench-"))
+os.environ.setdefault("JARVIS_CACHE_DB", "")
+
+from fake_openai import FakeOpenAIServer
+
+
+def main():
+    with FakeOpenAIServer(token_delay=0.03) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+        from jarvis.cache import ResponseCache
+        from jarvis.engine import JarvisEngine
+        jarvis = JarvisEngine("bench-blocking", cache=ResponseCache())
+        jarvis.new_conversation()
+
+        start = time.perf_counter()
+        jarvis.get_chatbot_response("what's the time zone of Tokyo")
+        blocking = time.perf_counter() - start
+
+        jarvis = JarvisEngine("bench-streaming", cache=ResponseCache())
+        jarvis.new_conversation()
+        marks = {}
+        start = time.perf_counter()
+
+        def on_token(token):
+            marks.setdefault("first token", time.perf_counter() - start)
+
+        def on_sentence(sentence):
+            marks.setdefault("first sentence", time.perf_counter() - start)
+
+        jarvis.stream_chatbot_response("what's the time zone of Tokyo", on_token=on_token, on_sentence=on_sentence)
+        marks["full response"] = time.perf_counter() - start
+
+    print(f"blocking full response: {blocking * 1000:8.1f} ms")
+    for name, elapsed in marks.items():
+        print(f"streamed {name:14}: {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Frame times of the transcript view while it fills with 10k+ messages and long streamed answers.
+
+Runs offscreen: python benchmarks/bench_transcript.py [--messages N] [--max-messages CAP]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("XDG_CACHE_HOME", tempfile.mkdtemp(prefix="jarvis-bench-"))
+
+from PyQt6.QtWidgets import QApplication
+
+import main as jarvis
+from jarvis.trace import percentile
+from jarvis.transcript import Transcript
+
+SAMPLE_ANSWER = (
+    "Tokyo uses Japan Standard Time, which is nine hours ahead of UTC. "
+    "Japan does not observe daylight saving time, so the offset stays the same all year. "
+)
+
+
+def frame(app, model):
+    """One event-loop frame: flush pending changes and paint; returns its duration."""
+    start = time.perf_counter()
+    model.flush()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def report(name, times):
+    times = sorted(times)
+    print(f"{name:28} frames {len(times):6d}  p50 {percentile(times, 0.5) * 1000:7.2f} ms  "
+          f"p95 {percentile(times, 0.95) * 1000:7.2f} ms  max {times[-1] * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--per-frame", type=int, default=20, help="messages appended between frames")
+    parser.add_argument("--max-messages", type=int, default=jarvis.TRANSCRIPT_MAX)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        transcript = Transcript(args.max_messages, os.path.join(directory, "archive.jsonl"))
+        model = jarvis.TranscriptModel(transcript)
+        view = jarvis.TranscriptView(model)
+        view.resize(800, 600)
+        view.show()
+
+        start = time.perf_counter()
+        times = []
+        for i in range(args.messages):
+            model.add("user" if i % 2 == 0 else "jarvis", f"message {i}: " + SAMPLE_ANSWER[:40 + i % 120])
+            if i % args.per_frame == args.per_frame - 1:
+                times.append(frame(app, model))
+        times.append(frame(app, model))
+        print(f"appended {args.messages} messages in {time.perf_counter() - start:.2f} s; "
+              f"{len(transcript)} in view, {transcript.archived} archived")
+        report("bulk append", times)
+
+        # A long answer streamed a few tokens per frame at the bottom of a full transcript
+        message = model.add("jarvis")
+        times = []
+        for i, token in enumerate((SAMPLE_ANSWER * 20).split(" ")):
+            message.text += token + " "
+            model.touch(message)
+            if i % 3 == 2:
+                times.append(frame(app, model))
+        report("streaming into last row", times)
+
+        start = time.perf_counter()
+        transcript.export(os.path.join(directory, "export.txt"))
+        print(f"export of full history: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Run the wake-word detector over prerecorded WAV fixtures.
+
+Usage: python benchmarks/bench_wakeword.py FIXTURE_DIR [--engine sphinx|google]
+
+FIXTURE_DIR holds 16-bit mono WAV files in two subdirectories: positive/
+(the wake word is spoken) and negative/ (it is not).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.wakeword import WakeWordDetector, detect_in_wav, make_spotter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures")
+    parser.add_argument("--engine", default="sphinx")
+    parser.add_argument("--keyword", default="jarvis")
+    parser.add_argument("--threshold", type=float, default=300.0, help="energy gate threshold")
+    args = parser.parse_args()
+
+    detector = WakeWordDetector(make_spotter(args.engine, args.keyword))
+    detector.gate.threshold = args.threshold
+    results = {"positive": [0, 0], "negative": [0, 0]}  # [fired, total]
+    for label in results:
+        directory = os.path.join(args.fixtures, label)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".wav"):
+                continue
+            hits = detect_in_wav(os.path.join(directory, name), detector)
+            detector.reset()
+            results[label][0] += bool(hits)
+            results[label][1] += 1
+            print(f"{label:8} {name:40} {'fired at ' + str(hits) + ' ms' if hits else '-'}")
+
+    fired, total = results["positive"]
+    false_alarms, negatives = results["negative"]
+    print(f"detection rate: {fired}/{total}   false alarms: {false_alarms}/{negatives}")
+    for key, value in detector.stats().items():
+        print(f"{key:16} {value:.4f}" if isinstance(value, float) else f"{key:16} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Accuracy and latency of command routing with and without the intent classifier.
+
+Usage: python benchmarks/eval_intents.py [--threshold 0.5]
+
+The labelled commands below are paraphrases that are not in the training
+examples. A command counts as correct when it reaches the right intent with
+the right slots; "chat" means it should go to ChatGPT. Sending a question to
+an action is the costly mistake, so it is reported on its own.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.engine import DryRun, JarvisEngine
+from jarvis.intents import CHAT, IntentClassifier
+from jarvis.registry import DEFAULT_CONFIG, Registry
+from jarvis.trace import percentile
+
+# (command, intent, slots)
+LABELLED = [
+    ("could you fire up the calculator", "open_app", {"app_name": "calculator"}),
+    ("please launch spotify", "open_app", {"app_name": "spotify"}),
+    ("start the settings app", "open_app", {"app_name": "settings"}),
+    ("boot up visual studio code for me", "open_app", {"app_name": "visual studio code"}),
+    ("can you run the command prompt", "open_app", {"app_name": "command prompt"}),
+    ("get the clock running", "open_app", {"app_name": "clock"}),
+    ("look up cats on youtube", "search", {"platform": "youtube", "term": "cats"}),
+    ("find pyqt tutorials on google", "search", {"platform": "google", "term": "pyqt tutorials"}),
+    ("check linkedin for john smith", "search", {"platform": "linkedin", "term": "john smith"}),
+    ("can you find lo-fi beats on youtube", "search", {"platform": "youtube", "term": "lo fi beats"}),
+    ("google the best pizza near me", "search", {"platform": "google", "term": "the best pizza near me"}),
+    ("look for taylor swift on instagram", "search", {"platform": "instagram", "term": "taylor swift"}),
+    ("take me to github", "website", {"site": "github"}),
+    ("go to facebook please", "website", {"site": "facebook"}),
+    ("pull up whatsapp", "website", {"site": "whatsapp"}),
+    ("can you bring up instagram", "website", {"site": "instagram"}),
+    ("visit youtube", "website", {"site": "youtube"}),
+    ("put on some taylor swift", "play", {"song": "taylor swift"}),
+    ("i want to listen to bohemian rhapsody", "play", {"song": "bohemian rhapsody"}),
+    ("let me hear hotel california", "play", {"song": "hotel california"}),
+    ("can you play despacito", "play", {"song": "despacito"}),
+    ("queue up some lo-fi", "play", {"song": "lo fi"}),
+    ("shut down spotify", "close_app", {"app_name": "spotify"}),
+    ("please exit the calculator", "close_app", {"app_name": "calculator"}),
+    ("terminate notepad", "close_app", {"app_name": "notepad"}),
+    ("what do i have open", "running_apps", {}),
+    ("which programs are open right now", "running_apps", {}),
+    ("list the apps you started", "running_apps", {}),
+    ("let's start fresh", "new_conversation", {}),
+    ("forget everything i told you", "new_conversation", {}),
+    ("clear our chat", "new_conversation", {}),
+    ("what's the capital of spain", CHAT, {}),
+    ("how do i open a bottle of wine", CHAT, {}),
+    ("tell me about the history of youtube", CHAT, {}),
+    ("who founded github", CHAT, {}),
+    ("explain how to start a car in the cold", CHAT, {}),
+    ("what is the best music to study to", CHAT, {}),
+    ("how many calories are in a banana", CHAT, {}),
+    ("write a haiku about autumn", CHAT, {}),
+    ("what is the speed of light", CHAT, {}),
+    ("why do cats purr", CHAT, {}),
+    ("how does google make money", CHAT, {}),
+    ("what should i cook tonight", CHAT, {}),
+    ("give me three facts about octopuses", CHAT, {}),
+    ("how do i close a bank account", CHAT, {}),
+    ("is coffee bad for you", CHAT, {}),
+    # Questions that start like a command
+    ("i need the answer to two plus two", CHAT, {}),
+    ("exit strategy for startups", CHAT, {}),
+    ("put on a brave face meaning", CHAT, {}),
+    ("launch sequence of apollo 11 explained", CHAT, {}),
+    ("turn off the lights", CHAT, {}),
+    ("shut up", CHAT, {}),
+    ("put on weight fast tips", CHAT, {}),
+    ("start a business with no money how", CHAT, {}),
+]
+
+# What the labelled commands find installed, so results don't depend on this machine
+INSTALLED = {"spotify", "visual studio code", "notepad"}
+
+
+class InstalledApps:
+    """App index that knows exactly INSTALLED."""
+    def lookup(self, name, wait=2.0):
+        return [name] if name in INSTALLED else None
+
+
+def route(engine, command, use_classifier):
+    """(intent, slots) the engine would dispatch command to, without running it."""
+    command = command.lower().strip()
+    found = engine.router.match(command)
+    if found is None and use_classifier:
+        found = engine.classify(command)
+    if found is None:
+        return CHAT, {}
+    return found.intent.name, found.slots
+
+
+def evaluate(engine, use_classifier):
+    correct = intent_correct = false_actions = missed_actions = 0
+    latencies = []
+    errors = []
+    actionable = sum(1 for _, intent, _ in LABELLED if intent != CHAT)
+    questions = len(LABELLED) - actionable
+    for command, intent, slots in LABELLED:
+        start = time.perf_counter()
+        got_intent, got_slots = route(engine, command, use_classifier)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if got_intent == intent:
+            intent_correct += 1
+            if got_slots == slots:
+                correct += 1
+                continue
+        errors.append(f"{command!r}: expected {intent} {slots}, got {got_intent} {got_slots}")
+        if intent == CHAT:
+            false_actions += 1
+        elif got_intent == CHAT:
+            missed_actions += 1
+    latencies.sort()
+    return {
+        "accuracy": correct / len(LABELLED),
+        "intent_accuracy": intent_correct / len(LABELLED),
+        "actions_kept_local": (actionable - missed_actions) / actionable,
+        "questions_sent_to_actions": false_actions / questions,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--verbose", action="store_true", help="list every misrouted command")
+    args = parser.parse_args()
+
+    # The built-in commands only, so a user config doesn't change the labels' meaning
+    registry = Registry.load([DEFAULT_CONFIG])
+    start = time.perf_counter()
+    classifier = IntentClassifier(registry.entities(), threshold=args.threshold)
+    print(f"training: {(time.perf_counter() - start) * 1000:.1f} ms for {len(classifier.labels)} examples")
+
+    dry_run = DryRun()
+    engine = JarvisEngine("eval-intents", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                          launcher=dry_run, app_index=InstalledApps(), classifier=classifier, registry=registry)
+    sys.stdout, real_stdout = open(os.devnull, "w"), sys.stdout
+    try:
+        results = {"router only": evaluate(engine, False), "router + classifier": evaluate(engine, True)}
+        sweep = {}
+        for threshold in (0.3, 0.4, 0.5, 0.6, 0.7, 0.8):
+            classifier.threshold = threshold
+            sweep[threshold] = evaluate(engine, True)
+        classifier.threshold = args.threshold
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    print(f"{len(LABELLED)} labelled commands")
+    print(f"{'':22} {'accuracy':>9} {'intent':>8} {'local':>8} {'q->act':>8} {'p50':>9} {'p95':>9}")
+    rows = list(results.items()) + [(f"threshold {t:.1f}", r) for t, r in sweep.items()]
+    for name, r in rows:
+        print(f"{name:22} {r['accuracy']:9.1%} {r['intent_accuracy']:8.1%} {r['actions_kept_local']:8.1%} "
+              f"{r['questions_sent_to_actions']:8.1%} {r['p50_ms']:7.3f}ms {r['p95_ms']:7.3f}ms")
+    print("local: actionable commands handled without ChatGPT; q->act: questions wrongly run as actions")
+    errors = results["router + classifier"]["errors"]
+    if args.verbose or len(errors) <= 10:
+        for error in errors:
+            print(f"  {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Local OpenAI-compatible server that answers chat completions with canned text.
+
+Point the client at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+It can also misbehave on purpose: delay responses (per model), fail a share
+of requests with 429 or 500, or fail the next few requests on demand.
+"""
+import collections
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESPONSE = (
+    "Tokyo uses Japan Standard Time, which is nine hours ahead of UTC. "
+    "Japan does not observe daylight saving time, so the offset stays the same all year. "
+    "If you are in London, Tokyo is eight or nine hours ahead depending on the season."
+)
+
+
+def tokenize(text):
+    """Split text into word-sized chunks the way a model would stream it."""
+    return re.findall(r"\S+\s*", text)
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server serving /v1/chat/completions with optional per-token delay.
+
+    latency is slept before answering; model_latency overrides it per model.
+    error_rate fails that share of requests with a status drawn from
+    error_statuses; 429s carry a retry-after-ms of retry_after seconds.
+    Only the last keep_requests request bodies are kept, so long runs don't
+    count the server's own log as the client's memory growth.
+    """
+    def __init__(self, response=CANNED_RESPONSE, token_delay=0.02, host="127.0.0.1", port=0, latency=0.0,
+                 model_latency=None, error_rate=0.0, error_statuses=(429, 500), retry_after=0.05, seed=None,
+                 keep_requests=100):
+        self.response = response
+        self.token_delay = token_delay
+        self.latency = latency
+        self.model_latency = dict(model_latency or {})
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.requests = collections.deque(maxlen=keep_requests)
+        self.errors = collections.Counter()
+        self._scripted = collections.deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, count, status=500):
+        """Fail the next count requests with status, whatever error_rate says."""
+        with self._lock:
+            self._scripted.extend([status] * count)
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.errors.clear()
+            self._scripted.clear()
+
+    def _fault(self):
+        """Status to fail the next request with, or None to answer it."""
+        with self._lock:
+            if self._scripted:
+                status = self._scripted.popleft()
+            elif self.error_rate and self._random.random() < self.error_rate:
+                status = self._random.choice(self.error_statuses)
+            else:
+                return None
+            self.errors[status] += 1
+            return status
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append(body)
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                delay = server.model_latency.get(body.get("model"), server.latency)
+                if delay:
+                    time.sleep(delay)
+                status = server._fault()
+                if status is not None:
+                    self._error(status)
+                elif body.get("stream"):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _complete(self, body):
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.response},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _error(self, status):
+                kind = "rate_limit_exceeded" if status == 429 else "server_error"
+                payload = json.dumps({
+                    "error": {"message": f"fake {status}", "type": kind, "code": kind}
+                }).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("retry-after-ms", str(int(server.retry_after * 1000)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for token in tokenize(server.response):
+                    time.sleep(server.token_delay)
+                    self._event(body, {"content": token})
+                self._event(body, {}, finish_reason="stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, body, delta, finish_reason=None):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with FakeOpenAIServer(port=8765) as fake:
+        print(f"Fake OpenAI server listening on {fake.base_url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,337 @@
+"""End-to-end benchmark suite with stored baselines; exits non-zero on a regression.
+
+Usage: python benchmarks/suite.py [--quick] [--update-baseline] [--tolerance 0.25]
+
+Everything runs offline and headless: browser, app launches and YouTube go
+through DryRun, ChatGPT through the local fake server, audio comes from
+generated WAV files and Qt uses the offscreen platform. Sections whose
+dependencies (openai, PyQt6, speech_recognition) are missing are skipped.
+
+Baselines live in benchmarks/baselines.json and are machine specific: the
+first run, or --update-baseline, records them.
+"""
+import argparse
+import array
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep session files and caches out of the user's home before anything is imported
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="jarvis-bench-")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+os.environ.setdefault("JARVIS_CACHE_DB", "")
+
+from fake_openai import FakeOpenAIServer
+
+from jarvis.cache import ResponseCache
+from jarvis.cli import SessionPool
+from jarvis.engine import DryRun, JarvisEngine, default_app_index
+from jarvis.trace import Tracer, tracer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+ROUTED_COMMANDS = [
+    "open google",
+    "hey jarvis please open github",
+    "play never gonna give you up",
+    "search for pyqt threads on google",
+    "youtube search lo-fi beats",
+    "search cats",
+    "open calculator",
+    "close calculator",
+    "what's running",
+]
+
+# Metric -> (higher is better, absolute slack added to the tolerance)
+METRICS = {
+    "routed_commands_per_sec": (True, 0.0),
+    "chat_commands_per_sec": (True, 0.0),
+    "session_pool_commands_per_sec": (True, 0.0),
+    "first_audio_p50_ms": (False, 5.0),
+    "first_audio_p95_ms": (False, 10.0),
+    "memory_growth_kb_per_1k": (False, 64.0),
+}
+
+
+# Loaded once up front so lookups never wait on a background scan
+app_index = default_app_index()
+
+
+def openai_client(base_url):
+    """An OpenAI client pointed at the fake server, or None if openai is not installed."""
+    try:
+        import openai
+    except ImportError:
+        return None
+    return openai.OpenAI(base_url=base_url, api_key="sk-fake", max_retries=0)
+
+
+def dry_engine(session_id, dry_run, llm=None, tracer=None, cache=None):
+    return JarvisEngine(session_id, open_url=dry_run.open_url, play_video=dry_run.play_video,
+                        launcher=dry_run, app_index=app_index, llm=llm, tracer=tracer, cache=cache)
+
+
+def bench_routed(count):
+    """Built-in commands per second through process_command."""
+    engine = dry_engine("bench-routed", DryRun())
+    start = time.perf_counter()
+    for i in range(count):
+        engine.process_command(ROUTED_COMMANDS[i % len(ROUTED_COMMANDS)], is_voice=False)
+    return count / (time.perf_counter() - start)
+
+
+def bench_chat(client, count):
+    """ChatGPT commands per second, streamed, against the fake server."""
+    engine = dry_engine("bench-chat", DryRun(), client)
+    start = time.perf_counter()
+    for i in range(count):
+        engine.process_command(f"question number {i}", is_voice=False, on_token=lambda token: None)
+    return count / (time.perf_counter() - start)
+
+
+def bench_session_pool(client, sessions, per_session):
+    """Commands per second through the daemon's SessionPool with concurrent sessions."""
+    pool = SessionPool(dry_run=True, llm=client, max_workers=sessions)
+    pool.dry_run.verbose = False
+    pool.app_index = app_index
+    batches = []
+    for s in range(sessions):
+        commands = []
+        for i in range(per_session):
+            commands.append(ROUTED_COMMANDS[i % len(ROUTED_COMMANDS)] if i % 2 else f"session {s} asks {i}")
+        batches.append((f"bench-pool-{s}", commands))
+    start = time.perf_counter()
+    pool.run_batches(batches)
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return sessions * per_session / elapsed
+
+
+def bench_memory(client, count):
+    """Traced heap growth per 1000 commands in one long session, after a warm-up.
+
+    The tracer, DryRun log and response cache are capped small so their bounded
+    growth fills during the warm-up and anything left over is a real leak.
+    """
+    engine = dry_engine("bench-memory", DryRun(keep=100), client, Tracer(window=100, max_events=100),
+                        ResponseCache(max_entries=20))
+    commands = ROUTED_COMMANDS + ([None] if client else [])
+
+    def run(n, offset):
+        for i in range(n):
+            command = commands[i % len(commands)]
+            if command is None:
+                engine.process_command(f"long session question {offset + i}", is_voice=False,
+                                       on_token=lambda token: None)
+            else:
+                engine.process_command(command, is_voice=False)
+
+    tracemalloc.start()
+    run(max(count // 5, 500), 0)
+    before = tracemalloc.get_traced_memory()[0]
+    run(count, count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / 1024 / (count / 1000)
+
+
+def write_utterances_wav(path, count, speech_seconds=0.8, silence_seconds=1.2, seed=7, sample_rate=16000):
+    """Noise bursts loud enough to count as speech, separated by quiet background."""
+    rng = random.Random(seed)
+    samples = array.array("h")
+    for _ in range(count):
+        samples.extend(rng.randint(-30, 30) for _ in range(int(sample_rate * silence_seconds)))
+        samples.extend(rng.randint(-4000, 4000) for _ in range(int(sample_rate * speech_seconds)))
+    samples.extend(rng.randint(-30, 30) for _ in range(int(sample_rate * silence_seconds)))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def bench_voice(client, utterances):
+    """End of speech to first audio through VoiceThread, CommandExecutor and the speech worker."""
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    from jarvis.asr import RecognizerBackend
+    from jarvis.audio import WavFileSource
+    from jarvis.tts import SpeechWorker
+    import main as jarvis
+
+    class ScriptedBackend(RecognizerBackend):
+        """Returns the scripted transcripts in turn instead of decoding."""
+        name = "scripted"
+
+        def __init__(self, transcripts):
+            self.transcripts = transcripts
+            self.index = 0
+
+        def recognize(self, audio):
+            text = self.transcripts[self.index % len(self.transcripts)]
+            self.index += 1
+            return text
+
+    class FakeTTSEngine:
+        """pyttsx3 stand-in that takes a fixed time to 'say' anything."""
+        def connect(self, topic, callback):
+            pass
+
+        def getProperty(self, name):
+            return None
+
+        def say(self, text):
+            pass
+
+        def runAndWait(self):
+            time.sleep(0.01)
+
+        def stop(self):
+            pass
+
+    class Speaker:
+        def __init__(self):
+            self.worker = SpeechWorker(FakeTTSEngine)
+            self.worker.start()
+
+        def speak(self, text, *args, **kwargs):
+            return self.worker.say(text)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    speaker = Speaker()
+    dry_run = DryRun()
+    jarvis.engine = JarvisEngine("bench-voice", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                                 launcher=dry_run, app_index=app_index, llm=client, speaker=speaker)
+    transcripts = ["open google", "open github", "search cats on youtube"]
+    if client is not None:
+        transcripts.append("tell me something about tokyo")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "utterances.wav")
+        write_utterances_wav(path, utterances)
+        executor = jarvis.CommandExecutor()
+        voice = jarvis.VoiceThread(
+            source=WavFileSource(path, realtime=True), asr=ScriptedBackend(transcripts), spotter=object()
+        )
+        voice.listening = True
+        voice.command_received.connect(lambda command, interaction_id: executor.submit(command, True, interaction_id))
+        voice.error_occurred.connect(lambda message: print(f"  voice thread: {message}"))
+
+        def finish():
+            # Let the last command and its speech drain before stopping the loop
+            deadline = time.monotonic() + 10
+            while executor.in_flight() and time.monotonic() < deadline:
+                app.processEvents()
+                time.sleep(0.01)
+            speaker.worker.wait_idle(5)
+            app.quit()
+
+        voice.finished.connect(lambda: QTimer.singleShot(0, finish))
+        tracer.reset()
+        voice.start()
+        app.exec()
+        executor.shutdown()
+    stats = tracer.stats().get("first_audio")
+    if not stats:
+        raise RuntimeError("no interaction reached the speaker")
+    return stats["p50_ms"], stats["p95_ms"]
+
+
+def compare(results, baselines, tolerance):
+    """Print each metric against its baseline; returns the names that regressed."""
+    regressions = []
+    print(f"{'metric':32} {'value':>12} {'baseline':>12}")
+    for name, value in results.items():
+        higher_is_better, slack = METRICS[name]
+        baseline = baselines.get(name)
+        verdict = ""
+        if baseline is not None:
+            if higher_is_better:
+                worse = value < baseline * (1 - tolerance) - slack
+            else:
+                worse = value > baseline * (1 + tolerance) + slack
+            if worse:
+                regressions.append(name)
+                verdict = "REGRESSION"
+        shown = f"{baseline:12.1f}" if baseline is not None else f"{'-':>12}"
+        print(f"{name:32} {value:12.1f} {shown} {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+    scale = 0.2 if args.quick else 1.0
+
+    # The engines print a debug line per command; keep the report readable
+    real_stdout = sys.stdout
+    results = {}
+    sys.stdout = open(os.devnull, "w")
+    try:
+        app_index.load()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+    # The server keeps no request log, which would count as the client's memory growth
+    with FakeOpenAIServer(token_delay=0.0, keep_requests=0) as fake:
+        client = openai_client(fake.base_url)
+        sections = [
+            ("routed_commands_per_sec", lambda: bench_routed(int(5000 * scale))),
+            ("memory_growth_kb_per_1k", lambda: bench_memory(client, int(2000 * scale))),
+        ]
+        if client is not None:
+            sections += [
+                ("chat_commands_per_sec", lambda: bench_chat(client, int(300 * scale))),
+                ("session_pool_commands_per_sec", lambda: bench_session_pool(client, 8, int(100 * scale))),
+            ]
+        else:
+            print("openai is not installed: skipping ChatGPT benchmarks")
+        for name, run in sections:
+            sys.stdout = open(os.devnull, "w")
+            try:
+                results[name] = run()
+            finally:
+                sys.stdout.close()
+                sys.stdout = real_stdout
+
+        try:
+            voice = bench_voice(client, max(3, int(10 * scale)))
+            results["first_audio_p50_ms"], results["first_audio_p95_ms"] = voice
+        except ImportError as e:
+            print(f"{e}: skipping the voice pipeline benchmark")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+    regressions = compare(results, {} if args.update_baseline else baselines, args.tolerance)
+
+    if args.update_baseline or not baselines:
+        baselines.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"baselines written to {args.baseline}")
+    if regressions:
+        print(f"FAIL: {', '.join(regressions)} regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Subsystems used by the Jarvis assistant in main.py."""
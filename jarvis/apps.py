@@ -0,0 +1,337 @@
+"""Index of installed applications, built once and kept on disk between runs."""
+import difflib
+import json
+import os
+import platform
+import re
+import shlex
+import threading
+import time
+
+try:
+    import winreg
+except ImportError:  # not on Windows
+    winreg = None
+
+# Spoken names that rarely match the installed name
+DEFAULT_ALIASES = {
+    "vs code": ["code", "visual studio code"],
+    "vscode": ["code", "visual studio code"],
+    "visual studio code": ["code"],
+    "chrome": ["google chrome", "google-chrome", "chromium", "chromium-browser"],
+    "firefox": ["firefox", "mozilla firefox"],
+    "terminal": ["gnome-terminal", "terminal", "konsole", "xterm", "cmd"],
+    "file manager": ["nautilus", "finder", "dolphin", "explorer"],
+    "notepad": ["notepad", "gedit", "textedit"],
+    "text editor": ["gedit", "textedit", "notepad"],
+}
+
+# Field codes such as %f or %U in a .desktop Exec line
+DESKTOP_FIELD_CODE = re.compile(r"\s*%[a-zA-Z]")
+
+APP_PATHS_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths"
+
+CACHE_VERSION = 1
+
+
+def normalize_name(name):
+    """Lowercase, drop a launcher extension and collapse whitespace."""
+    name = name.lower().strip()
+    for extension in (".exe", ".app", ".desktop", ".lnk"):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+    return " ".join(name.split())
+
+
+def compact_name(name):
+    """Normalized name without separators, so "vs-code" and "VS Code" meet."""
+    return re.sub(r"[\s\-_.]+", "", normalize_name(name))
+
+
+def default_cache_path():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "jarvis", "app_index.json")
+
+
+class AppIndex:
+    """Name -> launcher argv map of installed applications.
+
+    The index is built from PATH, .desktop files, .app bundles and the App
+    Paths registry key, saved to a JSON cache, and rebuilt only when one of
+    the scanned directories changes. Lookups are dictionary hits, with
+    aliases and fuzzy matching for names like "vs code".
+    """
+    def __init__(self, cache_path=None, aliases=None, system=None, max_age=86400):
+        self.cache_path = cache_path or default_cache_path()
+        self.system = (system or platform.system()).lower()
+        self.max_age = max_age
+        self.set_aliases(aliases)
+        self._entries = {}
+        self._compact = {}
+        self._sources = {}
+        self._built_at = 0.0
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._rebuilding = threading.Lock()  # held while a background rebuild runs
+
+    def set_aliases(self, aliases):
+        """Replace the configured aliases; lookups see either the old set or the new one."""
+        # Keyed by compact name so "VS-Code" finds the "vs code" alias
+        merged = {compact_name(k): list(v) for k, v in DEFAULT_ALIASES.items()}
+        for name, targets in (aliases or {}).items():
+            merged.setdefault(compact_name(name), [])[:0] = targets
+        self.aliases = merged
+
+    def start(self):
+        """Load or build the index on a background thread."""
+        thread = threading.Thread(target=self.load, name="jarvis-app-index", daemon=True)
+        thread.start()
+        return thread
+
+    def load(self):
+        """Use the cache file if it is still fresh, otherwise rebuild."""
+        try:
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("version") == CACHE_VERSION and cached.get("system") == self.system:
+                    self._install(cached["entries"], cached["sources"], cached["built_at"])
+                    if not self.is_stale():
+                        print(f"Loaded {len(self._entries)} apps from {self.cache_path}")
+                        return
+            except (OSError, ValueError, KeyError):
+                pass
+            self.build()
+        finally:
+            # Even a failed build must not leave every lookup waiting
+            self._ready.set()
+
+    def build(self):
+        """Scan every source and replace the index."""
+        with self._lock:
+            start = time.perf_counter()
+            entries = {}
+            sources = {}
+            scanners = [self._scan_path]
+            if self.system == "linux":
+                scanners.append(self._scan_desktop_files)
+            elif self.system == "darwin":
+                scanners.append(self._scan_app_bundles)
+            elif self.system == "windows":
+                scanners.append(self._scan_app_paths)
+            for scan in scanners:
+                scan(entries, sources)
+            self._install(entries, sources, time.time())
+            self._save()
+            print(f"Indexed {len(entries)} apps in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def is_stale(self):
+        """True if a scanned directory changed or the index is older than max_age."""
+        if time.time() - self._built_at > self.max_age:
+            return True
+        for directory, mtime in self._sources.items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh_if_stale(self):
+        if self.is_stale():
+            self.build()
+
+    def rebuild_in_background(self):
+        """Rebuild on a daemon thread; does nothing while a rebuild is already running."""
+        if not self._rebuilding.acquire(blocking=False):
+            return None
+        thread = threading.Thread(target=self._rebuild, name="jarvis-app-index", daemon=True)
+        thread.start()
+        return thread
+
+    def lookup(self, name, wait=2.0):
+        """Return the launcher argv for an app name, or None; wait=0 never blocks."""
+        if wait:
+            self._ready.wait(wait)
+        name = normalize_name(name)
+        entry = self._find(name)
+        if entry is None and self._ready.is_set() and self.is_stale():
+            # Something was installed or removed since the index was built; the
+            # callers are worker and voice threads, so the next lookup gets it
+            self.rebuild_in_background()
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception as e:
+            print(f"Could not rebuild app index: {e}")
+        finally:
+            self._rebuilding.release()
+
+    def _find(self, name):
+        entries = self._entries
+        for candidate in [name] + self.aliases.get(compact_name(name), []):
+            candidate = normalize_name(candidate)
+            if candidate in entries:
+                return entries[candidate]
+            key = self._compact.get(compact_name(candidate))
+            if key:
+                return entries[key]
+        close = difflib.get_close_matches(compact_name(name), list(self._compact), n=1, cutoff=0.85)
+        if close:
+            return entries[self._compact[close[0]]]
+        return None
+
+    def _install(self, entries, sources, built_at):
+        compact = {}
+        for key in entries:
+            compact.setdefault(compact_name(key), key)
+        # Swap whole dicts so lookups on other threads never see a partial index
+        self._entries = entries
+        self._compact = compact
+        self._sources = sources
+        self._built_at = built_at
+        self._ready.set()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": CACHE_VERSION,
+                    "system": self.system,
+                    "built_at": self._built_at,
+                    "sources": self._sources,
+                    "entries": self._entries,
+                }, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not save app index: {e}")
+
+    @staticmethod
+    def _watch(directory, sources):
+        """Record a directory's mtime; False if it does not exist."""
+        try:
+            sources[directory] = os.stat(directory).st_mtime
+            return True
+        except OSError:
+            return False
+
+    def _scan_path(self, entries, sources):
+        extensions = [""]
+        if self.system == "windows":
+            extensions = [e.lower() for e in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").split(";") if e]
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            if not directory or directory in sources or not self._watch(directory, sources):
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    for item in it:
+                        if self.system == "windows":
+                            stem, ext = os.path.splitext(item.name)
+                            if ext.lower() not in extensions:
+                                continue
+                        else:
+                            stem = item.name
+                            if not os.access(item.path, os.X_OK):
+                                continue
+                        if item.is_file():
+                            entries.setdefault(normalize_name(stem), [item.path])
+            except OSError:
+                continue
+
+    def _scan_desktop_files(self, entries, sources):
+        data_dirs = [os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")]
+        data_dirs += (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+        data_dirs += ["/var/lib/flatpak/exports/share", "/var/lib/snapd/desktop"]
+        for data_dir in data_dirs:
+            directory = os.path.join(data_dir, "applications")
+            if directory in sources or not self._watch(directory, sources):
+                continue
+            try:
+                file_names = sorted(os.listdir(directory))
+            except OSError:
+                continue  # unreadable, or removed since it was watched
+            for file_name in file_names:
+                if not file_name.endswith(".desktop"):
+                    continue
+                parsed = self._parse_desktop_file(os.path.join(directory, file_name))
+                if parsed is None:
+                    continue
+                name, argv = parsed
+                # Desktop names win over bare executables, e.g. "calculator"
+                entries[normalize_name(name)] = argv
+                entries.setdefault(normalize_name(file_name), argv)
+
+    @staticmethod
+    def _parse_desktop_file(path):
+        """Return (Name, Exec argv) from a .desktop file's main section."""
+        name = command = None
+        in_entry = False
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("["):
+                        in_entry = line == "[Desktop Entry]"
+                    elif in_entry and line.startswith("Name=") and name is None:
+                        name = line[len("Name="):]
+                    elif in_entry and line.startswith("Exec=") and command is None:
+                        command = DESKTOP_FIELD_CODE.sub("", line[len("Exec="):])
+                    elif in_entry and line in ("NoDisplay=true", "Hidden=true"):
+                        return None
+        except OSError:
+            return None
+        if not name or not command:
+            return None
+        try:
+            return name, shlex.split(command)
+        except ValueError:
+            return None
+
+    def _scan_app_bundles(self, entries, sources):
+        directories = [
+            "/Applications",
+            "/Applications/Utilities",
+            "/System/Applications",
+            "/System/Applications/Utilities",
+            os.path.expanduser("~/Applications"),
+        ]
+        for directory in directories:
+            if not self._watch(directory, sources):
+                continue
+            try:
+                items = os.listdir(directory)
+            except OSError:
+                continue  # unreadable, or removed since it was watched
+            for item in items:
+                if item.endswith(".app"):
+                    entries[normalize_name(item)] = ["open", os.path.join(directory, item)]
+
+    def _scan_app_paths(self, entries, sources):
+        if winreg is None:
+            return
+        for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(hive, APP_PATHS_KEY) as key:
+                    index = 0
+                    while True:
+                        try:
+                            sub_name = winreg.EnumKey(key, index)
+                        except OSError:
+                            break
+                        index += 1
+                        try:
+                            with winreg.OpenKey(key, sub_name) as sub_key:
+                                target = winreg.QueryValue(sub_key, None)
+                        except OSError:
+                            continue
+                        if target:
+                            entries.setdefault(normalize_name(sub_name), [target.strip('"')])
+            except OSError:
+                continue
@@ -0,0 +1,142 @@
+"""Speech recognition backends, local and cloud, behind one interface."""
+import json
+import os
+
+import speech_recognition as sr
+
+from jarvis.wakeword import SAMPLE_RATE, SAMPLE_WIDTH
+
+
+class StreamingSession:
+    """Incremental decode of a single utterance."""
+    def accept(self, frame):
+        """Feed one PCM frame; returns the current partial transcript or None."""
+        raise NotImplementedError
+
+    def finish(self):
+        """Return the final transcript; raises sr.UnknownValueError if nothing was heard."""
+        raise NotImplementedError
+
+
+class RecognizerBackend:
+    """Turns an utterance into text. Streaming backends also offer start_stream()."""
+    name = "base"
+    streaming = False
+
+    def recognize(self, audio):
+        """Transcribe an sr.AudioData; raises sr.UnknownValueError or sr.RequestError."""
+        raise NotImplementedError
+
+    def start_stream(self, sample_rate=SAMPLE_RATE):
+        """Begin a StreamingSession, or None if this backend only decodes whole clips."""
+        return None
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API; needs the network."""
+    name = "google"
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU PocketSphinx, offline."""
+    name = "sphinx"
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+        import pocketsphinx  # noqa: F401
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class WhisperBackend(RecognizerBackend):
+    """OpenAI Whisper running locally through speech_recognition, offline."""
+    name = "whisper"
+
+    def __init__(self, recognizer=None, model=None):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.model = model or os.getenv("JARVIS_WHISPER_MODEL", "base")
+        import whisper  # noqa: F401
+
+    def recognize(self, audio):
+        text = self.recognizer.recognize_whisper(audio, model=self.model, language="english").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskSession(StreamingSession):
+    def __init__(self, model, sample_rate):
+        import vosk
+        self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self._segments = []
+
+    def accept(self, frame):
+        if self._recognizer.AcceptWaveform(frame):
+            self._segments.append(json.loads(self._recognizer.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(s for s in self._segments + [partial] if s) or None
+
+    def finish(self):
+        self._segments.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        text = " ".join(s for s in self._segments if s).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskBackend(RecognizerBackend):
+    """Kaldi models through Vosk, offline and streaming.
+
+    The model directory comes from JARVIS_VOSK_MODEL and is loaded once.
+    """
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, recognizer=None, model_path=None):
+        import vosk
+        model_path = model_path or os.getenv("JARVIS_VOSK_MODEL")
+        if not model_path:
+            raise ImportError("set JARVIS_VOSK_MODEL to a Vosk model directory")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+
+    def start_stream(self, sample_rate=SAMPLE_RATE):
+        return VoskSession(self.model, sample_rate)
+
+    def recognize(self, audio):
+        raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+        session = self.start_stream()
+        # Feed in chunks the size Vosk expects from a live stream
+        for i in range(0, len(raw), 8000):
+            session.accept(raw[i:i + 8000])
+        return session.finish()
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    SphinxBackend.name: SphinxBackend,
+    WhisperBackend.name: WhisperBackend,
+    VoskBackend.name: VoskBackend,
+}
+
+
+def make_backend(name, recognizer=None):
+    """Build a backend by name; a missing local engine is an error, never a silent switch to Google."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend '{name}'; choose from {', '.join(BACKENDS)}")
+    try:
+        return BACKENDS[name](recognizer)
+    except ImportError as e:
+        raise RuntimeError(
+            f"Speech backend '{name}' unavailable ({e}); install it, or set "
+            f"JARVIS_ASR_BACKEND=google to send commands to Google instead"
+        ) from e
@@ -0,0 +1,226 @@
+"""Persistent audio capture, adaptive noise floor and utterance segmentation."""
+import threading
+import time
+from collections import deque
+
+import speech_recognition as sr
+
+from jarvis.wakeword import FRAME_MS, SAMPLE_RATE, SAMPLE_WIDTH, frame_rms, read_wav_frames
+
+
+class AudioSource:
+    """A stream of 16-bit mono PCM frames; read_frame() returns None at the end."""
+    sample_rate = SAMPLE_RATE
+    frame_ms = FRAME_MS
+
+    def open(self):
+        return self
+
+    def read_frame(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """The default microphone, opened once and read frame by frame."""
+    def __init__(self, device_index=None, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self._microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate,
+                                         chunk_size=self.frame_samples)
+
+    def open(self):
+        self._microphone.__enter__()
+        return self
+
+    def read_frame(self):
+        return self._microphone.stream.read(self.frame_samples)
+
+    def close(self):
+        self._microphone.__exit__(None, None, None)
+
+
+class WavFileSource(AudioSource):
+    """Frames from a WAV file, optionally paced like a live microphone."""
+    def __init__(self, path, realtime=False, frame_ms=FRAME_MS):
+        self.path = path
+        self.realtime = realtime
+        self.frame_ms = frame_ms
+        self._frames = None
+        self._next_at = 0.0
+
+    def open(self):
+        self._frames = deque(read_wav_frames(self.path, self.frame_ms))
+        self._next_at = time.monotonic()
+        return self
+
+    def read_frame(self):
+        if not self._frames:
+            return None
+        if self.realtime:
+            self._next_at += self.frame_ms / 1000
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return self._frames.popleft()
+
+
+class AudioCapture:
+    """Reads a source on a background thread into a ring buffer of recent frames.
+
+    Consumers iterate frames() at their own pace. A consumer that falls more
+    than the ring's length behind skips ahead rather than blocking capture.
+    """
+    def __init__(self, source, ring_seconds=10.0):
+        self.source = source
+        self._ring = deque(maxlen=max(1, int(ring_seconds * 1000 / source.frame_ms)))
+        self._written = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self.dropped = 0
+
+    def start(self):
+        self.source.open()
+        self._thread = threading.Thread(target=self._capture, name="jarvis-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def frames(self, from_start=False):
+        """Yield frames as they are captured; ends when the source is exhausted or stopped."""
+        with self._cond:
+            position = self._written - len(self._ring) if from_start else self._written
+        while True:
+            with self._cond:
+                while position >= self._written and not self._closed:
+                    self._cond.wait()
+                if position >= self._written:
+                    return
+                oldest = self._written - len(self._ring)
+                if position < oldest:
+                    self.dropped += oldest - position
+                    position = oldest
+                frame = self._ring[position - oldest]
+            position += 1
+            yield frame
+
+    def _capture(self):
+        try:
+            while not self._closed:
+                frame = self.source.read_frame()
+                if frame is None:
+                    break
+                with self._cond:
+                    self._ring.append(frame)
+                    self._written += 1
+                    self._cond.notify_all()
+        finally:
+            self.source.close()
+            self.stop()
+
+
+class NoiseFloor:
+    """Running estimate of background energy that sets the speech threshold.
+
+    The floor follows quiet frames quickly and creeps up slowly under
+    sustained noise, so a fan turning on is absorbed within seconds while
+    speech itself barely moves it.
+    """
+    def __init__(self, ratio=3.0, min_threshold=100.0, fall=0.2, rise=0.01, warmup_frames=15):
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.fall = fall
+        self.rise = rise
+        self.warmup_frames = warmup_frames
+        self.floor = None
+        self._seen = 0
+
+    @property
+    def threshold(self):
+        if self.floor is None:
+            return self.min_threshold
+        return max(self.min_threshold, self.floor * self.ratio)
+
+    def is_speech(self, frame):
+        """Classify a frame and fold its energy into the estimate."""
+        rms = frame_rms(frame)
+        self._seen += 1
+        if self.floor is None:
+            self.floor = rms
+        speech = self._seen > self.warmup_frames and rms > self.threshold
+        rate = self.fall if rms < self.floor else (self.rise if not speech else self.rise / 10)
+        if self._seen <= self.warmup_frames:
+            rate = max(rate, 1.0 / self._seen)
+        self.floor += (rms - self.floor) * rate
+        return speech
+
+
+class UtteranceSegmenter:
+    """Cuts a frame stream into utterances, keeping pre-roll before the first speech frame."""
+    def __init__(self, gate, preroll_ms=300, hangover_ms=600, min_speech_ms=150, max_utterance_ms=8000,
+                 sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, on_speech_start=None):
+        self.gate = gate
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = max(1, max_utterance_ms // frame_ms)
+        self.on_speech_start = on_speech_start
+        self._preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._frames = []
+        self._speech_frames = 0
+        self._silent = 0
+
+    @property
+    def in_speech(self):
+        return bool(self._frames)
+
+    def buffered_frames(self):
+        """Frames of the utterance in progress, pre-roll included."""
+        return list(self._frames)
+
+    def process(self, frame):
+        """Consume one frame; returns an sr.AudioData when an utterance completes."""
+        speech = self.gate.is_speech(frame)
+        if not self._frames:
+            if not speech:
+                self._preroll.append(frame)
+                return None
+            self._frames = list(self._preroll)
+            self._preroll.clear()
+            if self.on_speech_start:
+                self.on_speech_start()
+        self._frames.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silent = 0
+        else:
+            self._silent += 1
+        if self._silent >= self.hangover_frames or len(self._frames) >= self.max_frames:
+            return self._finish()
+        return None
+
+    def flush(self):
+        """Return any utterance still in progress, e.g. at the end of a file."""
+        return self._finish() if self._frames else None
+
+    def reset(self):
+        self._frames = []
+        self._preroll.clear()
+        self._speech_frames = 0
+        self._silent = 0
+
+    def _finish(self):
+        frames, speech_frames = self._frames, self._speech_frames
+        self.reset()
+        if speech_frames < self.min_speech_frames:
+            return None  # a click or a cough
+        return sr.AudioData(b"".join(frames), self.sample_rate, SAMPLE_WIDTH)
@@ -0,0 +1,134 @@
+"""Response cache for ChatGPT queries."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    return " ".join(prompt.lower().split()).rstrip("?!. ")
+
+
+class ResponseCache:
+    """In-memory LRU of responses with a TTL and an optional SQLite backing store.
+
+    Keys combine the normalized prompt with the model and system prompt, so a
+    change to either never serves a stale answer.
+    """
+    def __init__(self, max_entries=256, ttl=3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (created, response)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    @staticmethod
+    def make_key(prompt, model, system_prompt):
+        """Build the cache key for a prompt sent with the given model and system prompt."""
+        raw = "\x1f".join((model, system_prompt, normalize_prompt(prompt)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is not None and now - entry[0] > self.ttl:
+                self._forget(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def __contains__(self, key):
+        """Whether get(key) would hit, without counting a lookup or touching the LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+                entry = (row[0], None) if row else None
+        return entry is not None and time.time() - entry[0] <= self.ttl
+
+    def put(self, key, response):
+        """Store a response under key."""
+        entry = (time.time(), response)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, created, response) VALUES (?, ?, ?)",
+                    (key, entry[0], response)
+                )
+                self._db.commit()
+
+    def clear(self):
+        """Drop every entry, including the ones on disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _open_db(self, db_path):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # Worker threads share the connection; every use is serialized by self._lock
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, response TEXT)"
+        )
+        self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        self._db.commit()
+        # Warm the in-memory LRU with the most recent entries
+        rows = self._db.execute(
+            "SELECT key, created, response FROM responses ORDER BY created DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for key, created, response in reversed(rows):
+            self._entries[key] = (created, response)
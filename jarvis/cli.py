@@ -0,0 +1,353 @@
+"""Headless Jarvis: a stdin REPL and a local HTTP daemon that takes commands in batches.
+
+    python -m jarvis                      # REPL on stdin
+    python -m jarvis serve --port 8765    # daemon
+    python -m jarvis serve --dry-run      # log actions instead of opening anything
+
+The daemon accepts POST /commands with {"session": "...", "commands": [...]},
+or a list of such batches, which run concurrently. Commands within a session
+always run in order. GET /stats reports per-session counters and stage latencies.
+Every request needs the per-install token from JARVIS_TOKEN or
+~/.config/jarvis/token in an X-Jarvis-Token header, and POSTs must be
+Content-Type: application/json, so web pages can't drive the daemon:
+
+    curl -H "X-Jarvis-Token: $(cat ~/.config/jarvis/token)" -H "Content-Type: application/json" \
+         -d '{"commands": ["open google"]}' http://127.0.0.1:8765/commands
+
+Edits to the command config are picked up every JARVIS_CONFIG_POLL seconds
+(default 1; 0 turns reloading off).
+"""
+import argparse
+import hmac
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jarvis.engine import DryRun, JarvisEngine, cache_from_env, default_app_index, shared_registry
+from jarvis.launcher import AppLauncher
+from jarvis.memory import SESSION_ID
+from jarvis.registry import RegistryWatcher, user_config_dir
+from jarvis.trace import tracer
+
+
+class SessionPool:
+    """One JarvisEngine per session id, all sharing the same backends and response cache."""
+    def __init__(self, dry_run=False, llm=None, stream_responses=True, max_workers=8):
+        self.dry_run = DryRun(verbose=True) if dry_run else None
+        self.llm = llm
+        self.stream_responses = stream_responses
+        self.cache = cache_from_env()
+        self.registry = shared_registry()
+        self.app_index = default_app_index(self.registry)
+        self.launcher = self.dry_run or AppLauncher()
+        self.watcher = None
+        self.commands = 0
+        self.busy_seconds = 0.0
+        self._engines = {}
+        self._session_locks = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jarvis-session")
+
+    def start(self):
+        self.app_index.start()
+        if not self.dry_run:
+            self.launcher.start_reaper()
+        interval = float(os.getenv("JARVIS_CONFIG_POLL", "1"))
+        if interval > 0:
+            self.watcher = RegistryWatcher(self.reload, interval=interval).start()
+        return self
+
+    def reload(self, registry):
+        """Switch every session, and sessions created from now on, to a new registry."""
+        with self._lock:
+            self.registry = registry
+            for engine in self._engines.values():
+                engine.reload(registry)
+
+    def engine(self, session_id):
+        """The engine for session_id, created on first use."""
+        with self._lock:
+            engine = self._engines.get(session_id)
+            if engine is None:
+                engine = JarvisEngine(
+                    session_id=session_id,
+                    open_url=self.dry_run.open_url if self.dry_run else None,
+                    play_video=self.dry_run.play_video if self.dry_run else None,
+                    resolve_video=self.dry_run.resolve_video if self.dry_run else None,
+                    launcher=self.launcher,
+                    app_index=self.app_index,
+                    llm=self.llm,
+                    cache=self.cache,
+                    stream_responses=self.stream_responses,
+                    registry=self.registry
+                )
+                self._engines[session_id] = engine
+                self._session_locks[session_id] = threading.Lock()
+            return engine, self._session_locks[session_id]
+
+    def run_batch(self, session_id, commands):
+        """Run one session's commands in order; returns their responses."""
+        engine, session_lock = self.engine(session_id)
+        start = time.perf_counter()
+        with session_lock:
+            responses = engine.process_batch(commands)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.commands += len(commands)
+            self.busy_seconds += elapsed
+        return responses
+
+    def run_batches(self, batches):
+        """Run (session_id, commands) batches concurrently; results keep the input order."""
+        futures = [self._pool.submit(self.run_batch, session_id, commands) for session_id, commands in batches]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        with self._lock:
+            sessions = {
+                session_id: engine.conversation.stats() for session_id, engine in self._engines.items()
+            }
+            commands, busy = self.commands, self.busy_seconds
+        return {
+            "sessions": sessions,
+            "commands": commands,
+            "mean_command_ms": busy / commands * 1000 if commands else 0.0,
+            "cache": self.cache.stats(),
+            "launcher": {} if self.dry_run else self.launcher.stats(),
+            "stages": tracer.stats(),
+            "config": {
+                "sources": list(self.registry.sources),
+                "reloads": self.watcher.reloads if self.watcher else 0,
+                "last_reload_ms": self.watcher.last_reload_ms if self.watcher else 0.0,
+            },
+        }
+
+    def shutdown(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_batches(body):
+    """Normalize a request body into a list of (session_id, [commands])."""
+    items = body if isinstance(body, list) else [body]
+    batches = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("each batch must be an object")
+        commands = item.get("commands")
+        if commands is None and "command" in item:
+            commands = [item["command"]]
+        if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+            raise ValueError("'commands' must be a list of strings")
+        session_id = str(item.get("session", "default"))
+        if not SESSION_ID.fullmatch(session_id):
+            raise ValueError("'session' may only contain letters, digits, '_' and '-'")
+        batches.append((session_id, commands))
+    return batches
+
+
+TOKEN_HEADER = "X-Jarvis-Token"
+# Largest request body the daemon reads; a batch of commands is a few KB
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def load_token():
+    """The daemon's access token: JARVIS_TOKEN, or one generated on first use and kept in the config dir."""
+    token = os.getenv("JARVIS_TOKEN")
+    if token:
+        return token
+    path = os.path.join(user_config_dir(), "token")
+    try:
+        with open(path, encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    # Readable by this user only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    print(f"Generated an access token in {path}")
+    return token
+
+
+class JarvisServer:
+    """Local HTTP daemon in front of a SessionPool; every request must carry the token."""
+    def __init__(self, sessions, host="127.0.0.1", port=8765, token=None):
+        self.sessions = sessions
+        self.token = token or load_token()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="jarvis-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path.rstrip("/") == "/stats":
+                    self._send(200, server.sessions.stats())
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                if self.path.rstrip("/") != "/commands":
+                    self._send(404, {"error": "not found"})
+                    return
+                # Browsers send text/plain cross-origin without a preflight; JSON needs one
+                content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type != "application/json":
+                    self.close_connection = True
+                    self._send(415, {"error": "Content-Type must be application/json"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    self.close_connection = True  # the body is left unread
+                    if length < 0:
+                        self._send(400, {"error": "bad Content-Length"})
+                    else:
+                        self._send(413, {"error": f"request body over {MAX_BODY_BYTES} bytes"})
+                    return
+                try:
+                    batches = parse_batches(json.loads(self.rfile.read(length) or b"{}"))
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                start = time.perf_counter()
+                results = server.sessions.run_batches(batches)
+                self._send(200, {
+                    "results": [
+                        {"session": session_id, "responses": responses}
+                        for (session_id, _), responses in zip(batches, results)
+                    ],
+                    "elapsed_ms": (time.perf_counter() - start) * 1000,
+                })
+
+            def _authorized(self):
+                token = self.headers.get(TOKEN_HEADER, "")
+                if hmac.compare_digest(token.encode("utf-8"), server.token.encode("utf-8")):
+                    return True
+                self.close_connection = True  # the body was never read
+                self._send(401, {"error": f"missing or wrong {TOKEN_HEADER} header"})
+                return False
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def repl(sessions, session_id="default", stdin=sys.stdin, stdout=sys.stdout):
+    """Read commands line by line and print each response, streaming ChatGPT answers."""
+    engine, _ = sessions.engine(session_id)
+    interactive = stdin.isatty()
+    while True:
+        if interactive:
+            stdout.write("you> ")
+            stdout.flush()
+        line = stdin.readline()
+        if not line:
+            break
+        command = line.strip()
+        if not command:
+            continue
+        if command in ("exit", "quit"):
+            break
+        streamed = []
+
+        def on_token(token):
+            if not streamed:
+                stdout.write("jarvis> ")
+            streamed.append(token)
+            stdout.write(token)
+            stdout.flush()
+
+        response = engine.process_command(command, is_voice=False, on_token=on_token)
+        stdout.write("\n" if streamed else f"jarvis> {response}\n")
+        stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m jarvis", description="Run Jarvis without the GUI.")
+    parser.add_argument("mode", nargs="?", choices=["repl", "serve"], default="repl")
+    parser.add_argument("--session", default=os.getenv("JARVIS_SESSION", "default"), help="REPL session id")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("JARVIS_PORT", "8765")))
+    parser.add_argument("--workers", type=int, default=8, help="batches run concurrently by the daemon")
+    parser.add_argument("--dry-run", action="store_true", help="log browser and app actions instead of doing them")
+    parser.add_argument("--verbose", action="store_true", help="log how each command is routed")
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(format="%(name)s: %(message)s")
+        logging.getLogger("jarvis").setLevel(logging.DEBUG)
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    sessions = SessionPool(
+        dry_run=args.dry_run,
+        stream_responses=os.getenv("JARVIS_STREAM_RESPONSES", "1") != "0",
+        max_workers=args.workers
+    ).start()
+    try:
+        if args.mode == "serve":
+            server = JarvisServer(sessions, args.host, args.port)
+            print(f"Jarvis listening on {server.address}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            server.stop()
+        else:
+            repl(sessions, args.session)
+    finally:
+        sessions.shutdown()
+    return 0
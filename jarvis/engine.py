@@ -0,0 +1,639 @@
+"""Command handling independent of the GUI, with injectable backends."""
+import logging
+import os
+import platform
+import re
+import threading
+import time
+import webbrowser
+from collections import deque, namedtuple
+from functools import partial
+from urllib.parse import quote_plus
+
+from jarvis.apps import AppIndex
+from jarvis.cache import ResponseCache
+from jarvis.intents import EXAMPLES, SLOTS, IntentClassifier
+from jarvis.launcher import AppLauncher, LaunchedApp
+from jarvis.llm import client_from_env, describe_error
+from jarvis.memory import ConversationMemory, Tokenizer
+from jarvis.planner import CommandPlanner
+from jarvis.registry import DEFAULT_CONFIG, Registry, config_paths
+from jarvis.router import CommandRouter, Route
+from jarvis.speculate import Prefetches
+from jarvis.trace import tracer as default_tracer
+
+# ChatGPT settings
+CHAT_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a helpful assistant named Jarvis."
+MAX_TOKENS = 1000
+
+log = logging.getLogger(__name__)
+
+# Leftovers around the search term, e.g. "search for cats on youtube"
+SEARCH_FILLER = re.compile(r"^(?:for\s+)|\s+(?:on|in)$")
+
+NO_PLATFORM_RESPONSE = "Please specify a platform to search on (e.g., Google, YouTube, Instagram, LinkedIn)."
+NOT_UNDERSTOOD_RESPONSE = "I didn't understand that command. Please try again."
+
+# Fixed responses, rendered at startup so they play from the TTS cache
+STATIC_PHRASES = [
+    "Wake word detected. How can I help you?",
+    "Going to sleep. Say 'Jarvis' to wake me up.",
+    "Sorry, I didn't catch that.",
+    "Speech recognition service error.",
+    NOT_UNDERSTOOD_RESPONSE,
+    NO_PLATFORM_RESPONSE,
+]
+# "Opening <site>" is rendered ahead for this many of the configured websites
+STATIC_SITES = 20
+
+# What one command is routed with; swapped as a whole when the config is reloaded
+Routes = namedtuple("Routes", ["registry", "router", "classifier"])
+
+# Words that make a prompt lean on the conversation so far, e.g. "why is that" or "tell me more"
+CONTEXT_REFERENCE = re.compile(
+    r"\b(?:it|its|it's|that|this|these|those|they|them|their|he|him|his|she|her|there|"
+    r"more|again|else|another|same|previous|earlier|above|instead)\b"
+    r"|^(?:and|but|or|also|so|then|what about|how about)\b|^(?:why|how come)\W*$"
+)
+# Turns a context-dependent answer is keyed on
+CACHE_CONTEXT_TURNS = 2
+
+# A sentence ends at . ! or ? followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+_openai = None
+_openai_lock = threading.Lock()
+
+
+def get_openai():
+    """The shared resilient ChatGPT client, created on first use."""
+    global _openai
+    with _openai_lock:
+        if _openai is None:
+            _openai = client_from_env()
+    return _openai
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def shared_registry():
+    """The registry from the config files, loaded on first use; the built-in one if they are broken."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            try:
+                _registry = Registry.load(config_paths())
+            except Exception as e:
+                print(f"Ignoring the command config: {e}")
+                _registry = Registry.load([DEFAULT_CONFIG])
+    return _registry
+
+
+_classifier = None  # (registry, classifier)
+_classifier_lock = threading.Lock()
+
+
+def intent_classifier(registry):
+    """The intent classifier for registry, shared by every engine; None if JARVIS_INTENT_CLASSIFIER=0."""
+    global _classifier
+    if os.getenv("JARVIS_INTENT_CLASSIFIER", "1") == "0":
+        return None
+    with _classifier_lock:
+        if _classifier is None or _classifier[0] is not registry:
+            examples = dict(EXAMPLES)
+            slots = dict(SLOTS)
+            for spec in registry.intents:
+                if spec.examples:
+                    examples[spec.name] = spec.examples
+                    slots[spec.name] = spec.slots
+            _classifier = (registry, IntentClassifier(
+                registry.entities(),
+                examples=examples,
+                slots=slots,
+                threshold=float(os.getenv("JARVIS_INTENT_THRESHOLD", "0.5"))
+            ))
+    return _classifier[1]
+
+
+def play_on_youtube(query):
+    import pywhatkit  # checks the network on import, so it is loaded on first use
+    pywhatkit.playonyt(query)
+
+
+def youtube_url(query):
+    """URL of the top YouTube result for query, without opening it."""
+    import pywhatkit
+    return pywhatkit.playonyt(query, open_video=False)
+
+
+def split_sentences(text):
+    """Split complete sentences off the front of text; return (sentences, remainder)."""
+    parts = SENTENCE_BOUNDARY.split(text)
+    sentences = [part.strip() for part in parts[:-1] if part.strip()]
+    return sentences, parts[-1]
+
+
+def cache_from_env():
+    """Response cache configured by JARVIS_CACHE_SIZE, JARVIS_CACHE_TTL and JARVIS_CACHE_DB."""
+    return ResponseCache(
+        max_entries=int(os.getenv("JARVIS_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("JARVIS_CACHE_TTL", "3600")),
+        db_path=os.getenv("JARVIS_CACHE_DB") or None
+    )
+
+
+def default_app_index(registry=None):
+    """Installed-app index with the configured apps as aliases."""
+    return AppIndex(aliases=(registry or shared_registry()).app_aliases)
+
+
+class DryRun:
+    """Stand-in backends that record actions instead of performing them.
+
+    One instance serves as open_url, play_video and launcher, for headless
+    runs and benchmarks where nothing should actually open.
+    """
+    def __init__(self, verbose=False, keep=1000):
+        self.verbose = verbose
+        self.actions = deque(maxlen=keep)  # the most recent ones
+        self._lock = threading.Lock()
+
+    def open_url(self, url):
+        self._record("open_url", url)
+
+    def play_video(self, query):
+        self._record("play_video", query)
+
+    def resolve_video(self, query):
+        return f"https://www.youtube.com/results?search_query={quote_plus(query)}"
+
+    def launch(self, name, argv):
+        self._record("launch", argv)
+        return LaunchedApp(name, 0, list(argv), time.time(), None)
+
+    def start_file(self, target):
+        self._record("start_file", target)
+
+    def running(self):
+        return []
+
+    def close(self, name):
+        self._record("close", name)
+        return 0
+
+    def _record(self, action, target):
+        with self._lock:
+            self.actions.append((action, target))
+        if self.verbose:
+            print(f"[dry run] {action}: {target}")
+
+
+class JarvisEngine:
+    """Routes commands to actions or ChatGPT for one conversation session.
+
+    Backends are injected so the engine runs under the GUI, headless or in a
+    benchmark: open_url(url), play_video(query), launcher (AppLauncher-like),
+    app_index (AppIndex-like), llm (an OpenAI-style client, or None for the
+    openai module), speaker (anything with speak(text), or None for silence),
+    classifier (IntentClassifier-like, or None for the shared one),
+    resolve_video(query) returning a video URL, registry (a Registry, or
+    None for the one from the config files) and tracer. Engines for
+    different sessions can share everything except conversation and
+    prefetches, which holds speculative work for the next command.
+    """
+    def __init__(self, session_id="default", open_url=None, play_video=None, launcher=None, app_index=None,
+                 llm=None, speaker=None, cache=None, conversation=None, stream_responses=True, system=None,
+                 tracer=None, classifier=None, resolve_video=None, registry=None):
+        self.session_id = session_id
+        self.open_url = open_url or webbrowser.open
+        self.play_video = play_video or play_on_youtube
+        self.resolve_video = resolve_video or youtube_url
+        self.prefetches = Prefetches()
+        self.launcher = launcher if launcher is not None else AppLauncher()
+        registry = registry or shared_registry()
+        self.app_index = app_index if app_index is not None else default_app_index(registry)
+        self.speaker = speaker
+        self.cache = cache if cache is not None else cache_from_env()
+        self.stream_responses = stream_responses
+        self.system = (system or platform.system()).lower()
+        self.tracer = tracer or default_tracer
+        self._llm = llm
+        self._classifier = classifier
+        # Rolling conversation history sent with every ChatGPT request
+        self.conversation = conversation or ConversationMemory(
+            session_id=session_id,
+            budget=int(os.getenv("JARVIS_CONTEXT_TOKENS", "1500")),
+            summarize=self.summarize_conversation,
+            tokenizer=Tokenizer(CHAT_MODEL)
+        )
+        self.routes = self._build_routes(registry)
+        self.planner = CommandPlanner(self)
+
+    @property
+    def llm(self):
+        return self._llm if self._llm is not None else get_openai()
+
+    @property
+    def registry(self):
+        return self.routes.registry
+
+    @property
+    def router(self):
+        return self.routes.router
+
+    @property
+    def classifier(self):
+        return self.routes.classifier
+
+    @property
+    def static_phrases(self):
+        """Fixed responses worth rendering ahead, including opening the first configured websites."""
+        return STATIC_PHRASES + [f"Opening {site}" for site in list(self.registry.websites)[:STATIC_SITES]]
+
+    def reload(self, registry):
+        """Switch to a new registry; commands already running finish with the old one."""
+        routes = self._build_routes(registry)
+        set_aliases = getattr(self.app_index, "set_aliases", None)
+        if set_aliases is not None:
+            set_aliases(registry.app_aliases)
+        self.routes = routes
+
+    def _build_routes(self, registry):
+        # Intents are compiled into combined patterns and tried in this order; the keywords
+        # keep intents that scan the whole command out of the pattern unless they could match
+        router = CommandRouter()
+        builtin = {"website", "play", "search", "search_without_platform", "open_app", "close_app",
+                   "running_apps", "new_conversation"}
+        # Custom intents come first so they can claim phrases the built-in ones would take
+        for spec in registry.intents:
+            if spec.name in builtin:
+                print(f"Skipping custom intent {spec.name!r} from {spec.source}: that name is built in")
+                continue
+            router.register(spec.name, spec.pattern, registry.handler(spec, self))
+        router.register("website", rf".*?\bopen (?P<site>{registry.site_pattern})\b",
+                        partial(self.open_website, registry=registry), keywords=("open ",))
+        router.register("play", r"play\b(?P<song>.*)", self.play_song)
+        router.register(
+            "search",
+            rf"(?=.*?\b(?P<platform>{registry.platform_pattern})\b).*?\bsearch\b(?P<term>.*)",
+            partial(self.search_platform, registry=registry),
+            keywords=("search",)
+        )
+        router.register("search_without_platform", r".*?\bsearch\b", lambda: NO_PLATFORM_RESPONSE,
+                        keywords=("search",))
+        router.register("open_app", r"open (?P<app_name>.+)", self.open_desktop_app)
+        router.register("close_app", r"(?:close|quit|kill) (?P<app_name>.+)", self.close_app)
+        router.register("running_apps", r".*?\b(?:what's|what is|which apps are) (?:still )?running\b",
+                        self.running_apps, keywords=("running",))
+        router.register(
+            "new_conversation",
+            r"(?:start a new conversation|new conversation|forget (?:our|the|this) conversation"
+            r"|reset (?:the )?conversation)\b",
+            self.new_conversation
+        )
+        router.compile()
+        classifier = self._classifier if self._classifier is not None else intent_classifier(registry)
+        return Routes(registry, router, classifier)
+
+    def speak(self, text):
+        if self.speaker is not None:
+            self.speaker.speak(text)
+
+    def process_command(self, command, is_voice=True, on_token=None, cancel_event=None, interaction_id=None):
+        """Process user commands and return response string.
+
+        When on_token is given, ChatGPT answers are streamed through it token by token
+        and voice responses are spoken sentence by sentence as they complete.
+        Stages are traced under interaction_id, or under a new interaction.
+        """
+        if interaction_id is None:
+            interaction_id = self.tracer.new_interaction()
+        with self.tracer.interaction(interaction_id), self.tracer.span("command"):
+            return self._process_command(command, is_voice, on_token, cancel_event)
+
+    def _process_command(self, command, is_voice, on_token, cancel_event):
+        try:
+            command = command.lower().strip()
+            log.debug("Processing command: %s", command)
+
+            # Compound commands: several actions and questions in one utterance
+            with self.tracer.span("plan"):
+                steps = self.planner.plan(command)
+            if steps is not None:
+                log.debug("Compound command: %s", [step.text for step in steps])
+                return self.planner.run(
+                    steps,
+                    on_token=on_token,
+                    on_sentence=self.speak if is_voice else None,
+                    cancel_event=cancel_event,
+                    command=command
+                )
+
+            # Built-in and configured actions, all from the same registry even if it is reloaded meanwhile
+            routes = self.routes
+            with self.tracer.span("route"):
+                route = routes.router.match(command)
+            if route is None:
+                # Paraphrased actions are recognized locally rather than sent to ChatGPT
+                with self.tracer.span("classify"):
+                    route = self.classify(command, routes)
+            if route is not None:
+                with self.tracer.span("action"):
+                    response = route.intent.handler(**route.slots)
+                if is_voice:
+                    self.speak(response)
+                return response
+
+            # Handle ChatGPT responses for everything else
+            if command not in ["exit", "quit", "go to sleep"]:
+                try:
+                    if self.stream_responses and on_token is not None:
+                        # Sentences are queued for speech while the rest is still generating
+                        with self.tracer.span("llm"):
+                            return self.stream_chatbot_response(
+                                command,
+                                on_token=on_token,
+                                on_sentence=self.speak if is_voice else None,
+                                cancel_event=cancel_event
+                            )
+                    with self.tracer.span("llm"):
+                        response = self.get_chatbot_response(command)
+                    if is_voice:
+                        self.speak(response)
+                    return response
+                except Exception as e:
+                    response = f"Sorry, I couldn't get a response from ChatGPT: {str(e)}"
+                    if is_voice:
+                        self.speak(response)
+                    return response
+
+            # Default response if no conditions are met
+            response = NOT_UNDERSTOOD_RESPONSE
+            if is_voice:
+                self.speak(response)
+            return response
+
+        except Exception as e:
+            error_msg = f"Error processing command: {str(e)}"
+            if is_voice:
+                self.speak(error_msg)
+            return error_msg
+
+    def classify(self, command, routes=None, wait=2.0):
+        """Route for a command the patterns missed but the intent classifier recognizes, or None.
+
+        wait is how long to wait for the app index when checking an app name.
+        """
+        routes = routes or self.routes
+        classifier = routes.classifier
+        prediction = classifier.classify(command) if classifier is not None else None
+        if prediction is None:
+            return None
+        intent = routes.router.intent_named(prediction.intent)
+        if intent is None:
+            return None
+        app_name = prediction.slots.get("app_name")
+        if app_name is not None and not self.knows_app(app_name, routes.registry, wait):
+            # "turn off the lights" is phrased like closing an app, but there is no such app
+            log.debug("Not an app, asking ChatGPT instead: %s", app_name)
+            return None
+        log.debug("Classified as %s (%.2f): %s", prediction.intent, prediction.confidence, prediction.slots)
+        return Route(intent, prediction.slots)
+
+    def process_batch(self, commands):
+        """Run commands in order, as typed; returns their responses."""
+        return [self.process_command(command, is_voice=False) for command in commands]
+
+    # Built-in actions
+
+    def open_website(self, site, registry=None):
+        self.open_url((registry or self.registry).websites[site])
+        return f"Opening {site}"
+
+    def play_song(self, song):
+        song_name = " ".join(song.split())
+        try:
+            url = self.prefetches.take(("play", song_name))
+            if url:
+                self.open_url(url)
+            else:
+                self.play_video(song_name)
+            return f"Playing {song_name} on YouTube"
+        except Exception as e:
+            return f"Sorry, I couldn't play that song: {str(e)}"
+
+    def search_platform(self, platform, term, registry=None):
+        term = re.sub(rf"\b{re.escape(platform)}\b", " ", term)
+        search_term = SEARCH_FILLER.sub("", " ".join(term.split()))
+        url, response = (registry or self.registry).search_platforms[platform]
+        self.open_url(url.format(quote_plus(search_term)))
+        return response.format(search_term)
+
+    def resolve_app(self, app_name):
+        """Return the launcher argv for an app, from the index or the configured apps."""
+        launcher = self.app_index.lookup(app_name)
+        if launcher:
+            return launcher
+        target = self.registry.apps.get(app_name, {}).get(self.system)
+        if target:
+            # Not installed under that name, but the platform knows how to start it
+            return ["open", "-a", target] if self.system == "darwin" else [target]
+        return None
+
+    def knows_app(self, app_name, registry=None, wait=2.0):
+        """Whether app_name is configured, installed or one Jarvis started."""
+        app_name = app_name.lower().strip()
+        if app_name in (registry or self.registry).apps or self.app_index.lookup(app_name, wait=wait):
+            return True
+        return any(app.name.lower() == app_name for app in self.launcher.running())
+
+    def open_desktop_app(self, app_name):
+        """Open desktop applications with improved error handling and debugging."""
+        try:
+            app_name = app_name.lower().strip()
+            log.debug("Attempting to open: %s", app_name)
+
+            launcher = self.prefetches.take(("app", app_name)) or self.resolve_app(app_name)
+            if launcher:
+                log.debug("Found launcher: %s", launcher)
+                if self.system == "windows" and len(launcher) == 1 and not launcher[0].lower().endswith(".exe"):
+                    # URIs such as ms-settings: need the shell
+                    self.launcher.start_file(launcher[0])
+                else:
+                    self.launcher.launch(app_name, launcher)
+                return f"Opening {app_name}"
+
+            # If all else fails, try using the command directly
+            try:
+                if self.system == "darwin":  # macOS
+                    self.launcher.launch(app_name, ["open", "-a", app_name])
+                else:
+                    self.launcher.launch(app_name, [app_name])
+                return f"Opening {app_name}"
+            except Exception as e:
+                print(f"Error running app directly: {e}")
+                return f"Sorry, I couldn't find or open {app_name}"
+
+        except Exception as e:
+            print(f"Error opening {app_name}: {e}")
+            return f"Sorry, I encountered an error while trying to open {app_name}"
+
+    def close_app(self, app_name):
+        if self.launcher.close(app_name):
+            return f"Closing {app_name}"
+        return f"{app_name} isn't running"
+
+    def running_apps(self):
+        apps = self.launcher.running()
+        if not apps:
+            return "Nothing I opened is running right now."
+        names = sorted({app.name for app in apps})
+        return f"Running: {', '.join(names)}"
+
+    def new_conversation(self):
+        self.conversation.clear()
+        return "Okay, starting a new conversation."
+
+    # ChatGPT
+
+    def summarize_conversation(self, summary, turns, max_tokens):
+        """Fold old turns into the running conversation summary with a short ChatGPT call."""
+        transcript = "\n".join(f"User: {t['user']}\nJarvis: {t['assistant']}" for t in turns)
+        response = self.llm.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[
+                {"role": "system", "content": "Summarize this conversation for your own memory. Keep names, facts, "
+                                              "preferences and open questions; drop pleasantries."},
+                {"role": "user", "content": f"Summary so far: {summary or '(none)'}\n\nNew exchanges:\n{transcript}"}
+            ],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+    def conversation_cache_key(self, prompt):
+        """Cache key for a prompt: on its own if it stands alone, else with the last few turns."""
+        if not CONTEXT_REFERENCE.search(prompt.lower()):
+            return ResponseCache.make_key(prompt, CHAT_MODEL, SYSTEM_PROMPT)
+        context = self.conversation.digest(recent=CACHE_CONTEXT_TURNS)
+        return ResponseCache.make_key(prompt, CHAT_MODEL, SYSTEM_PROMPT + context)
+
+    def report_prompt_tokens(self, usage=None):
+        """Log the prompt size of the last request, as counted locally and as billed."""
+        billed = f", billed {usage.prompt_tokens}" if usage is not None else ""
+        log.debug("Prompt tokens: %s%s", self.conversation.last_prompt_tokens, billed)
+
+    def get_chatbot_response(self, prompt, said=None):
+        """Get response from OpenAI ChatGPT.
+
+        said is what the user actually said when prompt rewrites it; that is
+        what the answer is cached under and remembered as.
+        """
+        said = said or prompt
+        cache_key = self.conversation_cache_key(said)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            log.debug("Cache hit: %s", self.cache.stats())
+            self.conversation.add_turn(said, cached)
+            return cached
+        try:
+            response = self.llm.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=self.conversation.build_messages(SYSTEM_PROMPT, prompt),
+                max_tokens=MAX_TOKENS
+            )
+            self.report_prompt_tokens(response.usage)
+            content = response.choices[0].message.content.strip()
+            self.cache.put(cache_key, content)
+            self.conversation.add_turn(said, content)
+            return content
+        except Exception as e:
+            return describe_error(e)
+
+    def open_chat_stream(self, prompt):
+        """Start a streamed ChatGPT request for prompt in the current conversation."""
+        return self.llm.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=self.conversation.build_messages(SYSTEM_PROMPT, prompt),
+            max_tokens=MAX_TOKENS,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+    def stream_chatbot_response(self, prompt, on_token=None, on_sentence=None, cancel_event=None, said=None):
+        """Stream a ChatGPT response, reporting tokens and complete sentences as they arrive.
+
+        said is as for get_chatbot_response().
+        """
+        said = said or prompt
+        cache_key = self.conversation_cache_key(said)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            log.debug("Cache hit: %s", self.cache.stats())
+            self.conversation.add_turn(said, cached)
+            if on_token:
+                on_token(cached)
+            if on_sentence:
+                sentences, remainder = split_sentences(cached)
+                for sentence in sentences + ([remainder.strip()] if remainder.strip() else []):
+                    on_sentence(sentence)
+            return cached
+
+        try:
+            # A request started from the partial transcript may already be answering
+            stream = self.prefetches.take(("chat", cache_key)) or self.open_chat_stream(prompt)
+        except Exception as e:
+            response = describe_error(e)
+            if on_token:
+                on_token(response)
+            if on_sentence:
+                on_sentence(response)
+            return response
+
+        chunks = []
+        pending = ""
+        completed = False
+        usage = None
+        requested_at = time.perf_counter()
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage  # the final chunk when include_usage is set
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                if not chunks:
+                    self.tracer.record("llm_first_token", requested_at, time.perf_counter())
+                chunks.append(token)
+                if on_token:
+                    on_token(token)
+                pending += token
+                sentences, pending = split_sentences(pending)
+                if on_sentence:
+                    for sentence in sentences:
+                        on_sentence(sentence)
+            else:
+                completed = True
+        except Exception as e:
+            error = f" {describe_error(e)}"
+            chunks.append(error)
+            if on_token:
+                on_token(error)
+        finally:
+            stream.close()
+
+        if on_sentence and pending.strip() and not (cancel_event is not None and cancel_event.is_set()):
+            on_sentence(pending.strip())
+        response = "".join(chunks).strip()
+        self.report_prompt_tokens(usage)
+        # Only whole answers are cached or remembered, never ones cut short by a cancel or an error
+        if completed and response:
+            self.cache.put(cache_key, response)
+            self.conversation.add_turn(said, response)
+        return response
@@ -0,0 +1,239 @@
+"""On-device intent classifier for commands the router's patterns don't catch.
+
+Paraphrases such as "could you fire up the calculator" or "look up cats on
+youtube" are built-in actions, not questions for ChatGPT. A TF-IDF nearest
+neighbour search over example utterances picks the intent, and the slots are
+filled from the words around the intent's own phrasing.
+"""
+import math
+import re
+from collections import Counter, defaultdict, namedtuple
+
+from jarvis.router import literal_alternation
+
+Prediction = namedtuple("Prediction", ["intent", "confidence", "slots"])
+
+# Label for open-ended requests that should go to ChatGPT
+CHAT = "chat"
+
+# Example utterances per intent. {site} and {platform} are expanded over the
+# known names; free-text slots ({term}, {song}, {app}) are left out of the
+# examples so only the phrasing around them is learnt.
+EXAMPLES = {
+    "website": [
+        "go to {site}", "take me to {site}", "bring up {site}", "pull up {site}", "show me {site}",
+        "load {site}", "visit {site}", "navigate to {site}", "can you open {site} for me",
+        "i want to go to {site}", "open the {site} website", "launch {site} in the browser",
+        "head over to {site}", "browse to {site}", "{site} please", "let's check {site}",
+    ],
+    "search": [
+        "look up {term} on {platform}", "find {term} on {platform}", "search {platform} for {term}",
+        "look for {term} on {platform}", "can you look up {term} on {platform}",
+        "google {term}", "find me {term} on {platform}", "show me {term} on {platform}",
+        "{platform} search for {term}", "search up {term} on {platform}", "check {platform} for {term}",
+        "find videos of {term} on {platform}", "look {term} up on {platform}",
+        "find people called {term} on {platform}", "do a {platform} search for {term}",
+    ],
+    "play": [
+        "put on {song}", "i want to listen to {song}", "can you play {song}", "start playing {song}",
+        "let me hear {song}", "play me {song}", "queue up {song}", "i'd like to hear {song}",
+        "put {song} on", "throw on some {song}", "listen to {song}", "play the song {song}",
+        "play some music by {song}", "stream {song}",
+    ],
+    "open_app": [
+        "fire up {app}", "launch {app}", "start {app}", "run {app}", "could you fire up the {app}",
+        "can you launch {app}", "please start the {app} app", "boot up {app}", "open up {app}",
+        "get {app} running", "bring up the {app} application", "start up {app} for me",
+        "i need the {app}", "load up {app}",
+    ],
+    "close_app": [
+        "shut down {app}", "exit {app}", "stop {app}", "terminate {app}", "close down the {app}",
+        "can you close {app}", "shut {app}", "end {app}", "get rid of the {app} window",
+        "please quit the {app} app", "turn off {app}", "i'm done with {app} close it",
+    ],
+    "running_apps": [
+        "which apps are open", "what apps do i have open", "list the running apps",
+        "what programs are running", "show me what's open", "what have you opened",
+        "which programs did you start", "list open applications", "what is open right now",
+    ],
+    "new_conversation": [
+        "let's start over", "start fresh", "clear the conversation", "wipe your memory",
+        "forget everything we talked about", "new chat", "begin a new chat", "clear the chat history",
+        "reset our chat", "let's talk about something else entirely", "forget what i said",
+    ],
+    CHAT: [
+        "what is the capital of france", "what's the time zone of tokyo", "tell me a joke",
+        "how many ounces are in a pound", "who wrote pride and prejudice", "explain quantum computing",
+        "why is the sky blue", "how do i make pancakes", "what's the weather like on mars",
+        "can you help me write an email", "what does photosynthesis mean", "give me a recipe for dinner",
+        "how far is the moon", "translate hello into spanish", "what should i name my dog",
+        "summarize the plot of hamlet", "how do i open a jar that is stuck", "what is a good movie to watch",
+        "who is the president of the united states", "how do planes stay in the air", "what time is it in london",
+        "write a poem about the sea", "what are the rules of chess", "how does a search engine work",
+        "recommend a good book", "what is the meaning of life", "how do i start a business",
+        "is it going to rain tomorrow", "what year did world war two end", "how do i stop procrastinating",
+        "what's the difference between a virus and bacteria", "help me plan a trip to italy",
+        "can you explain how music streaming works", "what is the best programming language to learn",
+        "how many people live in india", "who invented the telephone", "what's a healthy breakfast",
+    ],
+}
+
+# Slots each intent's handler takes. Slots named in the classifier's entities
+# are looked up by name; the other (at most one) gets the remaining words.
+SLOTS = {
+    "website": ("site",),
+    "search": ("platform", "term"),
+    "play": ("song",),
+    "open_app": ("app_name",),
+    "close_app": ("app_name",),
+    "running_apps": (),
+    "new_conversation": (),
+}
+
+# Intent to fall back to when a slot can't be filled, e.g. a search with no platform
+MISSING_SLOT_FALLBACK = {"search": "search_without_platform"}
+
+# Intents whose slot can't be checked against anything, so they need more confidence;
+# "put on a brave face" reads like "put on some taylor swift"
+INTENT_THRESHOLDS = {"play": 0.7}
+# A free-text slot with one of these is a question about something, not a name
+QUESTION_WORDS = {
+    "meaning", "mean", "means", "explained", "explain", "definition", "tips", "advice", "how", "why",
+    "what", "examples", "guide", "tutorial", "ideas", "history", "facts",
+}
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+WORD = re.compile(r"[a-z0-9']+")
+# Prepositions left dangling once an entity is taken out, e.g. "on" in "cats on youtube"
+ENTITY_PREPOSITIONS = {"on", "in", "at", "to", "from", "using", "via"}
+POLITENESS = {"please", "jarvis", "hey", "now", "thanks", "for", "me", "could", "would", "can", "you"}
+
+
+def tokenize(text):
+    return WORD.findall(text.lower())
+
+
+def features(tokens):
+    """Unigrams and bigrams; bigrams keep phrasal verbs like "look up" apart from "look"."""
+    grams = list(tokens)
+    grams.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return Counter(grams)
+
+
+class IntentClassifier:
+    """TF-IDF nearest neighbour over example utterances, with slot filling.
+
+    entities maps a slot name to the names it can take (e.g. "site" to the
+    websites); examples maps intents to utterances in the format of EXAMPLES.
+    predict() returns the intent of the most similar example and its cosine
+    similarity as the confidence; classify() only returns actions above
+    threshold (or the intent's own, if stricter in thresholds) whose slots
+    could be filled. Templates are expanded over at
+    most max_expansions names per slot, so large registries stay cheap to
+    train on; slot filling still recognizes every name.
+    """
+    def __init__(self, entities, examples=EXAMPLES, slots=SLOTS, threshold=0.5, max_expansions=20,
+                 thresholds=INTENT_THRESHOLDS):
+        self.entities = {slot: list(names) for slot, names in entities.items()}
+        self.slots = slots
+        self.threshold = threshold
+        self.thresholds = thresholds
+        self.max_expansions = max_expansions
+        self._entity_patterns = {
+            slot: re.compile(r"\b(?:(?:" + "|".join(sorted(ENTITY_PREPOSITIONS)) + r")\s+)?(" +
+                             literal_alternation(names) + r")\b")
+            for slot, names in self.entities.items() if names
+        }
+        self.fit(examples)
+
+    def fit(self, examples):
+        """Expand the examples, weight their features by IDF and index them for lookup."""
+        utterances = []
+        carrier = defaultdict(set)
+        for intent, templates in examples.items():
+            for template in templates:
+                for text in self._expand(template):
+                    tokens = tokenize(text)
+                    utterances.append((intent, features(tokens)))
+                    carrier[intent].update(tokens)
+        entity_words = {word for names in self.entities.values() for name in names for word in tokenize(name)}
+        # Words that phrase an intent rather than fill its slots, trimmed off free-text slots
+        self.carrier = {intent: words - entity_words for intent, words in carrier.items()}
+
+        document_frequency = Counter()
+        for _, counts in utterances:
+            document_frequency.update(counts.keys())
+        total = len(utterances)
+        self.idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        self.labels = []
+        self._postings = defaultdict(list)  # gram -> [(example index, weight)]
+        for index, (intent, counts) in enumerate(utterances):
+            self.labels.append(intent)
+            for gram, weight in self._vector(counts).items():
+                self._postings[gram].append((index, weight))
+
+    def _expand(self, template):
+        slots = set(PLACEHOLDER.findall(template))
+        texts = [template]
+        for slot in slots & set(self.entities):
+            names = self.entities[slot][:self.max_expansions]
+            texts = [text.replace(f"{{{slot}}}", name) for text in texts for name in names]
+        # Free-text slots are dropped: unknown words never count, so they shouldn't be learnt
+        return [" ".join(PLACEHOLDER.sub(" ", text).split()) for text in texts]
+
+    def _vector(self, counts):
+        """Unit-length TF-IDF vector of the grams seen in training; unseen ones are ignored."""
+        vector = {gram: (1 + math.log(count)) * self.idf[gram] for gram, count in counts.items() if gram in self.idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {gram: weight / norm for gram, weight in vector.items()} if norm else {}
+
+    def predict(self, text):
+        """Prediction for the nearest example, with slots left empty."""
+        scores = defaultdict(float)
+        for gram, weight in self._vector(features(tokenize(text))).items():
+            for index, example_weight in self._postings[gram]:
+                scores[index] += weight * example_weight
+        if not scores:
+            return Prediction(CHAT, 0.0, {})
+        index = max(scores, key=scores.get)
+        return Prediction(self.labels[index], scores[index], {})
+
+    def classify(self, text):
+        """A built-in action's Prediction with its slots, or None for ChatGPT."""
+        prediction = self.predict(text)
+        if prediction.intent == CHAT or prediction.intent not in self.slots:
+            return None
+        if prediction.confidence < max(self.threshold, self.thresholds.get(prediction.intent, 0.0)):
+            return None
+        slots = self.fill_slots(prediction.intent, text)
+        if slots is None:
+            fallback = MISSING_SLOT_FALLBACK.get(prediction.intent)
+            return Prediction(fallback, prediction.confidence, {}) if fallback else None
+        return prediction._replace(slots=slots)
+
+    def fill_slots(self, intent, text):
+        """Slot values for intent taken from text, or None if a slot stays empty."""
+        text = " ".join(tokenize(text))
+        values = {}
+        for slot in self.slots[intent]:
+            pattern = self._entity_patterns.get(slot)
+            if pattern is None:
+                continue
+            m = pattern.search(text)
+            if m is None:
+                return None
+            values[slot] = m.group(1)
+            text = (text[:m.start()] + " " + text[m.end():]).strip()
+        free = [slot for slot in self.slots[intent] if slot not in values]
+        if free:
+            words = text.split()
+            trim = self.carrier.get(intent, set()) | POLITENESS
+            while words and words[0] in trim:
+                words.pop(0)
+            while words and words[-1] in trim:
+                words.pop()
+            if not words or QUESTION_WORDS.intersection(words):
+                return None
+            values[free[0]] = " ".join(words)
+        return values
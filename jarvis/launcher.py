@@ -0,0 +1,128 @@
+"""Detached application launching with a registry of what Jarvis started."""
+import os
+import platform
+import signal
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+
+from jarvis.apps import compact_name
+
+LaunchedApp = namedtuple("LaunchedApp", ["name", "pid", "argv", "started", "process"])
+
+
+class AppLauncher:
+    """Start apps without waiting for them and keep track of the ones still running.
+
+    Processes are spawned in their own session (or process group on Windows)
+    so they outlive Jarvis and never block the caller. A reaper thread polls
+    them so exited children do not linger as zombies.
+    """
+    def __init__(self, system=None, reap_interval=2.0, keep_times=1000):
+        self.system = (system or platform.system()).lower()
+        self.reap_interval = reap_interval
+        self.launched = 0
+        self.reaped = 0
+        self.launch_times = deque(maxlen=keep_times)  # the most recent ones
+        self._apps = {}  # pid -> LaunchedApp
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper = None
+
+    def launch(self, name, argv):
+        """Spawn argv detached and register it under name; returns the LaunchedApp."""
+        kwargs = {
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.DEVNULL,
+            "close_fds": True,
+        }
+        if self.system == "windows":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, **kwargs)
+        elapsed = time.perf_counter() - start
+        app = LaunchedApp(name, process.pid, list(argv), time.time(), process)
+        with self._lock:
+            self._apps[process.pid] = app
+            self.launched += 1
+            self.launch_times.append(elapsed)
+        print(f"Launched {name} (pid {process.pid}) in {elapsed * 1000:.1f} ms")
+        return app
+
+    def start_file(self, target):
+        """Open a file or URI with its Windows handler; such launches are not tracked."""
+        os.startfile(target)
+
+    def running(self):
+        """Return the launched apps that are still alive."""
+        self.reap()
+        with self._lock:
+            return list(self._apps.values())
+
+    def close(self, name):
+        """Terminate every tracked app launched under name; returns how many were closed."""
+        wanted = compact_name(name)
+        with self._lock:
+            matches = [app for app in self._apps.values() if compact_name(app.name) == wanted]
+        closed = 0
+        for app in matches:
+            if app.process.poll() is not None:
+                continue
+            try:
+                if self.system == "windows":
+                    app.process.terminate()
+                else:
+                    # The app leads its own session, so take its children with it
+                    os.killpg(app.pid, signal.SIGTERM)
+                closed += 1
+            except (ProcessLookupError, PermissionError, OSError) as e:
+                print(f"Error closing {app.name}: {e}")
+        if not closed and self.system == "darwin":
+            # "open -a" hands the app to launchd, so ask it to quit by name instead.
+            # The name is passed as an argument, never spliced into the script.
+            result = subprocess.run(
+                ["osascript", "-e", "on run argv", "-e", "quit app (item 1 of argv)", "-e", "end run", name],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            closed = int(result.returncode == 0)
+        self.reap()
+        return closed
+
+    def reap(self):
+        """Collect exited children; returns how many were removed."""
+        with self._lock:
+            exited = [pid for pid, app in self._apps.items() if app.process.poll() is not None]
+            for pid in exited:
+                del self._apps[pid]
+            self.reaped += len(exited)
+        return len(exited)
+
+    def start_reaper(self):
+        """Reap exited children every reap_interval seconds on a daemon thread."""
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name="jarvis-reaper", daemon=True)
+            self._reaper.start()
+        return self._reaper
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        """Launch counters and mean launch latency."""
+        with self._lock:
+            times = list(self.launch_times)
+            running = len(self._apps)
+        return {
+            "launched": self.launched,
+            "running": running,
+            "reaped": self.reaped,
+            "mean_launch_ms": sum(times) / len(times) * 1000 if times else 0.0,
+        }
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.reap_interval):
+            self.reap()
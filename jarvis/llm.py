@@ -0,0 +1,317 @@
+"""Resilient ChatGPT client: pooled connections, deadlines, retries, a circuit breaker and hedging."""
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+# Worth another try: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+    def __init__(self, retry_in):
+        super().__init__(f"circuit open; retrying in {retry_in:.1f} s")
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    """The request's overall deadline passed before an answer arrived."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing service for a while.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are refused for reset_timeout seconds. Then one trial call is let through
+    (half-open); its outcome closes the circuit or opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go out now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+
+class PrimedStream:
+    """A streamed response whose first chunk has already been read.
+
+    Reading the first chunk inside the request attempt means a failure before
+    any token arrives can still be retried or hedged.
+    """
+    def __init__(self, stream, iterator, first):
+        self._stream = stream
+        self._iterator = iterator
+        self._first = first
+
+    def __iter__(self):
+        if self._first is not None:
+            first, self._first = self._first, None
+            yield first
+        yield from self._iterator
+
+    def close(self):
+        self._stream.close()
+
+
+def status_of(error):
+    return getattr(error, "status_code", None)
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, from retry-after-ms or retry-after, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def describe_error(error):
+    """A short sentence for the user about why ChatGPT did not answer."""
+    name = type(error).__name__
+    status = status_of(error)
+    if isinstance(error, CircuitOpenError):
+        return "ChatGPT isn't responding at the moment, so I'm giving it a short break. Please try again shortly."
+    if isinstance(error, DeadlineExceeded) or name == "APITimeoutError":
+        return "ChatGPT took too long to answer. Please try again."
+    if status == 429:
+        return "ChatGPT is busy right now. Please try again in a moment."
+    if status in (401, 403):
+        return "ChatGPT rejected the API key. Please check OPENAI_API_KEY."
+    if status is not None and status >= 500:
+        return "ChatGPT is having problems right now. Please try again later."
+    if name == "APIConnectionError":
+        return "I couldn't reach ChatGPT. Please check the internet connection."
+    return f"I encountered an error: {error}"
+
+
+class ResilientClient:
+    """OpenAI chat completions with per-request deadlines, retries, a circuit breaker and hedging.
+
+    Connections are kept alive in the SDK's pooled HTTP client. Each attempt gets
+    timeout seconds and all attempts share one deadline. Retryable failures
+    back off exponentially with full jitter, honouring Retry-After. If
+    hedge_model is set and the first attempt has not produced anything after
+    hedge_after seconds, the same request goes to hedge_model as well and the
+    first answer wins. It exposes chat.completions.create() like the openai
+    client, so JarvisEngine can take either.
+    """
+    def __init__(self, api_key=None, base_url=None, timeout=20.0, deadline=30.0, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, hedge_model=None, hedge_after=1.5, breaker=None,
+                 client=None):
+        import openai
+        self._openai = openai
+        self._http = None
+        if client is None:
+            # The SDK's own HTTP client class, so this works whichever httpx package it was built on;
+            # it keeps up to 100 idle connections alive
+            self._http = openai.DefaultHttpxClient(timeout=timeout)
+            # Retries are ours, so the SDK's own are off
+            client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=self._http,
+                                   max_retries=0, timeout=timeout)
+        self.client = client
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_model = hedge_model
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.counts = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0, "rejected": 0,
+                       "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="jarvis-llm")
+
+    def create(self, deadline=None, **kwargs):
+        """chat.completions.create() with the resilience policy; deadline overrides the default."""
+        self._count("requests")
+        deadline = self.deadline if deadline is None else deadline
+        expires = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"no answer within {deadline:.1f} s")
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError(self.breaker.retry_in())
+            try:
+                result = self._attempt(kwargs, min(self.timeout, remaining))
+            except Exception as e:
+                if not self.retryable(e):
+                    # The service answered, it just refused this request
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._count("failures")
+                attempt += 1
+                delay = self._delay(attempt, e)
+                if attempt > self.max_retries or time.monotonic() + delay >= expires:
+                    raise
+                self._count("retries")
+                print(f"ChatGPT request failed ({type(e).__name__}); retry {attempt} in {delay:.2f} s")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def warm(self):
+        """Open a pooled connection ahead of the first request, so it skips the TCP and TLS handshakes."""
+        if self._http is None:
+            return
+        try:
+            self._http.head(str(self.client.base_url), timeout=self.timeout)
+        except Exception as e:
+            print(f"Could not pre-warm the ChatGPT connection: {e}")
+
+    def retryable(self, error):
+        if isinstance(error, (self._openai.APIConnectionError, DeadlineExceeded)):
+            return True
+        status = status_of(error)
+        return status in RETRYABLE_STATUS
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts["circuit"] = self.breaker.state
+        counts["circuit_opened"] = self.breaker.opened
+        return counts
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.client.close()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _delay(self, attempt, error):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        requested = retry_after(error)
+        return max(delay, requested) if requested is not None else delay
+
+    def _attempt(self, kwargs, timeout):
+        if self.hedge_model and self.hedge_after is not None and kwargs.get("model") != self.hedge_model:
+            return self._hedged(kwargs, timeout)
+        return self._call(kwargs, timeout)
+
+    def _call(self, kwargs, timeout):
+        self._count("attempts")
+        response = self.client.chat.completions.create(timeout=timeout, **kwargs)
+        if not kwargs.get("stream"):
+            return response
+        iterator = iter(response)
+        try:
+            first = next(iterator, None)
+        except BaseException:
+            response.close()
+            raise
+        return PrimedStream(response, iterator, first)
+
+    def _hedged(self, kwargs, timeout):
+        primary = self._pool.submit(self._call, kwargs, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        # The primary is slow: race the same request on the fallback model
+        self._count("hedges")
+        hedge = self._pool.submit(self._call, dict(kwargs, model=self.hedge_model),
+                                  max(0.1, timeout - self.hedge_after))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if future is hedge:
+                    self._count("hedge_wins")
+                for loser in pending:
+                    loser.add_done_callback(self._discard)
+                return result
+        raise error
+
+    @staticmethod
+    def _discard(future):
+        """Close the losing stream of a hedged pair once it arrives."""
+        if not future.cancelled() and future.exception() is None:
+            result = future.result()
+            if isinstance(result, PrimedStream):
+                result.close()
+
+
+def client_from_env():
+    """ResilientClient configured by OPENAI_API_KEY, OPENAI_BASE_URL and the JARVIS_LLM_* variables."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
+    return ResilientClient(
+        api_key=api_key,
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        timeout=float(os.getenv("JARVIS_LLM_TIMEOUT", "20")),
+        deadline=float(os.getenv("JARVIS_LLM_DEADLINE", "30")),
+        max_retries=int(os.getenv("JARVIS_LLM_RETRIES", "3")),
+        hedge_model=os.getenv("JARVIS_HEDGE_MODEL") or None,
+        hedge_after=float(os.getenv("JARVIS_HEDGE_AFTER", "1.5")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("JARVIS_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("JARVIS_BREAKER_RESET", "30"))
+        )
+    )
@@ -0,0 +1,192 @@
+"""Conversation history for ChatGPT, trimmed to a token budget and kept per session."""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+
+# Session ids name files, so they are kept to characters that can't leave the session directory
+SESSION_ID = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def default_session_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "jarvis", "sessions")
+
+
+class Tokenizer:
+    """Counts tokens with tiktoken when it is installed, otherwise estimates ~4 characters per token."""
+    def __init__(self, model="gpt-4o-mini"):
+        self.model = model
+        self.exact = False
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # tiktoken is slow to import and may fetch its tables, so wait for the first count
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+                self.exact = True
+            except ImportError:
+                pass
+            self._loaded = True
+
+    def count(self, text):
+        if not self._loaded:
+            self._load()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return math.ceil(len(text) / 4)
+
+    def count_messages(self, messages):
+        # Each message carries a few tokens of role/separator overhead
+        return sum(self.count(m["content"]) + 4 for m in messages) + 2
+
+
+def extractive_summary(summary, turns, max_tokens=400):
+    """Fold turns into the summary without a model call: keep the start of each exchange."""
+    lines = [summary] if summary else []
+    for turn in turns:
+        lines.append(f"User asked: {turn['user'][:120]} | Jarvis answered: {turn['assistant'][:160]}")
+    text = "\n".join(lines)
+    return text[-max_tokens * 4:]  # newest material wins when it overflows
+
+
+class ConversationMemory:
+    """Rolling chat history kept within a token budget.
+
+    When the history outgrows the budget, the oldest turns are folded into a
+    running summary (by summarize(summary, turns, max_tokens), falling back
+    to an extractive summary) rather than being dropped, so requests stay roughly
+    constant in size however long the session runs.
+    """
+    def __init__(self, session_id="default", budget=1500, keep_recent=2, directory=None,
+                 summarize=None, tokenizer=None):
+        if not SESSION_ID.fullmatch(session_id):
+            raise ValueError(f"invalid session id {session_id!r}: use letters, digits, '_' and '-'")
+        self.session_id = session_id
+        self.budget = budget
+        self.summary_budget = budget // 4
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.tokenizer = tokenizer or Tokenizer()
+        self.path = os.path.join(directory or default_session_dir(), f"{session_id}.json")
+        self.summary = ""
+        self.turns = []
+        self.last_prompt_tokens = 0
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._generation = 0  # bumped by clear()
+        self._load()
+
+    def build_messages(self, system_prompt, prompt):
+        """Messages for the next request: system prompt, summary, recent turns, then the prompt."""
+        with self._lock:
+            messages = [{"role": "system", "content": system_prompt}]
+            if self.summary:
+                messages.append({"role": "system", "content": f"Earlier in this conversation: {self.summary}"})
+            for turn in self.turns:
+                messages.append({"role": "user", "content": turn["user"]})
+                messages.append({"role": "assistant", "content": turn["assistant"]})
+        messages.append({"role": "user", "content": prompt})
+        self.last_prompt_tokens = self.tokenizer.count_messages(messages)
+        return messages
+
+    def digest(self, recent=None):
+        """Short hash of the context, for keying cached answers; only the last recent turns if given."""
+        with self._lock:
+            raw = json.dumps([self.summary, self.turns] if recent is None else self.turns[-recent:])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def add_turn(self, prompt, response):
+        """Record an exchange; compaction runs in the background if the budget is exceeded."""
+        with self._lock:
+            self.turns.append({"user": prompt, "assistant": response})
+            over_budget = self._history_tokens() > self.budget
+            self._save()
+        if over_budget:
+            threading.Thread(target=self.compact, name="jarvis-memory", daemon=True).start()
+
+    def compact(self):
+        """Summarize the oldest turns until the history fits the budget."""
+        with self._lock:
+            if self._compacting:
+                return
+            # Leave room for the summary the folded turns turn into
+            count = 0
+            remaining = self._turn_tokens()
+            while remaining > self.budget - self.summary_budget and len(self.turns) - count > self.keep_recent:
+                turn = self.turns[count]
+                remaining -= self.tokenizer.count(turn["user"]) + self.tokenizer.count(turn["assistant"]) + 8
+                count += 1
+            if not count:
+                return
+            self._compacting = True
+            summary, folded, generation = self.summary, self.turns[:count], self._generation
+        try:
+            # The turns stay in the context until their summary is ready
+            new_summary = None
+            if self.summarize is not None:
+                try:
+                    new_summary = self.summarize(summary, folded, self.summary_budget)
+                except Exception as e:
+                    print(f"Could not summarize conversation: {e}")
+            with self._lock:
+                if generation != self._generation:
+                    return  # cleared while summarizing
+                self.summary = new_summary or extractive_summary(summary, folded, self.summary_budget)
+                del self.turns[:count]
+                self._save()
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns = []
+            self._generation += 1
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "turns": len(self.turns),
+                "summary_tokens": self.tokenizer.count(self.summary),
+                "history_tokens": self._history_tokens(),
+                "last_prompt_tokens": self.last_prompt_tokens,
+            }
+
+    def _history_tokens(self):
+        return self.tokenizer.count(self.summary) + self._turn_tokens()
+
+    def _turn_tokens(self):
+        return sum(self.tokenizer.count(t["user"]) + self.tokenizer.count(t["assistant"]) + 8 for t in self.turns)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.summary = data.get("summary", "")
+            self.turns = data.get("turns", [])
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"summary": self.summary, "turns": self.turns}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save conversation: {e}")
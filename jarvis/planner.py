@@ -0,0 +1,268 @@
+"""Compound commands: split an utterance into steps, order them by dependency and run them in parallel.
+
+"Open github and search google for pyqt threads and play lo-fi" is three
+independent actions; they run at once and the responses are joined. Every
+question for ChatGPT in one utterance goes out as a single request.
+"""
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# A step of a plan: route is None for a question to ChatGPT; after lists the
+# indexes of the steps that must finish first
+Step = namedtuple("Step", ["index", "text", "route", "after"])
+
+# Conjunctions that may join two commands; "then" also orders them
+SEPARATOR = re.compile(r"\s*(?:;|,)\s*(?:and\s+)?(?:then\s+)?|\s+and\s+then\s+|\s+then\s+|\s+and\s+|\s+also\s+")
+QUESTION_START = re.compile(
+    r"(?:what|what's|whats|who|who's|how|why|when|where|which|is|are|can|could|do|does|should|will|"
+    r"tell|explain|give|write|describe|summarize|translate|recommend)\b"
+)
+# A slot like this refers back to something else in the sentence, not to an app or song
+PRONOUNS = {"it", "that", "this", "them", "those", "these", "one"}
+# A question with one of these is about the clause before it, as in "tell me a joke and explain it"
+REFERS_BACK = PRONOUNS | {"its", "they", "their", "there", "he", "him", "his", "she", "her"}
+WORD = re.compile(r"[\w']+")
+# Intents whose verb carries over, so "open calculator and notepad" opens both
+CARRIED_VERBS = {"open_app": "open", "website": "open", "close_app": "close"}
+# Intents that act on launched apps and the ones that report on them
+APP_CHANGES = {"open_app", "close_app"}
+BATCH_PROMPT = "Answer each of these in turn, briefly and in order:\n{}"
+
+
+class CommandPlanner:
+    """Plans and runs compound commands for a JarvisEngine.
+
+    plan() returns None for anything that is a single command, so ordinary
+    commands take the engine's usual path. Steps with no dependencies
+    between them run concurrently on a shared pool; ChatGPT questions that
+    are not separated by a conversation reset are batched into one request.
+    """
+    def __init__(self, engine, max_workers=4):
+        self.engine = engine
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jarvis-plan")
+
+    def plan(self, command):
+        """The steps of a compound command, or None if it is just one command."""
+        pieces = SEPARATOR.split(command)
+        if len(pieces) < 2:
+            return None
+        separators = SEPARATOR.findall(command)
+        clauses = []  # [text, route, ordered after the previous clause]
+        for piece, separator in zip(pieces, [""] + separators):
+            piece = piece.strip()
+            route = self._route(piece) if piece else False
+            if route is None and clauses and REFERS_BACK.intersection(WORD.findall(piece)):
+                # Not a question of its own, so it is asked together with the clause before
+                route = False
+            if route is False and piece and clauses and clauses[-1][1]:
+                # "open calculator and notepad": the verb carries over
+                carried = self._carry_verb(clauses[-1][1], piece)
+                if carried is not None:
+                    piece, route = carried
+            if route and clauses and clauses[-1][1]:
+                # "search for cats and dogs on youtube" is one search that the split only seemed to complete
+                joined = self.engine.router.match(f"{clauses[-1][0]}{separator}{piece}")
+                if joined is not None and joined.intent.name != clauses[-1][1].intent.name:
+                    route = False
+            if not clauses or route is False or clauses[-1][1] is False:
+                if clauses:
+                    # Not a command of its own, e.g. "salt and pepper": glue it back on
+                    clauses[-1][0] = f"{clauses[-1][0]}{separator}{piece}"
+                    clauses[-1][1] = self._route(clauses[-1][0])
+                else:
+                    clauses.append([piece, route, False])
+                continue
+            clauses.append([piece, route, "then" in separator])
+        if len(clauses) < 2 or any(route is False for _, route, _ in clauses):
+            return None
+        return self._order(clauses)
+
+    def _carry_verb(self, previous, piece):
+        """(text, route) for piece with previous's verb added, if piece is just a known app or site.
+
+        Anything else, such as "close it" or "stretch", is left alone rather
+        than turned into "open close it".
+        """
+        verb = CARRIED_VERBS.get(previous.intent.name)
+        if verb is None or QUESTION_START.match(piece) or PRONOUNS.intersection(piece.split()):
+            return None
+        text = f"{verb} {piece}"
+        route = self.engine.router.match(text)
+        if route is None or route.intent.name not in CARRIED_VERBS:
+            return None
+        if "app_name" in route.slots and not self.engine.knows_app(route.slots["app_name"]):
+            return None
+        return text, route
+
+    def _route(self, text):
+        """Route for text, None for a question, False if it is not a command by itself."""
+        route = self.engine.router.match(text)
+        if route is None:
+            route = self.engine.classify(text)
+        if route is not None:
+            if any(value in PRONOUNS for value in route.slots.values()):
+                return False
+            return route
+        return None if QUESTION_START.match(text) else False
+
+    def _order(self, clauses):
+        """Turn clauses into Steps with the dependencies between them."""
+        steps = []
+        for index, (text, route, then) in enumerate(clauses):
+            after = set()
+            if then and index:
+                after.add(index - 1)
+            name = route.intent.name if route is not None else None
+            for earlier in steps:
+                earlier_name = earlier.route.intent.name if earlier.route is not None else None
+                if name in APP_CHANGES and earlier_name in APP_CHANGES \
+                        and route.slots.get("app_name") == earlier.route.slots.get("app_name"):
+                    after.add(earlier.index)  # close what was just opened, in order
+                elif name == "running_apps" and earlier_name in APP_CHANGES:
+                    after.add(earlier.index)
+                elif "new_conversation" in (name, earlier_name) and (name is None or earlier_name is None):
+                    after.add(earlier.index)  # questions stay on their side of a reset
+            steps.append(Step(index, text, route, sorted(after)))
+        return steps
+
+    def run(self, steps, on_token=None, on_sentence=None, cancel_event=None, command=None):
+        """Run a plan; returns the combined response.
+
+        Steps run in waves of those whose dependencies are done. Within a wave the
+        ChatGPT request starts with the actions, but its output is held back until
+        the actions have reported, so the response reads actions first. Batched
+        questions are remembered and cached as they were said in command.
+        """
+        output = OrderedOutput(on_token, on_sentence)
+        interaction_id = self.engine.tracer.current()
+        results = {}
+        parts = []
+        pending = list(steps)
+        while pending:
+            # Steps only wait for earlier ones, so the first pending step is always ready
+            ready = [step for step in pending if all(index in results for index in step.after)]
+            questions = [step for step in ready if step.route is None]
+            actions = [step for step in ready if step.route is not None]
+            output.hold()
+            futures = [(step, self._pool.submit(self._act, step, interaction_id)) for step in actions]
+            # Questions that are ready together become one request
+            asked = self._pool.submit(self._ask, [step.text for step in questions], output,
+                                     cancel_event, interaction_id, command) \
+                if questions else None
+            reports = []
+            for step, future in futures:
+                results[step.index] = future.result()
+                if results[step.index]:
+                    reports.append(sentence(results[step.index]))
+            output.release(" ".join(reports))
+            parts.extend(reports)
+            if asked is not None:
+                answer = asked.result()
+                if answer:
+                    parts.append(answer)
+                for step in questions:
+                    results[step.index] = answer
+            pending = [step for step in pending if step.index not in results]
+        return " ".join(parts)
+
+    def _act(self, step, interaction_id):
+        with self.engine.tracer.interaction(interaction_id), self.engine.tracer.span("action"):
+            return step.route.intent.handler(**step.route.slots)
+
+    def _ask(self, questions, output, cancel_event, interaction_id, command=None):
+        prompt = questions[0] if len(questions) == 1 else \
+            BATCH_PROMPT.format("\n".join(f"{n}. {q}" for n, q in enumerate(questions, 1)))
+        said = spoken(command, questions) if len(questions) > 1 else None
+        output.boundary()
+        with self.engine.tracer.interaction(interaction_id), self.engine.tracer.span("llm"):
+            if self.engine.stream_responses and output.on_token is not None:
+                return self.engine.stream_chatbot_response(prompt, on_token=output.token, on_sentence=output.sentence,
+                                                           cancel_event=cancel_event, said=said)
+            answer = self.engine.get_chatbot_response(prompt, said=said)
+        output.sentence(answer)
+        return answer
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class OrderedOutput:
+    """Passes tokens and sentences on, holding them back while earlier output is still due."""
+    def __init__(self, on_token=None, on_sentence=None):
+        self.on_token = on_token
+        self.on_sentence = on_sentence
+        self._held = []
+        self._holding = False
+        self._emitted = False
+        self._separate = False  # whether the next token needs a space before it
+        self._lock = threading.Lock()
+
+    def hold(self):
+        with self._lock:
+            self._holding = True
+
+    def release(self, text):
+        """Emit text, then whatever was held back, and stop holding."""
+        with self._lock:
+            if text:
+                self._part(text)
+            for kind, value in self._held:
+                self._emit(kind, value)
+            self._held = []
+            self._holding = False
+
+    def token(self, token):
+        self._pass("token", token)
+
+    def sentence(self, text):
+        self._pass("sentence", text)
+
+    def boundary(self):
+        """A new part starts with the next token."""
+        self._pass("boundary", None)
+
+    def _pass(self, kind, value):
+        with self._lock:
+            if self._holding:
+                self._held.append((kind, value))
+            else:
+                self._emit(kind, value)
+
+    def _emit(self, kind, value):
+        if kind == "boundary":
+            self._separate = self._emitted
+            return
+        if kind == "sentence":
+            if self.on_sentence:
+                self.on_sentence(value)
+            return
+        if self._separate and not value[:1].isspace():
+            value = " " + value  # keeps the parts apart, as in the final response
+        self._separate = False
+        self._emitted = True
+        if self.on_token:
+            self.on_token(value)
+
+    def _part(self, text):
+        """Emit a whole part, apart from whatever comes before and after it."""
+        self._separate = self._emitted
+        self._emit("token", text)
+        self._emit("sentence", text)
+        self._separate = True
+
+
+def spoken(command, questions):
+    """The questions as the user said them: command from the first to the end of the last."""
+    start = command.find(questions[0]) if command else -1
+    end = command.find(questions[-1], start) if start >= 0 else -1
+    if end < 0:
+        return " and ".join(questions)
+    return command[start:end + len(questions[-1])]
+
+
+def sentence(text):
+    """text ending in a full stop, so responses read as one paragraph when joined."""
+    text = text.strip()
+    return text if text.endswith((".", "!", "?")) else f"{text}."
@@ -0,0 +1,261 @@
+"""Websites, search platforms, apps and custom intents loaded from TOML or YAML, with hot reload.
+
+The built-in entries live in jarvis/commands.toml. User files listed in
+JARVIS_CONFIG (separated by os.pathsep), or ~/.config/jarvis/commands.toml
+(.yaml/.yml also work when PyYAML is installed), are merged over them.
+RegistryWatcher polls the files and hands each new Registry to a callback,
+which swaps it in without touching commands already running.
+"""
+import importlib
+import os
+import re
+import string
+import threading
+import time
+import tomllib
+from collections import namedtuple
+from urllib.parse import quote_plus
+
+from jarvis.router import literal_alternation
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commands.toml")
+USER_CONFIG_NAMES = ("commands.toml", "commands.yaml", "commands.yml")
+
+IntentSpec = namedtuple("IntentSpec", ["name", "pattern", "kind", "options", "slots", "examples", "source"])
+
+# Option each kind of custom intent needs
+INTENT_KINDS = {"url": "url", "reply": "response", "launch": "app", "plugin": "handler"}
+
+
+def user_config_dir():
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "jarvis")
+
+
+def config_paths():
+    """Config files in load order, built-in first; user files need not exist yet."""
+    configured = os.getenv("JARVIS_CONFIG")
+    if configured:
+        user = [path for path in configured.split(os.pathsep) if path]
+    else:
+        user = [os.path.join(user_config_dir(), name) for name in USER_CONFIG_NAMES]
+    return [DEFAULT_CONFIG] + user
+
+
+def read_config(path):
+    """Parse one TOML or YAML file into a dict."""
+    if path.endswith((".yaml", ".yml")):
+        import yaml  # only needed for YAML configs
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    else:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("expected a table of sections")
+    return data
+
+
+def template_fields(template):
+    """Fields of a str.format template; "" stands for a positional {}."""
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+
+
+class Registry:
+    """Merged, validated configuration with the indexes routing needs precompiled.
+
+    Later files override earlier ones entry by entry, and false removes an
+    inherited website, platform or app. A bad file raises ValueError naming
+    it, so a reload can keep the registry it had.
+    """
+    def __init__(self, websites=None, search_platforms=None, apps=None, intents=(), sources=()):
+        self.websites = dict(websites or {})
+        self.search_platforms = dict(search_platforms or {})  # name -> (url template, response template)
+        self.apps = dict(apps or {})  # name -> {system: target}
+        self.intents = list(intents)
+        self.sources = tuple(sources)
+        self.site_pattern = literal_alternation(self.websites)
+        self.platform_pattern = literal_alternation(self.search_platforms)
+        self.app_aliases = {name: list(targets.values()) for name, targets in self.apps.items()}
+        self.plugins = {spec.name: load_plugin(spec) for spec in self.intents if spec.kind == "plugin"}
+
+    @classmethod
+    def load(cls, paths=None):
+        """Read and merge the config files that exist, in order."""
+        websites, platforms, apps, intents, sources = {}, {}, {}, {}, []
+        for path in config_paths() if paths is None else paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                data = read_config(path)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+            merge(websites, data.get("websites", {}), path, "websites", parse_website)
+            merge(platforms, data.get("search_platforms", {}), path, "search_platforms", parse_platform)
+            merge(apps, data.get("apps", {}), path, "apps", parse_app)
+            for entry in data.get("intents", []):
+                spec = parse_intent(entry, path)
+                intents.pop(spec.name, None)
+                intents[spec.name] = spec
+            sources.append(path)
+        return cls(websites, platforms, apps, intents.values(), sources)
+
+    def entities(self):
+        """Slot gazetteers for the intent classifier."""
+        return {"site": list(self.websites), "platform": list(self.search_platforms)}
+
+    def handler(self, spec, engine):
+        """Callable that runs a custom intent's slots through engine."""
+        options = spec.options
+
+        def handle(**slots):
+            if spec.kind == "url":
+                engine.open_url(options["url"].format(**{k: quote_plus(v) for k, v in slots.items()}))
+                response = options.get("response")
+                return response.format(**slots) if response else f"Opening {spec.name}"
+            if spec.kind == "reply":
+                return options["response"].format(**slots)
+            if spec.kind == "launch":
+                return engine.open_desktop_app(options["app"].format(**slots))
+            return self.plugins[spec.name](engine, **slots)
+        return handle
+
+
+def merge(target, section, path, name, parse):
+    if not isinstance(section, dict):
+        raise ValueError(f"{path}: [{name}] must be a table")
+    for key, value in section.items():
+        key = " ".join(str(key).lower().split())
+        if value is False:
+            target.pop(key, None)
+        else:
+            target[key] = parse(key, value, path)
+
+
+def parse_website(name, value, path):
+    if not isinstance(value, str):
+        raise ValueError(f"{path}: website {name!r} must be a URL")
+    return value
+
+
+def parse_platform(name, value, path):
+    if isinstance(value, str):
+        value = {"url": value}
+    if not isinstance(value, dict) or "{}" not in str(value.get("url", "")):
+        raise ValueError(f"{path}: search platform {name!r} needs a url containing {{}}")
+    return value["url"], value.get("response", f"Searching for {{}} on {name.title()}")
+
+
+def parse_app(name, value, path):
+    if isinstance(value, str):
+        value = {system: value for system in ("windows", "darwin", "linux")}
+    if not isinstance(value, dict) or not all(isinstance(v, str) for v in value.values()):
+        raise ValueError(f"{path}: app {name!r} must map systems (windows, darwin, linux) to targets")
+    return {system.lower(): target for system, target in value.items()}
+
+
+def parse_intent(entry, path):
+    if not isinstance(entry, dict) or not entry.get("name") or not entry.get("pattern"):
+        raise ValueError(f"{path}: every [[intents]] entry needs a name and a pattern")
+    name = str(entry["name"])
+    try:
+        pattern = re.compile(entry["pattern"])
+    except re.error as e:
+        raise ValueError(f"{path}: intent {name!r} has a bad pattern: {e}") from None
+    if pattern.groups != len(pattern.groupindex):
+        raise ValueError(f"{path}: intent {name!r} may only use named groups; use (?:...) for grouping")
+    kind = entry.get("kind", "reply")
+    if kind not in INTENT_KINDS:
+        raise ValueError(f"{path}: intent {name!r} has unknown kind {kind!r}; use one of {', '.join(INTENT_KINDS)}")
+    required = INTENT_KINDS[kind]
+    if not isinstance(entry.get(required), str):
+        raise ValueError(f"{path}: {kind} intent {name!r} needs {required}")
+    slots = tuple(pattern.groupindex)
+    for option in ("url", "response", "app"):
+        try:
+            fields = template_fields(entry.get(option, ""))
+        except ValueError as e:
+            raise ValueError(f"{path}: intent {name!r} has a bad {option}: {e}") from None
+        if any(field == "" or field.isdigit() for field in fields):
+            raise ValueError(f"{path}: intent {name!r} has a positional field in {option}; "
+                             f"name the group instead, e.g. {{city}}")
+        unknown = fields - set(slots)
+        if unknown:
+            raise ValueError(f"{path}: intent {name!r} uses {', '.join(sorted(unknown))} in {option} "
+                             f"but its pattern has no such group")
+    examples = list(entry.get("examples", []))
+    if examples and len(slots) > 1:
+        raise ValueError(f"{path}: intent {name!r} has examples but more than one slot")
+    options = {key: entry[key] for key in ("url", "response", "app", "handler") if key in entry}
+    return IntentSpec(name, entry["pattern"], kind, options, slots, examples, path)
+
+
+def load_plugin(spec):
+    module_name, _, function_name = spec.options["handler"].partition(":")
+    try:
+        function = getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ValueError(f"{spec.source}: intent {spec.name!r} handler {spec.options['handler']!r}: {e}") from None
+    if not callable(function):
+        raise ValueError(f"{spec.source}: intent {spec.name!r} handler is not callable")
+    return function
+
+
+class RegistryWatcher:
+    """Polls the config files and reloads the registry when one changes.
+
+    on_reload(registry) gets each successfully loaded registry; a file that
+    fails to load is reported and the current registry stays in place.
+    """
+    def __init__(self, on_reload, paths=None, interval=1.0):
+        self.on_reload = on_reload
+        self.paths = config_paths() if paths is None else list(paths)
+        self.interval = interval
+        self.reloads = 0
+        self.last_reload_ms = 0.0
+        self._mtimes = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="jarvis-config-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Reload if a file changed since the last check; returns the new registry or None."""
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return None
+        self._mtimes = mtimes
+        return self.reload()
+
+    def reload(self):
+        start = time.perf_counter()
+        try:
+            registry = Registry.load(self.paths)
+            self.on_reload(registry)
+        except Exception as e:
+            print(f"Config not reloaded, keeping the current commands: {e}")
+            return None
+        self.reloads += 1
+        self.last_reload_ms = (time.perf_counter() - start) * 1000
+        print(f"Reloaded commands from {', '.join(registry.sources)} in {self.last_reload_ms:.1f} ms")
+        return registry
+
+    def _stat(self):
+        mtimes = {}
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                mtimes[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
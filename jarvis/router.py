@@ -0,0 +1,131 @@
+"""Declarative command router compiled into combined regular expressions."""
+import re
+from collections import namedtuple
+
+Intent = namedtuple("Intent", ["name", "pattern", "handler", "keywords"], defaults=((),))
+Route = namedtuple("Route", ["intent", "slots"])
+
+# Matches the opening of a named group, e.g. "(?P<song>"
+NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+
+
+def literal_alternation(names):
+    """Regex matching any of the literal names, factored into a prefix trie.
+
+    A flat alternation is tried name by name at every position; the trie
+    branches on one character at a time, so thousands of names cost about as
+    much as a handful. Optional tails are greedy, so the longest name wins.
+    """
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_pattern(trie) or "(?!)"
+
+
+def _trie_pattern(node):
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" not in node:
+        return body
+    # A name ends here, and longer ones continue
+    return (body if len(branches) > 1 else f"(?:{body})") + "?"
+
+
+class CommandRouter:
+    """Registry of intents dispatched through one combined, precompiled pattern.
+
+    Each intent is a regular expression anchored at the start of the command;
+    its named groups become the slots passed to the handler. Intents are tried
+    in registration order, so earlier ones win when several could match. Use
+    (?:...) for plain grouping: numbered groups and backreferences are not
+    supported because patterns are renumbered when they are combined.
+
+    An intent registered with keywords is left out of the combined pattern
+    unless one of them occurs in the command. Patterns that have to scan the
+    command (".*?\\bsearch\\b") then cost nothing on the many commands that
+    can't match them, and the rest fail on their first characters. One
+    pattern is compiled per set of keywords present, on first use.
+    """
+    def __init__(self):
+        self._intents = []
+        self._keywords = ()  # every intent's keywords
+        self._patterns = {}  # keywords present -> (pattern, routes)
+
+    def register(self, name, pattern, handler, keywords=()):
+        """Add an intent; the router is recompiled on the next match."""
+        re.compile(pattern)  # fail early on a bad pattern
+        self._intents.append(Intent(name, pattern, handler, tuple(keywords)))
+        self._patterns = {}
+
+    def intent(self, name, pattern):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(name, pattern, handler)
+            return handler
+        return decorator
+
+    @property
+    def intents(self):
+        return list(self._intents)
+
+    def intent_named(self, name):
+        """The registered intent called name, or None."""
+        for intent in self._intents:
+            if intent.name == name:
+                return intent
+        return None
+
+    def compile(self):
+        """Drop the compiled patterns and build the one for commands without keywords."""
+        self._keywords = tuple({word: None for intent in self._intents for word in intent.keywords})
+        self._patterns = {}
+        return self._compile(frozenset())[0]
+
+    def _compile(self, present):
+        """Combine the intents let in by the present keywords into one alternation and index its groups."""
+        included = [(index, intent) for index, intent in enumerate(self._intents)
+                    if not intent.keywords or present.intersection(intent.keywords)]
+        parts = []
+        for index, intent in included:
+            prefix = f"i{index}_"
+            renamed = NAMED_GROUP.sub(lambda m: f"(?P<{prefix}{m.group(1)}>", intent.pattern)
+            parts.append(f"(?P<intent{index}>{renamed})")
+        pattern = re.compile("|".join(parts)) if parts else re.compile(r"(?!)")
+
+        routes = {}  # outer group index -> (intent, ((slot, group index), ...))
+        for index, intent in included:
+            prefix = f"i{index}_"
+            slots = tuple(
+                (name[len(prefix):], group)
+                for name, group in pattern.groupindex.items()
+                if name.startswith(prefix)
+            )
+            routes[pattern.groupindex[f"intent{index}"]] = (intent, slots)
+        # Another thread compiling the same set at once only repeats the work
+        self._patterns[present] = (pattern, routes)
+        return pattern, routes
+
+    def match(self, command):
+        """Return the Route for command, or None if no intent matches."""
+        if not self._patterns:
+            self.compile()
+        present = frozenset([word for word in self._keywords if word in command])
+        pattern, routes = self._patterns.get(present) or self._compile(present)
+        m = pattern.match(command)
+        if m is None:
+            return None
+        # The intent's own group encloses its slots, so it is always the last one closed
+        intent, slots = routes[m.lastindex]
+        return Route(intent, {slot: (m.group(group) or "").strip() for slot, group in slots})
+
+    def dispatch(self, command):
+        """Run the handler of the matching intent; (False, None) if nothing matched."""
+        route = self.match(command)
+        if route is None:
+            return False, None
+        return True, route.intent.handler(**route.slots)
@@ -0,0 +1,244 @@
+"""Speculative pre-dispatch: start on a command's slow parts while the user is still speaking.
+
+Streaming recognizers publish partial transcripts long before the utterance
+ends. The Speculator predicts the intent of each partial and gets ahead:
+app paths are resolved, YouTube URLs looked up, the ChatGPT connection
+opened and, once the partial has stopped changing, the ChatGPT request
+itself started. The results wait in the engine's Prefetches, keyed the way
+the handlers look them up, so work for a command that never comes is simply
+never taken and is counted as wasted.
+"""
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetches:
+    """Results of speculative work, waiting for the command that needs them."""
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, future):
+        with self._lock:
+            self._futures[key] = future
+
+    def take(self, key, timeout=None):
+        """The prefetched result for key, waiting for it if still running; None if absent or failed."""
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Speculative {key[0]} failed: {e}")
+            return None
+
+    def discard(self, key, future):
+        """Drop future if it is still waiting under key, closing its result; False if it was taken."""
+        with self._lock:
+            if self._futures.get(key) is not future:
+                return False
+            del self._futures[key]
+        future.add_done_callback(close_result)
+        return True
+
+    def __len__(self):
+        return len(self._futures)
+
+
+def close_result(future):
+    """Release an unused result, e.g. close a ChatGPT stream nobody will read."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if close is not None:
+        close()
+
+
+class Speculator:
+    """Predicts commands from partial transcripts and prefetches what they will need.
+
+    Call update() with every partial transcript, commit() with the final one
+    before dispatching it and cancel() when the utterance is dropped. Cheap
+    lookups start once a partial predicting them has held for
+    action_stable_after seconds, longer than the gap between words, so a
+    sentence still being spoken doesn't start one lookup per word. A ChatGPT
+    request waits until the partial has been stable for stable_after seconds.
+    Of each kind only the latest prediction is kept in flight; superseded
+    work is dropped. llm=False never speculates ChatGPT requests, only warms
+    the connection.
+    """
+    def __init__(self, engine, min_words=2, stable_after=0.3, llm=True, workers=2, clock=time.monotonic,
+                 action_stable_after=0.2):
+        self.engine = engine
+        self.min_words = min_words
+        self.stable_after = stable_after
+        self.action_stable_after = action_stable_after
+        self.llm = llm
+        self.clock = clock
+        self.started = Counter()
+        self.used = Counter()
+        self.wasted = Counter()
+        self.head_starts = deque(maxlen=1000)  # seconds between starting work and the final transcript
+        self._text = None
+        self._changed_at = 0.0
+        self._route = None
+        self._launched = {}  # key -> (future, started at)
+        self._committed = []  # (key, future) handed to the next command
+        self._warmed = False
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jarvis-speculate")
+
+    def update(self, partial):
+        """Predict from a partial transcript and start whatever it will need."""
+        text = " ".join(partial.lower().split())
+        now = self.clock()
+        changed = text != self._text
+        if changed:
+            # Classifying takes a while, so it is done before taking the lock
+            predicted = self._predict(text) if len(text.split()) >= self.min_words else False
+        with self._lock:
+            if text != self._text:
+                if not changed:
+                    return  # cancelled in the meantime; the next partial starts afresh
+                self._text, self._changed_at, self._route = text, now, predicted
+            route = self._route
+            if route is False:
+                return
+            if route is not None:
+                self._prefetch_action(route, now - self._changed_at, now)
+            else:
+                self._prefetch_chat(text, now - self._changed_at, now)
+
+    def commit(self, final):
+        """The utterance is over: keep what final needs for the engine, cancel the rest.
+
+        Returns the keys kept, so callers can tell whether speculation paid off.
+        """
+        text = " ".join(final.lower().split())
+        needed = set(self._keys(text, self._predict(text)))
+        now = self.clock()
+        with self._lock:
+            self._settle()
+            kept = []
+            for key, (future, started) in self._launched.items():
+                if key in needed:
+                    self._committed.append((key, future))
+                    self.head_starts.append(now - started)
+                    kept.append(key)
+                else:
+                    self._drop(key, future)
+            self._reset()
+        return kept
+
+    def cancel(self):
+        """The utterance was dropped: everything speculated for it is wasted."""
+        with self._lock:
+            for key, (future, _) in self._launched.items():
+                self._drop(key, future)
+            self._reset()
+
+    def stats(self):
+        with self._lock:
+            head_starts = list(self.head_starts)
+            pending = len(self._committed)
+        return {
+            "pending": pending,
+            "started": dict(self.started),
+            "used": dict(self.used),
+            "wasted": dict(self.wasted),
+            "mean_head_start_ms": sum(head_starts) / len(head_starts) * 1000 if head_starts else 0.0,
+        }
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _predict(self, text):
+        """The route the engine would take for text, or None for ChatGPT.
+
+        The app index is never waited on: before it is ready, an unknown app
+        name simply predicts ChatGPT.
+        """
+        route = self.engine.router.match(text)
+        return route if route is not None else self.engine.classify(text, wait=0)
+
+    def _keys(self, text, route):
+        """Prefetch keys the engine will look up when it runs text."""
+        if route is None:
+            return [("chat", self.engine.conversation_cache_key(text))]
+        if route.intent.name == "play":
+            return [("play", " ".join(route.slots["song"].split()))]
+        if route.intent.name == "open_app":
+            return [("app", route.slots["app_name"].lower().strip())]
+        return []
+
+    def _prefetch_action(self, route, stable_for, now):
+        if stable_for < self.action_stable_after:
+            return
+        for key in self._keys(None, route):
+            if key in self._launched:
+                continue
+            self._supersede(key[0])
+            if key[0] == "play":
+                self._launch(key, self.engine.resolve_video, key[1], now=now)
+            elif key[0] == "app":
+                self._launch(key, self.engine.resolve_app, key[1], now=now)
+
+    def _prefetch_chat(self, text, stable_for, now):
+        if not self._warmed:
+            # The connection is worth having whatever the question turns out to be
+            self._warmed = True
+            try:
+                warm = getattr(self.engine.llm, "warm", None)
+            except Exception as e:
+                print(f"Not speculating ChatGPT requests: {e}")
+                self.llm = False
+                return
+            if warm is not None:
+                self._pool.submit(warm)
+        if not (self.llm and self.engine.stream_responses) or stable_for < self.stable_after:
+            return
+        key = ("chat", self.engine.conversation_cache_key(text))
+        if key in self._launched or key in self.engine.cache:
+            return
+        self._supersede("chat")
+        self._launch(key, self.engine.open_chat_stream, text, now=now)
+
+    def _supersede(self, kind):
+        """The user went on talking: earlier work of this kind is not for the command they'll give."""
+        for old_key, (future, _) in list(self._launched.items()):
+            if old_key[0] == kind:
+                self._drop(old_key, future)
+                del self._launched[old_key]
+
+    def _launch(self, key, function, *args, now):
+        future = self._pool.submit(function, *args)
+        self.engine.prefetches.put(key, future)
+        self._launched[key] = (future, now)
+        self.started[key[0]] += 1
+
+    def _drop(self, key, future):
+        future.cancel()
+        if self.engine.prefetches.discard(key, future):
+            self.wasted[key[0]] += 1
+        else:
+            self.used[key[0]] += 1
+
+    def _settle(self):
+        """Count committed work the engine has taken as used; leftovers from the last command are wasted."""
+        for key, future in self._committed:
+            if self.engine.prefetches.discard(key, future):
+                self.wasted[key[0]] += 1
+            else:
+                self.used[key[0]] += 1
+        self._committed = []
+
+    def _reset(self):
+        self._launched = {}
+        self._text = None
+        self._route = None
+        self._warmed = False
@@ -0,0 +1,176 @@
+"""Per-stage latency tracing keyed by interaction id, with percentiles and a Chrome-trace export."""
+import atexit
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Display order for the stages Jarvis records; unknown stages sort after these
+STAGES = [
+    "wake_word", "utterance", "recognize", "queue", "command", "plan", "route", "classify", "action",
+    "llm", "llm_first_token", "tts_queue", "tts_speak", "first_audio",
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Tracer:
+    """Records how long each stage of an interaction takes.
+
+    An interaction starts when the user stops talking (or submits text) and
+    its id follows the command across threads. Durations are kept per stage
+    in a sliding window for percentiles; the raw spans go to a bounded event
+    log that export() writes as a Chrome trace (chrome://tracing, Perfetto).
+    """
+    def __init__(self, enabled=True, window=1000, max_events=100000, export_path=None):
+        self.enabled = enabled
+        self.window = window
+        self.export_path = export_path
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._samples = {}  # stage -> deque of seconds
+        self._events = deque(maxlen=max_events)
+        self._open = OrderedDict()  # interaction id -> start time, until its first audio
+        self._origin = time.perf_counter()
+        if export_path:
+            atexit.register(self.export)
+
+    def new_interaction(self, start=None):
+        """Allocate an interaction id that starts now (or at the given perf_counter time)."""
+        interaction_id = next(self._ids)
+        if self.enabled:
+            with self._lock:
+                self._open[interaction_id] = time.perf_counter() if start is None else start
+                while len(self._open) > self.window:
+                    self._open.popitem(last=False)
+        return interaction_id
+
+    def current(self):
+        """The interaction the calling thread is working on, or None."""
+        return getattr(self._local, "interaction", None)
+
+    @contextmanager
+    def interaction(self, interaction_id):
+        """Make interaction_id current on this thread for the duration of the block."""
+        previous = self.current()
+        self._local.interaction = interaction_id
+        try:
+            yield interaction_id
+        finally:
+            self._local.interaction = previous
+
+    @contextmanager
+    def span(self, name, interaction_id=None):
+        """Time the block as one stage of an interaction (the current one by default)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), interaction_id)
+
+    def record(self, name, start, end, interaction_id=None):
+        """Record a stage that ran from start to end (perf_counter seconds)."""
+        if not self.enabled:
+            return
+        if interaction_id is None:
+            interaction_id = self.current()
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(end - start)
+            self._events.append((name, interaction_id, start, end - start, threading.get_ident()))
+
+    def first_audio(self, interaction_id):
+        """Note that the interaction's first audio is starting; only the first call counts."""
+        if not self.enabled or interaction_id is None:
+            return
+        with self._lock:
+            start = self._open.pop(interaction_id, None)
+        if start is not None:
+            self.record("first_audio", start, time.perf_counter(), interaction_id)
+
+    def stats(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}} over each stage's window."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        order = {name: index for index, name in enumerate(STAGES)}
+        result = {}
+        for name in sorted(samples, key=lambda n: (order.get(n, len(STAGES)), n)):
+            values = samples[name]
+            result[name] = {
+                "count": len(values),
+                "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+            }
+        return result
+
+    def format_stats(self):
+        """Stats as a fixed-width table for the GUI panel and the console."""
+        lines = [f"{'stage':16} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for name, s in self.stats().items():
+            lines.append(f"{name:16} {s['count']:5d} {s['p50_ms']:7.1f}ms {s['p95_ms']:7.1f}ms {s['p99_ms']:7.1f}ms")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """The recorded spans in Chrome trace-event format."""
+        with self._lock:
+            events = list(self._events)
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": "jarvis",
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": os.getpid(),
+                    "tid": thread,
+                    "args": {"interaction": interaction_id},
+                }
+                for name, interaction_id, start, duration, thread in events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"stats": self.stats()},
+        }
+
+    def export(self, path=None):
+        """Write the Chrome trace, with the percentile table under otherData, as JSON."""
+        path = path or self.export_path
+        if not path:
+            return None
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.chrome_trace(), f)
+            os.replace(tmp_path, path)
+            return path
+        except OSError as e:
+            print(f"Could not write trace: {e}")
+            return None
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._events.clear()
+            self._open.clear()
+
+
+# Shared by every subsystem; JARVIS_TRACE=0 turns recording off, JARVIS_TRACE_FILE exports at exit
+tracer = Tracer(
+    enabled=os.getenv("JARVIS_TRACE", "1") != "0",
+    export_path=os.getenv("JARVIS_TRACE_FILE") or None
+)
@@ -0,0 +1,108 @@
+"""Bounded chat transcript with optional archiving of older messages to disk."""
+import itertools
+import json
+import os
+import time
+from collections import deque
+
+
+class Message:
+    """One transcript row; text grows in place while a response streams in."""
+    __slots__ = ("id", "role", "text", "timestamp")
+
+    def __init__(self, message_id, role, text, timestamp=None):
+        self.id = message_id
+        self.role = role
+        self.text = text
+        self.timestamp = timestamp or time.time()
+
+    def to_dict(self):
+        return {"id": self.id, "role": self.role, "text": self.text, "timestamp": self.timestamp}
+
+
+class Transcript:
+    """The most recent messages in a ring buffer.
+
+    Ids keep counting across evictions, so a row is found from its id with
+    one subtraction. Messages that fall out of the buffer (or are cleared)
+    are appended to archive_path as JSON lines when one is set, which keeps
+    an all-day session on disk rather than in memory.
+    """
+    def __init__(self, max_messages=5000, archive_path=None):
+        self.max_messages = max_messages
+        self.archive_path = archive_path
+        self.archived = 0
+        self._messages = deque()
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __getitem__(self, row):
+        return self._messages[row]
+
+    def new_message(self, role, text=""):
+        """Create a message with the next id; it joins the buffer through extend()."""
+        return Message(next(self._ids), role, text)
+
+    def extend(self, messages):
+        """Append messages; the caller makes room first with drop_oldest()."""
+        overflow = len(messages) - self.max_messages
+        if overflow > 0:
+            # More arrived at once than fit; the oldest go straight to the archive
+            self._archive(messages[:overflow])
+            messages = messages[overflow:]
+        self._messages.extend(messages)
+
+    def room_needed(self, count):
+        """How many old messages must go before count new ones fit."""
+        return max(0, min(len(self._messages), len(self._messages) + count - self.max_messages))
+
+    def drop_oldest(self, count):
+        dropped = [self._messages.popleft() for _ in range(min(count, len(self._messages)))]
+        self._archive(dropped)
+        return len(dropped)
+
+    def row_of(self, message_id):
+        """Row of a message still in the buffer, or None."""
+        if not self._messages:
+            return None
+        row = message_id - self._messages[0].id
+        return row if 0 <= row < len(self._messages) else None
+
+    def clear(self):
+        self._archive(list(self._messages))
+        self._messages.clear()
+
+    def export(self, path):
+        """Write the archived history followed by the buffer; .jsonl keeps metadata, anything else is text."""
+        as_json = path.endswith(".jsonl")
+        with open(path, "w", encoding="utf-8") as out:
+            if self.archive_path and os.path.exists(self.archive_path):
+                with open(self.archive_path, encoding="utf-8") as archive:
+                    for line in archive:
+                        if as_json:
+                            out.write(line)
+                        else:
+                            out.write(self._format(json.loads(line)) + "\n")
+            for message in self._messages:
+                data = message.to_dict()
+                out.write((json.dumps(data) if as_json else self._format(data)) + "\n")
+        return path
+
+    @staticmethod
+    def _format(data):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["timestamp"]))
+        return f"[{stamp}] {data['role']}: {data['text']}"
+
+    def _archive(self, messages):
+        if not messages or not self.archive_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.archive_path)), exist_ok=True)
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                for message in messages:
+                    f.write(json.dumps(message.to_dict()) + "\n")
+            self.archived += len(messages)
+        except OSError as e:
+            print(f"Could not archive transcript: {e}")
@@ -0,0 +1,355 @@
+"""Text-to-speech synthesis cache and audio playback."""
+import hashlib
+import itertools
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+from jarvis.trace import tracer as default_tracer
+
+# Queue priorities; lower numbers are spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_RENDER = 2
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "jarvis", "tts")
+
+
+class SpeechCache:
+    """Phrases rendered to audio files, keyed by text and voice settings.
+
+    Files are touched on every hit and the least recently used ones are
+    deleted once the directory grows past max_bytes. The directory is scanned
+    once; after that its size is tracked in memory.
+    """
+    def __init__(self, directory=None, max_bytes=50 * 1024 * 1024, system=None):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        # NSSpeechSynthesizer writes AIFF; espeak and SAPI write WAV
+        self.extension = ".aiff" if (system or platform.system()).lower() == "darwin" else ".wav"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = self._scan()  # path -> size, least recently used first
+        self.total_bytes = sum(self._files.values())
+
+    def _scan(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.extension):
+                info = entry.stat()
+                files.append((info.st_mtime, entry.path, info.st_size))
+        return OrderedDict((path, size) for _, path, size in sorted(files))
+
+    def path_for(self, text, voice, rate, volume):
+        raw = "\x1f".join((text.strip(), str(voice), str(rate), str(volume)))
+        return os.path.join(self.directory, hashlib.sha1(raw.encode("utf-8")).hexdigest() + self.extension)
+
+    def get(self, text, voice, rate, volume):
+        """Return the cached file for this phrase, or None."""
+        path = self.path_for(text, voice, rate, volume)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                if path in self._files:
+                    # Deleted behind our back
+                    self.total_bytes -= self._files.pop(path)
+            return None
+        with self._lock:
+            self.hits += 1
+            if path in self._files:
+                self._files.move_to_end(path)
+        return path
+
+    def render(self, engine, text, voice, rate, volume):
+        """Synthesize text into the cache with a pyttsx3 engine; returns the file path or None."""
+        path = self.path_for(text, voice, rate, volume)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp{self.extension}"
+        engine.save_to_file(text, tmp_path)
+        engine.runAndWait()
+        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            return None
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.total_bytes += size - self._files.pop(path, 0)
+            self._files[path] = size
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes."""
+        with self._lock:
+            while self.total_bytes > self.max_bytes and self._files:
+                path, size = self._files.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self.total_bytes, "files": len(self._files)}
+
+
+class AudioPlayer:
+    """Plays audio files with whatever the platform provides, and can be stopped mid-file."""
+    LINUX_PLAYERS = (
+        ["paplay"],
+        ["aplay", "-q"],
+        ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"],
+        ["play", "-q"],
+    )
+
+    def __init__(self, system=None):
+        self.system = (system or platform.system()).lower()
+        self.command = self._find_command()
+        self._process = None
+        self._stopped = threading.Event()
+
+    @property
+    def available(self):
+        return self.system == "windows" or self.command is not None
+
+    def play(self, path):
+        """Play a file and block until it ends or stop() is called."""
+        self._stopped.clear()
+        if self.system == "windows":
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            # SND_ASYNC returns at once, so wait out the clip unless interrupted
+            if self._stopped.wait(self._duration(path)):
+                winsound.PlaySound(None, 0)
+            return
+        self._process = subprocess.Popen(
+            self.command + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self._process.wait()
+
+    def stop(self):
+        self._stopped.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def _find_command(self):
+        if self.system == "darwin":
+            return ["afplay"]
+        if self.system == "windows":
+            return None
+        for command in self.LINUX_PLAYERS:
+            if shutil.which(command[0]):
+                return command
+        return None
+
+    @staticmethod
+    def _duration(path):
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / float(f.getframerate())
+        except (OSError, wave.Error):
+            return 5.0
+
+
+class SpeechWorker(threading.Thread):
+    """Owns the TTS engine on a single thread and speaks queued text in priority order.
+
+    say() never blocks. Identical consecutive utterances are spoken once,
+    interrupt=True preempts whatever is playing, and stop() flushes the queue
+    (used for the Stop button and for barge-in). Cached phrases play from the
+    SpeechCache when a player is available; anything else is spoken live, so
+    rendering never delays speech. Short phrases heard render_after times are
+    rendered in the background for next time.
+    """
+    def __init__(self, engine_factory, cache=None, player=None, cacheable_chars=200, tracer=None,
+                 render_after=2, remember=1000):
+        super().__init__(name="jarvis-tts", daemon=True)
+        self.engine_factory = engine_factory
+        self.tracer = tracer or default_tracer
+        self.cache = cache
+        self.player = player
+        self.cacheable_chars = cacheable_chars
+        self.render_after = render_after
+        self.remember = remember
+        self._heard = OrderedDict()  # uncached phrase -> times spoken, on this thread only
+        self.engine = None
+        self.is_speaking = False
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._interrupt = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._generation = 0  # bumped by stop() so items already taken off the queue are skipped
+        self._last_text = None
+        self.spoken = 0
+        self.duplicates = 0
+        self.interrupted = 0
+        self.speaking_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def say(self, text, priority=PRIORITY_NORMAL, interrupt=False):
+        """Queue text for speaking; returns False if it was dropped as a duplicate."""
+        text = text.strip()
+        if not text:
+            return False
+        if interrupt:
+            self.stop()
+        with self._lock:
+            if text == self._last_text:
+                self.duplicates += 1
+                return False
+            self._last_text = text
+            self._pending += 1
+            generation = self._generation
+        # The interaction is captured here because speaking happens on this worker's thread
+        self._queue.put((priority, next(self._sequence), "say", text, time.perf_counter(), generation,
+                         self.tracer.current()))
+        return True
+
+    def render(self, phrases):
+        """Queue phrases to be rendered into the cache when nothing else is waiting."""
+        if self.cache is None or self.player is None or not self.player.available:
+            return
+        for phrase in phrases:
+            self._queue.put((PRIORITY_RENDER, next(self._sequence), "render", phrase, time.perf_counter(), 0, None))
+
+    def stop(self):
+        """Drop everything queued and cut off the current utterance."""
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[2] == "say":
+                dropped += 1
+            else:
+                self._queue.put(item)  # keep cache warm-up going
+                break
+        with self._lock:
+            self._pending -= dropped
+            self._generation += 1
+            self._last_text = None
+            if self.is_speaking:
+                self.interrupted += 1
+                self._interrupt.set()
+            self._idle.notify_all()
+        if self.player is not None:
+            self.player.stop()
+
+    def wait_idle(self, timeout=None):
+        """Block until everything queued so far has been spoken; False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self):
+        """Queue depth and speaking-time metrics."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "speaking": self.is_speaking,
+                "spoken": self.spoken,
+                "duplicates": self.duplicates,
+                "interrupted": self.interrupted,
+                "speaking_seconds": self.speaking_seconds,
+                "mean_queue_wait_ms": self.queue_wait_seconds / self.spoken * 1000 if self.spoken else 0.0,
+            }
+
+    def run(self):
+        # pyttsx3 engines must be driven from the thread that created them
+        try:
+            self.engine = self.engine_factory()
+            self.engine.connect("started-word", self._on_word)
+        except Exception as e:
+            # Keep draining the queue so callers waiting on wait_idle() are released
+            print(f"Text-to-speech unavailable: {e}")
+            self.engine = None
+        while True:
+            _, _, kind, text, queued_at, generation, interaction_id = self._queue.get()
+            try:
+                if self.engine is None:
+                    pass
+                elif kind == "render":
+                    self._render(text)
+                elif generation == self._generation:
+                    self._speak(text, queued_at, interaction_id)
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                if kind == "say":
+                    with self._lock:
+                        self._pending -= 1
+                        if text == self._last_text:
+                            self._last_text = None  # the same reply later on is not a duplicate
+                        self._idle.notify_all()
+
+    def _speak(self, text, queued_at, interaction_id=None):
+        start = time.perf_counter()
+        with self._lock:
+            self._interrupt.clear()
+            self.is_speaking = True
+            self.queue_wait_seconds += start - queued_at
+        self.tracer.record("tts_queue", queued_at, start, interaction_id)
+        try:
+            path = self._cached_audio(text)
+            self.tracer.first_audio(interaction_id)
+            if path:
+                self.player.play(path)
+            else:
+                self.engine.say(text)
+                self.engine.runAndWait()
+        finally:
+            end = time.perf_counter()
+            self.tracer.record("tts_speak", start, end, interaction_id)
+            with self._lock:
+                self.is_speaking = False
+                self.spoken += 1
+                self.speaking_seconds += end - start
+
+    def _on_word(self, name, location, length):
+        if self._interrupt.is_set():
+            self.engine.stop()
+
+    def _voice_settings(self):
+        return (
+            self.engine.getProperty("voice"),
+            self.engine.getProperty("rate"),
+            self.engine.getProperty("volume"),
+        )
+
+    def _cached_audio(self, text):
+        """Path of the rendered phrase, or None to speak it live."""
+        if self.cache is None or self.player is None or not self.player.available:
+            return None
+        path = self.cache.get(text, *self._voice_settings())
+        if path is None and len(text) <= self.cacheable_chars and self._repeated(text):
+            # Worth keeping, but rendered after what is waiting to be said
+            self.render([text])
+        return path
+
+    def _repeated(self, text):
+        """Count an uncached phrase; True the time it reaches render_after."""
+        count = self._heard.pop(text, 0) + 1
+        self._heard[text] = count
+        while len(self._heard) > self.remember:
+            self._heard.popitem(last=False)
+        return count == self.render_after
+
+    def _render(self, text):
+        settings = self._voice_settings()
+        if not os.path.exists(self.cache.path_for(text, *settings)):
+            self.cache.render(self.engine, text, *settings)
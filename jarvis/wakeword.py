@@ -0,0 +1,214 @@
+"""On-device wake-word detection over streamed audio frames."""
+import array
+import math
+import sys
+import time
+import wave
+
+import speech_recognition as sr
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+FRAME_MS = 30
+
+
+def frame_rms(frame):
+    """Root-mean-square energy of a 16-bit little-endian PCM frame."""
+    samples = array.array("h", frame[:len(frame) - len(frame) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def split_frames(raw, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """Cut raw 16-bit mono PCM into fixed-length frames."""
+    size = sample_rate * frame_ms // 1000 * SAMPLE_WIDTH
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def read_wav_frames(path, frame_ms=FRAME_MS):
+    """Read a WAV file as 16 kHz 16-bit mono frames."""
+    audio = sr.AudioData(*_read_wav(path))
+    raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+    return split_frames(raw, SAMPLE_RATE, frame_ms)
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as f:
+        if f.getnchannels() != 1:
+            raise ValueError(f"{path}: expected mono audio")
+        return f.readframes(f.getnframes()), f.getframerate(), f.getsampwidth()
+
+
+class EnergyGate:
+    """Marks frames as speech when their energy is above a fixed threshold."""
+    def __init__(self, threshold=300.0):
+        self.threshold = threshold
+
+    def is_speech(self, frame):
+        return frame_rms(frame) > self.threshold
+
+
+class KeywordSpotter:
+    """Decides whether a buffered stretch of speech contains the wake word."""
+    name = "base"
+
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+
+    def spot(self, audio):
+        """Return True if the sr.AudioData contains the keyword."""
+        raise NotImplementedError
+
+
+class SphinxKeywordSpotter(KeywordSpotter):
+    """Offline keyword search with PocketSphinx through speech_recognition."""
+    name = "sphinx"
+
+    def __init__(self, keyword, recognizer=None, sensitivity=1e-20):
+        super().__init__(keyword)
+        self.recognizer = recognizer or sr.Recognizer()
+        self.sensitivity = sensitivity
+        import pocketsphinx  # noqa: F401  fail at construction rather than on first utterance
+
+    def spot(self, audio):
+        try:
+            heard = self.recognizer.recognize_sphinx(audio, keyword_entries=[(self.keyword, self.sensitivity)])
+        except sr.UnknownValueError:
+            return False
+        return self.keyword in heard.lower()
+
+
+class GoogleKeywordSpotter(KeywordSpotter):
+    """Sends each utterance to Google, as Jarvis did before; needs the network."""
+    name = "google"
+
+    def __init__(self, keyword, recognizer=None):
+        super().__init__(keyword)
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def spot(self, audio):
+        try:
+            return self.keyword in self.recognizer.recognize_google(audio).lower()
+        except sr.UnknownValueError:
+            return False
+
+
+SPOTTERS = {
+    SphinxKeywordSpotter.name: SphinxKeywordSpotter,
+    GoogleKeywordSpotter.name: GoogleKeywordSpotter,
+}
+
+
+def make_spotter(name, keyword, recognizer=None):
+    """Build a spotter by name; a missing local engine is an error, never a silent switch to Google."""
+    if name not in SPOTTERS:
+        raise ValueError(f"Unknown wake-word engine '{name}'; choose from {', '.join(SPOTTERS)}")
+    if name == GoogleKeywordSpotter.name:
+        print("Warning: wake-word engine 'google' sends all audio heard while idle to Google")
+    try:
+        return SPOTTERS[name](keyword, recognizer)
+    except ImportError as e:
+        raise RuntimeError(
+            f"Wake-word engine '{name}' unavailable ({e}); install it, or set "
+            f"JARVIS_WAKE_ENGINE=google to send idle audio to Google instead"
+        ) from e
+
+
+class WakeWordDetector:
+    """Feeds audio frames through an energy gate and runs the spotter per utterance.
+
+    Silence is dropped frame by frame, so the spotter only ever sees speech.
+    An utterance ends after hangover_ms of silence or max_utterance_ms of audio.
+    """
+    def __init__(self, spotter, gate=None, hangover_ms=300, max_utterance_ms=3000,
+                 sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.spotter = spotter
+        self.gate = gate or EnergyGate()
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_frames = max(1, max_utterance_ms // frame_ms)
+        self._frames = []
+        self._silent = 0
+        self.frames_seen = 0
+        self.decodes = 0
+        self.detections = 0
+        self.cpu_seconds = 0.0
+        self.latencies = []
+
+    def process(self, frame):
+        """Consume one frame; True if it completed an utterance containing the wake word."""
+        start_cpu = time.thread_time()
+        self.frames_seen += 1
+        fired = False
+        if self.gate.is_speech(frame):
+            self._frames.append(frame)
+            self._silent = 0
+        elif self._frames:
+            self._frames.append(frame)
+            self._silent += 1
+        if self._frames and (self._silent >= self.hangover_frames or len(self._frames) >= self.max_frames):
+            fired = self._decode()
+        self.cpu_seconds += time.thread_time() - start_cpu
+        return fired
+
+    def flush(self):
+        """Decode whatever speech is buffered, e.g. at the end of a recording."""
+        start_cpu = time.thread_time()
+        fired = self._decode() if self._frames else False
+        self.cpu_seconds += time.thread_time() - start_cpu
+        return fired
+
+    def detect(self, audio):
+        """Run a whole sr.AudioData clip through the detector."""
+        raw = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=SAMPLE_WIDTH)
+        fired = False
+        for frame in split_frames(raw, self.sample_rate, self.frame_ms):
+            fired = self.process(frame) or fired
+        return self.flush() or fired
+
+    def reset(self):
+        self._frames = []
+        self._silent = 0
+
+    def stats(self):
+        """CPU use relative to audio processed, and decode-to-detection latency."""
+        audio_seconds = self.frames_seen * self.frame_ms / 1000
+        return {
+            "engine": self.spotter.name,
+            "audio_seconds": audio_seconds,
+            "decodes": self.decodes,
+            "detections": self.detections,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_ratio": self.cpu_seconds / audio_seconds if audio_seconds else 0.0,
+            "mean_latency_ms": sum(self.latencies) / len(self.latencies) * 1000 if self.latencies else 0.0,
+        }
+
+    def _decode(self):
+        audio = sr.AudioData(b"".join(self._frames), self.sample_rate, SAMPLE_WIDTH)
+        self.reset()
+        self.decodes += 1
+        start = time.perf_counter()
+        try:
+            fired = self.spotter.spot(audio)
+        except sr.RequestError as e:
+            print(f"Wake-word engine error: {e}")
+            fired = False
+        if fired:
+            self.detections += 1
+            self.latencies.append(time.perf_counter() - start)
+        return fired
+
+
+def detect_in_wav(path, detector):
+    """Stream a WAV fixture through detector; returns the frame offsets (ms) where it fired."""
+    hits = []
+    for index, frame in enumerate(read_wav_frames(path, detector.frame_ms)):
+        if detector.process(frame):
+            hits.append(index * detector.frame_ms)
+    if detector.flush():
+        hits.append(detector.frames_seen * detector.frame_ms)
+    return hits
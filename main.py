@@ -1,18 +1,21 @@
+import importlib
 import sys
-import webbrowser
-import pyttsx3
-import speech_recognition as sr
+import threading
+import time
 import os
-import subprocess
-import pywhatkit
-import openai
-from dotenv import load_dotenv
-import winreg
-import platform
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from jarvis.engine import JarvisEngine, default_app_index, get_openai
+from jarvis.launcher import AppLauncher
+from jarvis.registry import RegistryWatcher
+from jarvis.speculate import Speculator
+from jarvis.trace import tracer
+from jarvis.transcript import Transcript
+from jarvis.tts import PRIORITY_HIGH, PRIORITY_NORMAL, AudioPlayer, SpeechCache, SpeechWorker
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
-    QTextEdit,
+    QListView,
     QLineEdit,
     QPushButton,
     QVBoxLayout,
@@ -20,332 +23,547 @@ from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
     QProgressBar,
+    QStyledItemDelegate,
+    QFileDialog,
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal,QTimer
-from PyQt6.QtGui import QFont, QColor, QPalette
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer, QAbstractListModel, QModelIndex, QRect, QSize
+from PyQt6.QtGui import QFont, QColor, QPalette, QFontMetrics
 
 # Load environment variables
-load_dotenv()
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
 
-# Initialize OpenAI API
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise ValueError("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
+# Stream ChatGPT answers token by token into the window
+STREAM_RESPONSES = os.getenv("JARVIS_STREAM_RESPONSES", "1") != "0"
 
-# Initialize the speech recognizer and text-to-speech engine
-recognizer = sr.Recognizer()
-engine = pyttsx3.init()
-
-# Set up wake word
+# Set up wake word; it is spotted locally so idle audio never leaves the machine.
+# JARVIS_WAKE_ENGINE=google opts in to sending it to Google instead.
 WAKE_WORD = "jarvis"
-LISTENING = False
+WAKE_ENGINE = os.getenv("JARVIS_WAKE_ENGINE", "sphinx")
 
-class SpeechEngine:
-    """Wrapper for pyttsx3 to handle speech synthesis."""
-    def __init__(self):
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 150)
-        self.engine.setProperty('volume', 1.0)
-        self.is_speaking = False
+# Speech recognition backend for commands: google, sphinx, whisper or vosk
+ASR_BACKEND = os.getenv("JARVIS_ASR_BACKEND", "google")
 
-    def speak(self, text):
-        """Convert text to speech."""
-        if not self.is_speaking:
-            self.is_speaking = True
-            self.engine.say(text)
-            self.engine.runAndWait()
-            self.is_speaking = False
+# Phrases up to this length that come up again are rendered to the TTS cache in the background
+CACHEABLE_CHARS = 200
 
-    def stop(self):
-        """Stop the speech synthesis."""
-        self.engine.stop()
-        self.is_speaking = False
+# Stop talking as soon as the user starts; turn off if the mic hears the speakers
+BARGE_IN = os.getenv("JARVIS_BARGE_IN", "1") != "0"
 
-speech_engine = SpeechEngine()
+# Messages kept in the window; older ones go to JARVIS_TRANSCRIPT_ARCHIVE if set
+TRANSCRIPT_MAX = int(os.getenv("JARVIS_TRANSCRIPT_MAX", "5000"))
 
-def find_program_path(program_name):
-    """Find program path based on operating system."""
-    system = platform.system().lower()
-    
-    if system == "windows":
-        # Common Windows program locations
-        common_locations = [
-            os.path.join(os.environ.get('ProgramFiles', ''), program_name),
-            os.path.join(os.environ.get('ProgramFiles(x86)', ''), program_name),
-            os.path.join(os.environ.get('LOCALAPPDATA', ''), program_name),
-            os.path.join(os.environ.get('APPDATA', ''), program_name)
-        ]
-        
-        # Add .exe extension if not present
-        if not program_name.endswith('.exe'):
-            program_name += '.exe'
-            
-        # Search in common locations
-        for location in common_locations:
-            if os.path.exists(location):
-                return location
-            
-        # Try Windows Registry
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\\" + program_name) as key:
-                return winreg.QueryValue(key, None)
-        except WindowsError:
-            pass
-            
-    elif system == "darwin":  # macOS
-        common_locations = [
-            f"/Applications/{program_name}.app",
-            f"{os.path.expanduser('~/Applications')}/{program_name}.app"
-        ]
-    else:  # Linux
-        common_locations = [
-            f"/usr/bin/{program_name}",
-            f"/usr/local/bin/{program_name}"
-        ]
-    
-    for location in common_locations:
-        if os.path.exists(location):
-            return location
-            
-    return None
-
-def open_desktop_app(app_name):
-    """Open desktop applications with improved error handling and debugging."""
-    try:
-        app_name = app_name.lower().strip()
-        print(f"Attempting to open: {app_name}")
-        
-        # Special handling for common applications
-        common_apps = {
-            "file explorer": {
-                "windows": "explorer.exe",
-                "darwin": "Finder",
-                "linux": "nautilus"
-            },
-            "microsoft edge": {
-                "windows": r"C:/Program Files (x86)/Microsoft/Edge/Application/msedge.exe",
-                "darwin": "/Applications/Microsoft Edge.app",
-                "linux": "/usr/bin/microsoft-edge"
-            },
-            "calculator": {
-                "windows": "calc.exe",
-                "darwin": "Calculator",
-                "linux": "gnome-calculator"
-            },
-            "clock": {
-                "windows": "ms-clock://",
-                "darwin": "Clock",
-                "linux": "gnome-clocks"
-            },
-            "command prompt": {
-                "windows": "cmd.exe",
-                "darwin": "Terminal",
-                "linux": "gnome-terminal"
-            },
-            "settings": {
-                "windows": "ms-settings:",
-                "darwin": "System Preferences",
-                "linux": "gnome-control-center"
-            }
-        }
-        
-        system = platform.system().lower()
-        
-        # Try common apps first
-        if app_name in common_apps:
-            if system in common_apps[app_name]:
-                path = common_apps[app_name][system]
-                if os.path.exists(path):
-                    print(f"Found common app path: {path}")
-                    if system == "darwin":  # macOS
-                        subprocess.run(["open", path])
-                    else:
-                        os.startfile(path) if system == "windows" else subprocess.run([path])
-                    speech_engine.speak(f"Opening {app_name}")
-                    return
-        
-        # Try finding the program path
-        program_path = find_program_path(app_name)
-        if program_path:
-            print(f"Found program path: {program_path}")
-            if system == "darwin":  # macOS
-                subprocess.run(["open", program_path])
-            else:
-                os.startfile(program_path) if system == "windows" else subprocess.run([program_path])
-            speech_engine.speak(f"Opening {app_name}")
-            return
-        
-        # If all else fails, try using the command directly
-        try:
-            if system == "darwin":  # macOS
-                subprocess.run(["open", "-a", app_name])
-            elif system == "windows":
-                subprocess.run(app_name)
-            else:  # Linux
-                subprocess.Popen(app_name)
-            speech_engine.speak(f"Opening {app_name}")
-        except Exception as e:
-            print(f"Error running app directly: {e}")
-            speech_engine.speak(f"Sorry, I couldn't find or open {app_name}")
-            
-    except Exception as e:
-        print(f"Error opening {app_name}: {e}")
-        speech_engine.speak(f"Sorry, I encountered an error while trying to open {app_name}")
+# Act on partial transcripts of streaming recognizers before the user finishes;
+# JARVIS_SPECULATE_LLM=0 keeps it to lookups and never sends a ChatGPT request early
+SPECULATE = os.getenv("JARVIS_SPECULATE", "1") != "0"
+SPECULATE_LLM = os.getenv("JARVIS_SPECULATE_LLM", "1") != "0"
 
-def process_command(command, is_voice=True):
-    """Process user commands and return response string."""
-    try:
-        command = command.lower().strip()
-        print(f"Processing command: {command}")  # Debug print
-
-        # Website commands
-        websites = {
-            "open google": "https://google.com",
-            "open facebook": "https://facebook.com",
-            "open youtube": "https://youtube.com",
-            "open instagram": "https://www.instagram.com",
-            "open whatsapp": "https://web.whatsapp.com",
-            "open github": "https://github.com"
-        }
-
-        # Check website commands
-        for key, url in websites.items():
-            if key in command:
-                webbrowser.open(url)
-                response = f"Opening {key.replace('open ', '')}"
-                if is_voice:
-                    speech_engine.speak(response)
-                return response
-
-        # Handle song playback
-        if command.startswith("play"):
-            song_name = command.replace("play", "").strip()
-            song_name = " ".join(song_name.split())
-            try:
-                pywhatkit.playonyt(song_name)
-                response = f"Playing {song_name} on YouTube"
-                if is_voice:
-                    speech_engine.speak(response)
-                return response
-            except Exception as e:
-                response = f"Sorry, I couldn't play that song: {str(e)}"
-                if is_voice:
-                    speech_engine.speak(response)
-                return response
-
-        if "search for" in command or "search" in command:
-            if "youtube" in command:
-                search_term = command.replace("search for", "").replace("search", "").replace("youtube", "").strip()
-                webbrowser.open(f"https://www.youtube.com/results?search_query={search_term}")
-                response = f"Searching for {search_term} on YouTube"
-            elif "google" in command:
-                search_term = command.replace("search for", "").replace("search", "").replace("google", "").strip()
-                webbrowser.open(f"https://www.google.com/search?q={search_term}")
-                response = f"Searching for {search_term} on Google"
-            elif "instagram" in command:
-                search_term = command.replace("search for", "").replace("search", "").replace("instagram", "").strip()
-                webbrowser.open(f"https://www.instagram.com/explore/people/?q={search_term}")
-                response = f"Showing search results for {search_term} on Instagram"
-            elif "linkedin" in command:
-                search_term = command.replace("search for", "").replace("search", "").replace("linkedin", "").strip()
-                webbrowser.open(f"https://www.linkedin.com/search/results/people/?keywords={search_term}")
-                response = f"Showing search results for {search_term} on LinkedIn"
-            else:
-                response = "Please specify a platform to search on (e.g., Google, YouTube, Instagram, LinkedIn)."
-            
-            if is_voice:
-                speech_engine.speak(response)
-            return response
-
-        # Open app command
-        if command.startswith("open "):
-            app_name = command.replace("open ", "").strip()
-            response = open_desktop_app(app_name)
-            return response
-
-        # Handle ChatGPT responses for everything else
-        if command not in ["exit", "quit", "go to sleep"]:
-            try:
-                response = get_chatbot_response(command)
-                if is_voice:
-                    speech_engine.speak(response)
-                return response
-            except Exception as e:
-                response = f"Sorry, I couldn't get a response from ChatGPT: {str(e)}"
-                if is_voice:
-                    speech_engine.speak(response)
-                return response
+# Seconds between checks of the command config for edits; 0 turns reloading off
+CONFIG_POLL = float(os.getenv("JARVIS_CONFIG_POLL", "1"))
 
-        # Default response if no conditions are met
-        response = "I didn't understand that command. Please try again."
-        if is_voice:
-            speech_engine.speak(response)
-        return response
+def create_tts_engine():
+    """Create and configure the pyttsx3 engine (called on the speech thread)."""
+    import pyttsx3
+    tts_engine = pyttsx3.init()
+    tts_engine.setProperty('rate', 150)
+    tts_engine.setProperty('volume', 1.0)
+    return tts_engine
 
-    except Exception as e:
-        error_msg = f"Error processing command: {str(e)}"
-        if is_voice:
-            speech_engine.speak(error_msg)
-        return error_msg
+class SpeechEngine:
+    """Wrapper for pyttsx3 to handle speech synthesis.
 
-def get_chatbot_response(prompt):
-    """Get response from OpenAI ChatGPT."""
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant named Jarvis."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000
+    Speech runs on a dedicated worker thread, so speak() only queues the text
+    and returns immediately.
+    """
+    def __init__(self):
+        self.worker = SpeechWorker(
+            create_tts_engine,
+            cache=SpeechCache(max_bytes=int(os.getenv("JARVIS_TTS_CACHE_MB", "50")) * 1024 * 1024),
+            player=AudioPlayer(),
+            cacheable_chars=CACHEABLE_CHARS
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"I encountered an error: {str(e)}"
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the speech thread; the engine is created there, off the startup path."""
+        with self._start_lock:
+            if not self.worker.is_alive():
+                self.worker.start()
+
+    @property
+    def is_speaking(self):
+        return self.worker.is_speaking
+
+    def speak(self, text, priority=PRIORITY_NORMAL, interrupt=False):
+        """Convert text to speech."""
+        self.start()
+        return self.worker.say(text, priority, interrupt)
+
+    def stop(self):
+        """Stop the speech synthesis."""
+        self.worker.stop()
+
+    def wait(self, timeout=None):
+        """Block until everything queued has been spoken."""
+        return self.worker.wait_idle(timeout)
+
+    def prewarm(self, phrases):
+        """Render phrases into the cache in the background so they play instantly later."""
+        self.start()
+        self.worker.render(phrases)
+
+    def stats(self):
+        return self.worker.stats()
+
+Assistant = namedtuple("Assistant", ["speech", "app_index", "launcher", "engine", "speculator"])
+
+_assistant = None
+_assistant_lock = threading.Lock()
+
+def assistant():
+    """The speech engine, app index, launcher, engine and speculator, built on first use.
+
+    Building them scans the TTS cache, loads the command config and trains
+    the intent classifier, so warm_up() does it once the window is showing.
+    """
+    global _assistant
+    with _assistant_lock:
+        if _assistant is None:
+            speech_engine = SpeechEngine()
+            # Installed apps, indexed in the background
+            app_index = default_app_index()
+            # Apps Jarvis started, so they can be listed and closed later
+            app_launcher = AppLauncher()
+            # The GUI drives one engine; its conversation is set by JARVIS_SESSION
+            engine = JarvisEngine(
+                session_id=os.getenv("JARVIS_SESSION", "default"),
+                launcher=app_launcher,
+                app_index=app_index,
+                speaker=speech_engine,
+                stream_responses=STREAM_RESPONSES
+            )
+            speculator = Speculator(engine, llm=SPECULATE_LLM) if SPECULATE else None
+            _assistant = Assistant(speech_engine, app_index, app_launcher, engine, speculator)
+    return _assistant
 
 class VoiceThread(QThread):
     """Thread to handle voice commands."""
-    command_received = pyqtSignal(str)
+    command_received = pyqtSignal(str, int)  # command, interaction id
+    notice = pyqtSignal(str)
     listening_status = pyqtSignal(bool)
+    partial_transcript = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
 
+    def __init__(self, source=None, asr=None, spotter=None, speculator=None, parent=None):
+        super().__init__(parent)
+        # Any AudioSource works here; the microphone is only the default
+        self.source = source
+        self._asr = asr
+        self._spotter = spotter
+        self.speculator = speculator
+        self.capture = None
+        self.wake_detector = None
+        self.segmenter = None
+        self.asr = None
+        self.stream = None
+        self.listening = False  # asleep until the wake word or the voice button
+        self.speech_started = None
+        self._stopped = False
+
+    def setup(self):
+        """Load the speech engines; done on this thread so the window never waits for them."""
+        import speech_recognition as sr
+        from jarvis.asr import make_backend
+        from jarvis.audio import AudioCapture, MicrophoneSource, NoiseFloor, UtteranceSegmenter
+        from jarvis.wakeword import WakeWordDetector, make_spotter
+
+        if self.speculator is None:
+            self.speculator = assistant().speculator
+        recognizer = sr.Recognizer()
+        noise_floor = NoiseFloor()
+        try:
+            spotter = self._spotter or make_spotter(WAKE_ENGINE, WAKE_WORD, recognizer)
+            self.wake_detector = WakeWordDetector(spotter, gate=noise_floor)
+        except RuntimeError as e:
+            # No wake word, but the voice button still starts listening
+            self.error_occurred.emit(f"{e}. Until then, use the voice button to talk to me.")
+        self.segmenter = UtteranceSegmenter(noise_floor, on_speech_start=self.speech_start)
+        self.asr = self._asr or make_backend(ASR_BACKEND, recognizer)
+        self.capture = AudioCapture(self.source or MicrophoneSource())
+        if self._stopped:
+            return False
+        self.capture.start()
+        return True
+
     def run(self):
         """Listen for voice commands."""
-        global LISTENING
-        while True:
+        try:
+            if not self.setup():
+                return
+            import speech_recognition as sr
+        except Exception as e:
+            self.error_occurred.emit(f"Error in voice thread: {e}")
+            return
+        self.listening_status.emit(True)
+        print("Listening for wake word..." if self.wake_detector else "Waiting for the voice button...")
+        was_listening = self.listening
+        for frame in self.capture.frames():
             try:
-                with sr.Microphone() as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=1)
-                    self.listening_status.emit(True)
-                    print("Listening for wake word...")
-                    audio = recognizer.listen(source, timeout=None, phrase_time_limit=5)
-                
+                if self.listening != was_listening:
+                    # Drop half-heard audio from before the mode changed
+                    self.segmenter.reset()
+                    if self.wake_detector is not None:
+                        self.wake_detector.reset()
+                    self.stream = None
+                    self.cancel_speculation()
+                    was_listening = self.listening
+
+                # While asleep only the local spotter hears the audio
+                if not self.listening:
+                    if self.wake_detector is None:
+                        continue
+                    decodes, start = self.wake_detector.decodes, time.perf_counter()
+                    fired = self.wake_detector.process(frame)
+                    if self.wake_detector.decodes != decodes:
+                        tracer.record("wake_word", start, time.perf_counter())
+                    if fired:
+                        print(f"Wake word stats: {self.wake_detector.stats()}")
+                        self.notice.emit("Wake word detected. How can I help you?")
+                        self.listening = was_listening = True
+                    continue
+
+                audio = self.segmenter.process(frame)
+                if self.asr.streaming:
+                    self.feed_stream(frame)
+                if audio is None:
+                    if not self.segmenter.in_speech and self.stream is not None:
+                        self.stream = None  # too short to be speech
+                        self.cancel_speculation()
+                    continue
+
+                # The interaction starts when the user stops talking
+                interaction_id = tracer.new_interaction()
+                if self.speech_started is not None:
+                    tracer.record("utterance", self.speech_started, time.perf_counter(), interaction_id)
                 try:
-                    command = recognizer.recognize_google(audio).lower()
+                    # A streaming backend has already decoded almost everything
+                    stream, self.stream = self.stream, None
+                    with tracer.span("recognize", interaction_id):
+                        command = (stream.finish() if stream else self.asr.recognize(audio)).lower()
                     print(f"Heard: {command}")
-                    
-                    if WAKE_WORD in command or LISTENING:
-                        if not LISTENING:
-                            self.command_received.emit("Wake word detected. How can I help you?")
-                            LISTENING = True
-                            continue
-                        
-                        if "stop listening" in command or "go to sleep" in command:
-                            LISTENING = False
-                            self.command_received.emit("Going to sleep. Say 'Jarvis' to wake me up.")
-                            continue
-                            
-                        self.command_received.emit(command)
-                        
+
+                    if "stop listening" in command or "go to sleep" in command:
+                        self.cancel_speculation()
+                        self.listening = False
+                        wake = "Say 'Jarvis'" if self.wake_detector else "Press the voice button"
+                        self.notice.emit(f"Going to sleep. {wake} to wake me up.")
+                        continue
+
+                    if self.speculator is not None:
+                        # What the partials predicted right stays prefetched for the engine
+                        kept = self.speculator.commit(command)
+                        if kept:
+                            print(f"Speculation kept: {kept}")
+                    self.command_received.emit(command, interaction_id)
+
                 except sr.UnknownValueError:
-                    if LISTENING:
-                        self.error_occurred.emit("Sorry, I didn't catch that.")
+                    self.cancel_speculation()
+                    self.error_occurred.emit("Sorry, I didn't catch that.")
                 except sr.RequestError:
+                    self.cancel_speculation()
                     self.error_occurred.emit("Speech recognition service error.")
-                    
+
             except Exception as e:
                 self.error_occurred.emit(f"Error in voice thread: {e}")
                 break
+        self.capture.stop()
+        self.listening_status.emit(False)
+
+    def speech_start(self):
+        self.speech_started = time.perf_counter()
+        self.barge_in()
+
+    def barge_in(self):
+        """The user started talking: cut Jarvis off."""
+        speech_engine = assistant().speech
+        if BARGE_IN and speech_engine.is_speaking:
+            print("Barge-in: stopping speech")
+            speech_engine.stop()
+
+    def feed_stream(self, frame):
+        """Decode the utterance incrementally and publish partial transcripts."""
+        if self.stream is None:
+            if not self.segmenter.in_speech:
+                return
+            self.stream = self.asr.start_stream()
+            frames = self.segmenter.buffered_frames()
+        else:
+            frames = [frame]
+        partial = None
+        for buffered in frames:
+            partial = self.stream.accept(buffered) or partial
+        if partial:
+            self.partial_transcript.emit(partial)
+            if self.speculator is not None:
+                self.speculator.update(partial)
+
+    def cancel_speculation(self):
+        if self.speculator is not None:
+            self.speculator.cancel()
+
+    def stop(self):
+        """Close the capture stream, which ends run()."""
+        self._stopped = True
+        if self.capture:
+            self.capture.stop()
+
+class CommandExecutor(QObject):
+    """Run commands on a worker pool and report results back through signals."""
+    command_started = pyqtSignal(int, str)
+    command_progress = pyqtSignal(int, str)
+    command_finished = pyqtSignal(int, str)
+    command_failed = pyqtSignal(int, str)
+    command_cancelled = pyqtSignal(int)
+    in_flight_changed = pyqtSignal(list)
+
+    def __init__(self, max_workers=4, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jarvis-command")
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._in_flight = {}  # command id -> (command, future, cancel event)
+
+    def submit(self, command, is_voice=True, interaction_id=None):
+        """Queue a command for execution and return its id."""
+        cancel_event = threading.Event()
+        if interaction_id is None:
+            interaction_id = tracer.new_interaction()
+        with self._lock:
+            command_id = self._next_id
+            self._next_id += 1
+            future = self._pool.submit(
+                self._run, command_id, command, is_voice, cancel_event, interaction_id, time.perf_counter()
+            )
+            self._in_flight[command_id] = (command, future, cancel_event)
+        self._emit_in_flight()
+        return command_id
+
+    def in_flight(self):
+        """Return (id, command) pairs for commands that have not completed yet."""
+        with self._lock:
+            return [(command_id, entry[0]) for command_id, entry in self._in_flight.items()]
+
+    def cancel_all(self):
+        """Cancel queued commands and discard the results of running ones."""
+        with self._lock:
+            entries = list(self._in_flight.items())
+            self._in_flight.clear()
+        for command_id, (_, future, cancel_event) in entries:
+            cancel_event.set()
+            future.cancel()
+            self.command_cancelled.emit(command_id)
+        if entries:
+            self._emit_in_flight()
+        return len(entries)
+
+    def shutdown(self):
+        """Stop accepting commands and drop anything still queued."""
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, command_id, command, is_voice, cancel_event, interaction_id, queued_at):
+        """Worker body: execute one command unless it was cancelled while queued."""
+        if cancel_event.is_set():
+            return
+        tracer.record("queue", queued_at, time.perf_counter(), interaction_id)
+        self.command_started.emit(command_id, command)
+        try:
+            response = assistant().engine.process_command(
+                command,
+                is_voice,
+                on_token=lambda token: self._progress(command_id, token, cancel_event),
+                cancel_event=cancel_event,
+                interaction_id=interaction_id
+            )
+        except Exception as e:
+            if self._complete(command_id):
+                self.command_failed.emit(command_id, f"Error processing command: {str(e)}")
+            return
+        # A cancelled command still runs to completion, but its result is dropped
+        if self._complete(command_id) and not cancel_event.is_set():
+            self.command_finished.emit(command_id, response if response is not None else "")
+
+    def _progress(self, command_id, token, cancel_event):
+        if not cancel_event.is_set():
+            self.command_progress.emit(command_id, token)
+
+    def _complete(self, command_id):
+        """Remove a command from the in-flight table; False if it was already cancelled."""
+        with self._lock:
+            found = self._in_flight.pop(command_id, None) is not None
+        if found:
+            self._emit_in_flight()
+        return found
+
+    def _emit_in_flight(self):
+        self.in_flight_changed.emit(self.in_flight())
+
+class TranscriptModel(QAbstractListModel):
+    """List model over a Transcript that applies changes at most once per frame.
+
+    add() and touch() only queue work; a 16 ms timer inserts the new rows,
+    drops the evicted ones and repaints streamed rows in one batch.
+    """
+    MESSAGE_ROLE = Qt.ItemDataRole.UserRole
+    PREFIXES = {"user": "You", "voice": "You (Voice)", "jarvis": "Jarvis", "error": "Error"}
+    flushed = pyqtSignal(bool)  # True when rows were added
+
+    def __init__(self, transcript, parent=None):
+        super().__init__(parent)
+        self.transcript = transcript
+        self._pending = []
+        self._dirty = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(16)
+        self._timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.transcript)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self.transcript[index.row()]
+        if role == self.MESSAGE_ROLE:
+            return message
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{self.PREFIXES.get(message.role, message.role)}: {message.text}"
+        return None
+
+    def add(self, role, text=""):
+        """Queue a message; returns it so streamed text can be added to it later."""
+        message = self.transcript.new_message(role, text)
+        self._pending.append(message)
+        self._schedule()
+        return message
+
+    def touch(self, message):
+        """The message's text changed; repaint it with the next batch."""
+        self._dirty[message.id] = message
+        self._schedule()
+
+    def clear(self):
+        self._timer.stop()
+        self.beginResetModel()
+        self.transcript.extend(self._pending)
+        self.transcript.clear()
+        self._pending = []
+        self._dirty.clear()
+        self.endResetModel()
+
+    def flush(self):
+        """Apply everything queued since the last frame."""
+        pending, self._pending = self._pending, []
+        dirty, self._dirty = self._dirty, {}
+        if pending:
+            drop = self.transcript.room_needed(len(pending))
+            if drop:
+                self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+                self.transcript.drop_oldest(drop)
+                self.endRemoveRows()
+            first = len(self.transcript)
+            last = first + min(len(pending), self.transcript.max_messages) - 1
+            self.beginInsertRows(QModelIndex(), first, last)
+            self.transcript.extend(pending)
+            self.endInsertRows()
+        for message_id in dirty:
+            row = self.transcript.row_of(message_id)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+        if pending or dirty:
+            self.flushed.emit(bool(pending))
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+class TranscriptDelegate(QStyledItemDelegate):
+    """Paints transcript rows as wrapped plain text, caching each row's height.
+
+    Only visible rows are painted, and a height is only measured again when
+    the message's text or the view's width changes.
+    """
+    COLORS = {"user": "#88C0D0", "voice": "#88C0D0", "jarvis": "#D8DEE9", "error": "#BF616A"}
+    PADDING = 6
+
+    def __init__(self, view, cache_limit=20000):
+        super().__init__(view)
+        self.view = view
+        self.cache_limit = cache_limit
+        self._heights = {}  # message id -> (text length, height)
+        self._width = 0
+
+    def _text_width(self):
+        return max(50, self.view.viewport().width() - 4 * self.PADDING)
+
+    def sizeHint(self, option, index):
+        message = index.data(TranscriptModel.MESSAGE_ROLE)
+        width = self._text_width()
+        if width != self._width or len(self._heights) > self.cache_limit:
+            self._heights.clear()
+            self._width = width
+        cached = self._heights.get(message.id)
+        if cached is None or cached[0] != len(message.text):
+            text = index.data(Qt.ItemDataRole.DisplayRole)
+            bounds = QFontMetrics(option.font).boundingRect(
+                QRect(0, 0, width, 0), Qt.TextFlag.TextWordWrap, text
+            )
+            cached = (len(message.text), bounds.height() + 2 * self.PADDING)
+            self._heights[message.id] = cached
+        return QSize(width, cached[1])
+
+    def paint(self, painter, option, index):
+        message = index.data(TranscriptModel.MESSAGE_ROLE)
+        painter.save()
+        painter.setFont(option.font)
+        painter.setPen(QColor(self.COLORS.get(message.role, "#D8DEE9")))
+        rect = option.rect.adjusted(2 * self.PADDING, self.PADDING, -2 * self.PADDING, -self.PADDING)
+        painter.drawText(rect, Qt.TextFlag.TextWordWrap, index.data(Qt.ItemDataRole.DisplayRole))
+        painter.restore()
+
+    def text_changed(self, index):
+        """Re-measure a row whose text grew; the view lays itself out again."""
+        self.sizeHintChanged.emit(index)
+
+class TranscriptView(QListView):
+    """Scrolling view of a TranscriptModel that sticks to the bottom unless the user scrolls up."""
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setItemDelegate(TranscriptDelegate(self))
+        self.setUniformItemSizes(False)
+        # Rows are laid out in batches, so a long history never blocks a frame
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(200)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.follow = True
+        model.flushed.connect(self.on_flushed)
+        model.dataChanged.connect(lambda index, *_: self.itemDelegate().text_changed(index))
+        self.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+
+    def on_scrolled(self, value):
+        self.follow = value >= self.verticalScrollBar().maximum()
+
+    def on_flushed(self, added):
+        if self.follow:
+            self.scrollToBottom()
 
 class JarvisGUI(QMainWindow):
     """Main GUI window for Jarvis."""
@@ -354,6 +572,7 @@ class JarvisGUI(QMainWindow):
         self.setWindowTitle("Jarvis Assistant")
         self.setGeometry(100, 100, 800, 600)
         self.setup_ui()
+        self.setup_executor()
         self.setup_voice_thread()
 
     def setup_ui(self):
@@ -363,19 +582,21 @@ class JarvisGUI(QMainWindow):
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(15)
 
-        # Output text area
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
-        self.output_text.setFont(QFont("Arial", 12))
-        self.output_text.setStyleSheet("""
-            QTextEdit {
+        # Transcript: a bounded model, with only the visible rows rendered
+        self.transcript = TranscriptModel(
+            Transcript(TRANSCRIPT_MAX, os.getenv("JARVIS_TRANSCRIPT_ARCHIVE") or None), self
+        )
+        self.transcript_view = TranscriptView(self.transcript)
+        self.transcript_view.setFont(QFont("Arial", 12))
+        self.transcript_view.setStyleSheet("""
+            QListView {
                 background-color: #2E3440;
                 color: #D8DEE9;
                 border-radius: 10px;
                 padding: 15px;
             }
         """)
-        main_layout.addWidget(self.output_text)
+        main_layout.addWidget(self.transcript_view)
 
         # Input layout
         input_layout = QHBoxLayout()
@@ -465,8 +686,64 @@ class JarvisGUI(QMainWindow):
         self.clear_button.clicked.connect(self.clear_output)
         button_layout.addWidget(self.clear_button)
 
+        self.export_button = QPushButton("💾 Export")
+        self.export_button.setFont(QFont("Arial", 12))
+        self.export_button.setStyleSheet("""
+            QPushButton {
+                background-color: #5E81AC;
+                color: white;
+                border-radius: 5px;
+                padding: 10px 20px;
+            }
+            QPushButton:hover {
+                background-color: #81A1C1;
+            }
+        """)
+        self.export_button.clicked.connect(self.export_transcript)
+        button_layout.addWidget(self.export_button)
+
+        self.stats_button = QPushButton("📊 Stats")
+        self.stats_button.setFont(QFont("Arial", 12))
+        self.stats_button.setStyleSheet("""
+            QPushButton {
+                background-color: #5E81AC;
+                color: white;
+                border-radius: 5px;
+                padding: 10px 20px;
+            }
+            QPushButton:hover {
+                background-color: #81A1C1;
+            }
+        """)
+        self.stats_button.clicked.connect(self.toggle_stats)
+        button_layout.addWidget(self.stats_button)
+
         main_layout.addLayout(button_layout)
 
+        # Live per-stage latency, refreshed while visible
+        self.stats_label = QLabel("")
+        self.stats_label.setFont(QFont("Courier New", 10))
+        self.stats_label.setStyleSheet("""
+            QLabel {
+                background-color: #2E3440;
+                color: #A3BE8C;
+                border-radius: 5px;
+                padding: 10px;
+            }
+        """)
+        self.stats_label.setVisible(False)
+        main_layout.addWidget(self.stats_label)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self.update_stats)
+
+        # In-flight commands
+        self.status_label = QLabel("")
+        self.status_label.setFont(QFont("Arial", 10))
+        self.status_label.setStyleSheet("color: #D8DEE9;")
+        self.status_label.setVisible(False)
+        main_layout.addWidget(self.status_label)
+
         # Loading indicator
         self.loading_indicator = QProgressBar()
         self.loading_indicator.setRange(0, 0)
@@ -486,11 +763,23 @@ class JarvisGUI(QMainWindow):
         """)
 
 
+    def setup_executor(self):
+        """Set up the worker pool that runs commands off the GUI thread."""
+        self.executor = CommandExecutor(parent=self)
+        self.streaming_commands = {}  # command id -> transcript message being streamed into
+        self.executor.command_progress.connect(self.show_partial_response)
+        self.executor.command_finished.connect(self.show_response)
+        self.executor.command_failed.connect(self.show_command_error)
+        self.executor.command_cancelled.connect(lambda command_id: self.streaming_commands.pop(command_id, None))
+        self.executor.in_flight_changed.connect(self.update_in_flight)
+
     def setup_voice_thread(self):
         """Set up and start the voice thread."""
         self.voice_thread = VoiceThread()
         self.voice_thread.command_received.connect(self.process_voice_command)
+        self.voice_thread.notice.connect(self.show_notice)
         self.voice_thread.error_occurred.connect(self.show_error)
+        self.voice_thread.partial_transcript.connect(self.show_partial_transcript)
         self.voice_thread.start()
 
     def process_text_command(self):
@@ -498,54 +787,145 @@ class JarvisGUI(QMainWindow):
         command = self.input_field.text().strip()
         self.input_field.clear()
         if command:
-            self.output_text.append(f"<span style='color:#88C0D0'>You:</span> {command}")
-            self.loading_indicator.setVisible(True)
-            QTimer.singleShot(100, lambda: self.process_command(command, is_voice=False))
+            self.transcript.add("user", command)
+            self.process_command(command, is_voice=False)
 
     def toggle_voice_command(self):
         """Toggle voice command listening."""
-        global LISTENING
-        LISTENING = not LISTENING
-        status = "listening" if LISTENING else "sleeping"
-        self.output_text.append(f"<span style='color:#81A1C1'>Jarvis:</span> Voice command is now {status}\n")
-        self.voice_button.setText("🎤 Stop Listening" if LISTENING else "🎤 Voice Command")
+        self.voice_thread.listening = not self.voice_thread.listening
+        status = "listening" if self.voice_thread.listening else "sleeping"
+        self.transcript.add("jarvis", f"Voice command is now {status}")
+        self.voice_button.setText("🎤 Stop Listening" if self.voice_thread.listening else "🎤 Voice Command")
 
     def stop_session(self):
         """Stop the current session."""
-        global LISTENING
-        LISTENING = False
-        speech_engine.stop()
-        self.output_text.append(f"<span style='color:#81A1C1'>Jarvis:</span> Session stopped.\n")
+        self.voice_thread.listening = False
+        cancelled = self.executor.cancel_all()
+        assistant().speech.stop()
+        self.transcript.add("jarvis", "Session stopped.")
+        if cancelled:
+            self.transcript.add("jarvis", f"Cancelled {cancelled} pending command(s).")
         self.voice_button.setText("🎤 Voice Command")
 
-    def process_voice_command(self, command):
+    def toggle_stats(self):
+        """Show or hide the latency panel."""
+        visible = not self.stats_label.isVisible()
+        self.stats_label.setVisible(visible)
+        if visible:
+            self.update_stats()
+            self.stats_timer.start()
+        else:
+            self.stats_timer.stop()
+
+    def update_stats(self):
+        """Refresh the latency panel from the tracer."""
+        text = tracer.format_stats()
+        speculator = assistant().speculator
+        if speculator is not None:
+            stats = speculator.stats()
+            text += (f"\nspeculation: used {sum(stats['used'].values())}, wasted {sum(stats['wasted'].values())}, "
+                     f"head start {stats['mean_head_start_ms']:.0f} ms")
+        self.stats_label.setText(text)
+
+    def show_notice(self, message):
+        """Show and speak a status message from the voice thread."""
+        self.transcript.add("jarvis", message)
+        assistant().speech.speak(message, priority=PRIORITY_HIGH)
+
+    def show_partial_transcript(self, text):
+        """Show what the recognizer has heard so far."""
+        self.statusBar().showMessage(f"Hearing: {text}", 3000)
+
+    def process_voice_command(self, command, interaction_id=None):
         """Process command from voice input."""
-        self.output_text.append(f"<span style='color:#88C0D0'>You (Voice):</span> {command}")
-        self.loading_indicator.setVisible(True)
-        QTimer.singleShot(100, lambda: self.process_command(command, is_voice=True))
-
-    def process_command(self, command, is_voice=True):
-        """Process the command and update the GUI."""
-        try:
-            response = process_command(command, is_voice)
-            self.output_text.append(f"<span style='color:#81A1C1'>Jarvis:</span> {response}\n")
-            self.output_text.verticalScrollBar().setValue(self.output_text.verticalScrollBar().maximum())
-            if is_voice:
-                speech_engine.speak(response)
-        except Exception as e:
-            error_msg = f"Error processing command: {str(e)}"
-            self.output_text.append(f"<span style='color:#BF616A'>Error:</span> {error_msg}\n")
-        finally:
-            self.loading_indicator.setVisible(False)
+        self.statusBar().clearMessage()
+        self.transcript.add("voice", command)
+        self.process_command(command, is_voice=True, interaction_id=interaction_id)
+
+    def process_command(self, command, is_voice=True, interaction_id=None):
+        """Hand the command to the executor; the result arrives via show_response."""
+        self.executor.submit(command, is_voice, interaction_id)
+
+    def show_partial_response(self, command_id, token):
+        """Append a streamed token to the command's response as it arrives."""
+        message = self.streaming_commands.get(command_id)
+        if message is None:
+            self.streaming_commands[command_id] = self.transcript.add("jarvis", token)
+            return
+        message.text += token
+        self.transcript.touch(message)
+
+    def show_response(self, command_id, response):
+        """Display a finished command's response."""
+        message = self.streaming_commands.pop(command_id, None)
+        if message is not None:
+            # The text is already on screen; settle it on the final version
+            if message.text.strip() != response:
+                message.text = response
+                self.transcript.touch(message)
+        else:
+            self.transcript.add("jarvis", response)
+
+    def show_command_error(self, command_id, error_msg):
+        """Display a command that raised on the worker pool."""
+        self.streaming_commands.pop(command_id, None)
+        self.transcript.add("error", error_msg)
+
+    def update_in_flight(self, in_flight):
+        """Show which commands are still running."""
+        self.loading_indicator.setVisible(bool(in_flight))
+        self.status_label.setVisible(bool(in_flight))
+        if in_flight:
+            pending = ", ".join(f"#{command_id} {command}" for command_id, command in in_flight)
+            self.status_label.setText(f"Running {len(in_flight)}: {pending}")
 
     def show_error(self, message):
         """Display error messages."""
-        self.output_text.append(f"<span style='color:#BF616A'>Error:</span> {message}\n")
+        self.transcript.add("error", message)
         self.loading_indicator.setVisible(False)
 
     def clear_output(self):
         """Clear the output text area."""
-        self.output_text.clear()
+        self.transcript.clear()
+
+    def export_transcript(self):
+        """Save the whole session, archived messages included, to a file."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export transcript", "jarvis-transcript.txt", "Text (*.txt);;JSON lines (*.jsonl)"
+        )
+        if not path:
+            return
+        try:
+            self.transcript.flush()
+            self.transcript.transcript.export(path)
+            self.statusBar().showMessage(f"Transcript saved to {path}", 5000)
+        except OSError as e:
+            self.show_error(f"Could not export transcript: {e}")
+
+    def closeEvent(self, event):
+        """Shut the worker pool down with the window."""
+        self.executor.shutdown()
+        self.voice_thread.stop()
+        super().closeEvent(event)
+
+def warm_up():
+    """Load what the first commands will need while the window is already usable."""
+    parts = assistant()
+    parts.app_index.start()
+    parts.launcher.start_reaper()
+    parts.speech.prewarm(parts.engine.static_phrases)
+    if CONFIG_POLL > 0:
+        RegistryWatcher(parts.engine.reload, interval=CONFIG_POLL).start()
+    parts.engine.conversation.tokenizer.count("")
+    try:
+        get_openai()
+    except Exception as e:
+        print(f"ChatGPT unavailable: {e}")
+    try:
+        # Slow to import, and it checks the network on import
+        importlib.import_module("pywhatkit")
+    except Exception as e:
+        print(f"YouTube playback unavailable: {e}")
 
 def main():
     """Main function to run the GUI."""
@@ -560,6 +940,11 @@ def main():
     
     window = JarvisGUI()
     window.show()
+    # Everything slow happens after the first frame is on screen
+    threading.Thread(target=warm_up, name="jarvis-warmup", daemon=True).start()
+    if os.getenv("JARVIS_STARTUP_PROBE"):
+        # Used by benchmarks/bench_startup.py: report once the event loop is running, then exit
+        QTimer.singleShot(0, lambda: (print("startup-probe: window shown", flush=True), app.quit()))
     sys.exit(app.exec())
 
 if __name__ == "__main__":
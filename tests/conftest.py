@@ -0,0 +1,69 @@
+"""Shared fakes for the tests: a counting ChatGPT client and a fixed app index."""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.cache import ResponseCache
+from jarvis.engine import DryRun, JarvisEngine
+from jarvis.registry import DEFAULT_CONFIG, Registry
+
+
+class CountingLLM:
+    """OpenAI-style client that answers at once and counts requests; needs no openai package."""
+    def __init__(self):
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **kwargs):
+        self.requests += 1
+        content = f"Answer {self.requests}."
+        if stream:
+            return CountingStream(content)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class CountingStream(list):
+    def __init__(self, content):
+        super().__init__([SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])])
+
+    def close(self):
+        pass
+
+
+class KnownApps:
+    """App index with a fixed set of installed apps."""
+    def __init__(self, names):
+        self.names = set(names)
+
+    def lookup(self, name, wait=2.0):
+        return [name] if name in self.names else None
+
+
+@pytest.fixture(autouse=True)
+def scratch_cache(tmp_path, monkeypatch):
+    """Keep session files and caches out of the user's home."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("JARVIS_CACHE_DB", "")
+
+
+@pytest.fixture
+def llm():
+    return CountingLLM()
+
+
+@pytest.fixture
+def dry_run():
+    return DryRun()
+
+
+@pytest.fixture
+def engine(llm, dry_run):
+    """An engine on the built-in registry that opens nothing and knows a few apps."""
+    return JarvisEngine("test", open_url=dry_run.open_url, play_video=dry_run.play_video,
+                        resolve_video=dry_run.resolve_video, launcher=dry_run,
+                        app_index=KnownApps(["spotify", "calculator", "notepad"]), llm=llm,
+                        cache=ResponseCache(), registry=Registry.load([DEFAULT_CONFIG]))
@@ -0,0 +1,55 @@
+"""The installed-app index: scanning errors and rebuilds never hold up a lookup."""
+import os
+import time
+
+from jarvis import apps
+from jarvis.apps import AppIndex
+
+
+def make_index(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (tmp_path / "share" / "applications").mkdir(parents=True)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "share"))
+    monkeypatch.setenv("XDG_DATA_DIRS", str(tmp_path / "none"))
+    return AppIndex(cache_path=str(tmp_path / "apps.json"), system="linux"), bin_dir
+
+
+def add_app(bin_dir, name):
+    path = bin_dir / name
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+
+
+def test_unreadable_directory_does_not_stall_lookups(tmp_path, monkeypatch):
+    index, bin_dir = make_index(tmp_path, monkeypatch)
+    add_app(bin_dir, "calculator")
+
+    def listdir(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(apps.os, "listdir", listdir)
+    index.start().join(5)
+    start = time.perf_counter()
+    assert index.lookup("calculator") == [str(bin_dir / "calculator")]
+    assert index.lookup("nothing installed") is None
+    assert time.perf_counter() - start < 1
+
+
+def test_stale_index_is_rebuilt_in_the_background(tmp_path, monkeypatch):
+    index, bin_dir = make_index(tmp_path, monkeypatch)
+    index.load()
+    add_app(bin_dir, "notepad")
+    os.utime(bin_dir, ns=(time.time_ns(), time.time_ns() + 10**9))
+    build = index.build
+    # A slow scan, to show the lookup doesn't wait for it
+    monkeypatch.setattr(index, "build", lambda: (time.sleep(0.5), build()))
+
+    start = time.perf_counter()
+    assert index.lookup("notepad") is None
+    assert time.perf_counter() - start < 0.4
+    deadline = time.monotonic() + 5
+    while index.lookup("notepad") is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert index.lookup("notepad") == [str(bin_dir / "notepad")]
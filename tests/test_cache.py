@@ -0,0 +1,13 @@
+"""Response caching of ChatGPT answers across a conversation."""
+
+
+def test_repeated_question_is_answered_from_the_cache(engine, llm):
+    for _ in range(3):
+        engine.process_command("tell me a joke", is_voice=False, on_token=lambda token: None)
+    assert llm.requests == 1
+
+
+def test_follow_up_is_not_answered_from_the_cache(engine, llm):
+    engine.process_command("tell me a joke", is_voice=False, on_token=lambda token: None)
+    engine.process_command("tell me another one", is_voice=False, on_token=lambda token: None)
+    assert llm.requests == 2
@@ -0,0 +1,52 @@
+"""The local daemon: authentication and request validation."""
+import http.client
+import json
+
+import pytest
+
+from jarvis.cli import MAX_BODY_BYTES, TOKEN_HEADER, JarvisServer, SessionPool
+
+
+@pytest.fixture
+def server(llm):
+    server = JarvisServer(SessionPool(dry_run=True, llm=llm), port=0, token="secret").start()
+    yield server
+    server.stop()
+
+
+def post(server, body, headers):
+    host, port = server.address.rsplit("/", 1)[-1].split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=5)
+    connection.putrequest("POST", "/commands")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    status = response.status
+    connection.close()
+    return status
+
+
+def headers(length, token="secret"):
+    return {TOKEN_HEADER: token, "Content-Type": "application/json", "Content-Length": str(length)}
+
+
+def test_commands_run_with_the_token(server):
+    body = json.dumps({"session": "test", "commands": ["open google"]}).encode()
+    assert post(server, body, headers(len(body))) == 200
+
+
+def test_missing_token_is_refused(server):
+    body = b"{}"
+    assert post(server, body, headers(len(body), token="wrong")) == 401
+
+
+@pytest.mark.parametrize("length, status", [(-1, 400), ("ten", 400), (MAX_BODY_BYTES + 1, 413)])
+def test_bad_content_length_is_refused_before_reading(server, length, status):
+    assert post(server, b"", headers(length)) == status
+
+
+def test_dry_run_sessions_never_look_up_videos(llm):
+    pool = SessionPool(dry_run=True, llm=llm)
+    engine, _ = pool.engine("test")
+    assert engine.resolve_video == pool.dry_run.resolve_video
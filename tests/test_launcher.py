@@ -0,0 +1,59 @@
+"""Detached app launches with dummy executables: latency, closing and reaping."""
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from jarvis.launcher import AppLauncher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="uses /proc and POSIX sessions")
+
+
+def make_dummy(directory, name, seconds):
+    """Write an executable that stays open for the given number of seconds."""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\nimport time\ntime.sleep({seconds})\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def is_zombie(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] == "Z"
+    except OSError:
+        return False
+
+
+@pytest.fixture
+def launcher():
+    launcher = AppLauncher(reap_interval=0.05)
+    yield launcher
+    launcher.stop()
+
+
+def test_launch_does_not_wait_for_the_app(tmp_path, launcher):
+    app = make_dummy(tmp_path, "dummy-calculator", 30)
+    start = time.perf_counter()
+    for _ in range(5):
+        launcher.launch("calculator", [app])
+    # Five apps that each stay open for 30 s
+    assert time.perf_counter() - start < 5
+    assert launcher.stats()["launched"] == 5
+    assert launcher.stats()["mean_launch_ms"] > 0
+    assert len(launcher.running()) == 5
+    assert launcher.close("calculator") == 5
+
+
+def test_exited_apps_are_reaped(tmp_path, launcher):
+    app = make_dummy(tmp_path, "dummy-clock", 0)
+    pids = [launcher.launch("clock", [app]).pid for _ in range(5)]
+    launcher.start_reaper()
+    deadline = time.monotonic() + 10
+    while launcher.stats()["running"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert launcher.stats()["reaped"] == 5
+    assert not any(is_zombie(pid) for pid in pids)
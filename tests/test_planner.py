@@ -0,0 +1,37 @@
+"""Splitting compound commands into steps."""
+import pytest
+
+
+def launched(dry_run):
+    return [argv for action, argv in dry_run.actions if action == "launch"]
+
+
+def test_verb_is_carried_onto_a_bare_known_app(engine):
+    steps = engine.planner.plan("open calculator and notepad")
+    assert [step.text for step in steps] == ["open calculator", "open notepad"]
+
+
+def test_verb_is_not_carried_onto_a_pronoun(engine, dry_run):
+    steps = engine.planner.plan("open spotify and then close it") or []
+    assert "open close it" not in [step.text for step in steps]
+    engine.process_command("open spotify and then close it", is_voice=False)
+    assert ["close it"] not in launched(dry_run)
+
+
+@pytest.mark.parametrize("command", ["is it better to run and then stretch"])
+def test_question_launches_nothing(engine, dry_run, command):
+    engine.process_command(command, is_voice=False)
+    assert launched(dry_run) == []
+
+
+def test_clause_about_the_one_before_is_not_a_separate_question(engine):
+    assert engine.planner.plan("tell me a joke and explain it") is None
+
+
+def test_batched_questions_are_remembered_and_cached_as_said(engine, llm):
+    command = "what is the capital of france and who wrote hamlet"
+    assert [step.route for step in engine.planner.plan(command)] == [None, None]
+    for _ in range(2):
+        engine.process_command(command, is_voice=False, on_token=lambda token: None)
+    assert llm.requests == 1
+    assert [turn["user"] for turn in engine.conversation.turns] == [command, command]
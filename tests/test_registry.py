@@ -0,0 +1,22 @@
+"""Loading and validating the command registry."""
+import pytest
+
+from jarvis.registry import DEFAULT_CONFIG, Registry
+
+
+def load(tmp_path, response):
+    path = tmp_path / "commands.toml"
+    path.write_text(f'[[intents]]\nname = "weather"\npattern = "weather in (?P<city>.+)"\nresponse = "{response}"\n')
+    return Registry.load([DEFAULT_CONFIG, str(path)])
+
+
+def test_named_fields_are_filled_from_the_pattern(tmp_path):
+    registry = load(tmp_path, "It is sunny in {city}")
+    assert [spec.slots for spec in registry.intents] == [("city",)]
+
+
+@pytest.mark.parametrize("response", ["It is sunny in {}", "It is sunny in {0}", "It is sunny in {country}",
+                                      "It is sunny in {city"])
+def test_fields_the_pattern_cannot_fill_are_rejected_at_load(tmp_path, response):
+    with pytest.raises(ValueError, match="weather"):
+        load(tmp_path, response)
@@ -0,0 +1,30 @@
+"""Predicting commands from partial transcripts on the voice thread."""
+from jarvis.speculate import Speculator
+
+
+class RecordingApps:
+    """App index that records how long each lookup was allowed to wait."""
+    def __init__(self):
+        self.waits = []
+
+    def lookup(self, name, wait=2.0):
+        self.waits.append(wait)
+        return [name] if name == "spotify" else None
+
+
+def test_partials_are_classified_without_blocking(engine):
+    engine.app_index = apps = RecordingApps()
+    speculator = Speculator(engine, llm=False)
+    classify = engine.classify
+    held = []
+
+    def checking_classify(*args, **kwargs):
+        held.append(speculator._lock.locked())
+        return classify(*args, **kwargs)
+
+    engine.classify = checking_classify
+    for partial in ["could you", "could you launch", "could you launch spotify for me"]:
+        speculator.update(partial)
+    speculator.shutdown()
+    assert held and not any(held)
+    assert apps.waits and set(apps.waits) == {0}
@@ -0,0 +1,69 @@
+"""The wake-word stage over WAV fixtures, with a stand-in spotter."""
+import array
+import math
+import wave
+
+import pytest
+
+wakeword = pytest.importorskip("jarvis.wakeword", exc_type=ImportError)
+
+
+class LongUtteranceSpotter(wakeword.KeywordSpotter):
+    """Hears the wake word in any utterance of at least min_seconds."""
+    name = "stub"
+
+    def __init__(self, keyword, recognizer=None, min_seconds=0.5):
+        super().__init__(keyword)
+        self.min_seconds = min_seconds
+        self.heard = []
+
+    def spot(self, audio):
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        self.heard.append(seconds)
+        return seconds >= self.min_seconds
+
+
+def write_wav(path, segments, rate=wakeword.SAMPLE_RATE):
+    """Write 16-bit mono audio made of (seconds, amplitude) stretches of a 440 Hz tone."""
+    samples = array.array("h")
+    for seconds, amplitude in segments:
+        for i in range(int(seconds * rate)):
+            samples.append(int(amplitude * math.sin(2 * math.pi * 440 * i / rate)))
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_spotter_only_hears_speech(tmp_path):
+    path = write_wav(tmp_path / "wake.wav", [(1.0, 0), (0.8, 8000), (1.0, 0)])
+    spotter = LongUtteranceSpotter("jarvis")
+    detector = wakeword.WakeWordDetector(spotter)
+    hits = wakeword.detect_in_wav(path, detector)
+    assert len(hits) == 1
+    # One decode, of the tone plus the hangover, never of the silence around it
+    assert detector.decodes == 1
+    assert spotter.heard[0] < 1.5
+    stats = detector.stats()
+    assert stats["detections"] == 1
+    assert stats["cpu_seconds"] > 0
+    assert stats["mean_latency_ms"] >= 0
+
+
+def test_silence_and_short_noises_do_not_fire(tmp_path):
+    path = write_wav(tmp_path / "quiet.wav", [(1.0, 0), (0.1, 8000), (1.0, 0)])
+    detector = wakeword.WakeWordDetector(LongUtteranceSpotter("jarvis"))
+    assert wakeword.detect_in_wav(path, detector) == []
+    assert detector.decodes == 1
+
+
+def test_missing_local_engine_is_an_error(monkeypatch):
+    class Missing(wakeword.KeywordSpotter):
+        def __init__(self, keyword, recognizer=None):
+            raise ImportError("No module named 'pocketsphinx'")
+
+    monkeypatch.setitem(wakeword.SPOTTERS, "sphinx", Missing)
+    with pytest.raises(RuntimeError, match="JARVIS_WAKE_ENGINE=google"):
+        wakeword.make_spotter("sphinx", "jarvis")